@@ -3,14 +3,21 @@ Notification Agent Package
 """
 from .scheduler import NotificationScheduler
 from .message_generator import MessageGenerator
-from .state_manager import StateManager
+from .state_manager import StateManager, SqliteStateManager
 from .invoice_monitor import InvoiceMonitor
 from .notification_dispatcher import NotificationDispatcher
+from .async_dispatch import AsyncDispatcher
+from .exposure_aggregates import ExposureAggregates
+from .deadline_index import DeadlineIndex
 
 __all__ = [
     'NotificationScheduler',
     'MessageGenerator',
     'StateManager',
+    'SqliteStateManager',
     'InvoiceMonitor',
-    'NotificationDispatcher'
+    'NotificationDispatcher',
+    'AsyncDispatcher',
+    'ExposureAggregates',
+    'DeadlineIndex'
 ]
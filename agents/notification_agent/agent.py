@@ -5,21 +5,26 @@ ADK-Integrated Notification Agent with Enhanced Time Features
 from google.adk.agents import Agent
 from typing import Dict, List
 import json
-from datetime import datetime
+from datetime import datetime, time
 import sys
 from pathlib import Path
 
-# Add current directory to Python path
+# Add current directory (and repo root, for lib/) to Python path
 current_dir = Path(__file__).parent
-if str(current_dir) not in sys.path:
-    sys.path.insert(0, str(current_dir))
+for path in (current_dir, current_dir.parent.parent):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
 
 # Import enhanced modules
 from scheduler import NotificationScheduler
 from message_generator import MessageGenerator
-from state_manager import StateManager
+from state_manager import SqliteStateManager
 from invoice_monitor import InvoiceMonitor
 from notification_dispatcher import NotificationDispatcher
+from exposure_aggregates import ExposureAggregates
+from deadline_index import DeadlineIndex
+from reconciliation import reconcile_payments as run_reconciliation
+from lib.ledger_ingest import ingest_ledger
 
 
 # Initialize module instances
@@ -27,7 +32,9 @@ invoice_monitor = InvoiceMonitor("invoices.json")
 scheduler = NotificationScheduler()
 dispatcher = NotificationDispatcher(enable_desktop=True)
 message_gen = MessageGenerator()
-state_manager = StateManager()
+state_manager = SqliteStateManager()  # shared with notification_service / NotificationAgent
+exposure = ExposureAggregates(scheduler).attach(invoice_monitor, state_manager)
+deadlines = DeadlineIndex().attach(invoice_monitor, state_manager)
 
 
 # Define tools with enhanced time support
@@ -176,6 +183,94 @@ def get_notification_strategy(invoice_datetime: str, deadline_days: int) -> Dict
     }
 
 
+def import_invoice_ledger(file_path: str) -> Dict:
+    """
+    Imports invoices from a CSV/XLSX accounting export (Tally, ERP).
+
+    Args:
+        file_path: Path to the .csv or .xlsx ledger
+
+    Returns:
+        Import report with rows read, invoices imported, duplicates and invalid rows.
+    """
+    try:
+        # One store write for the whole ledger instead of one per chunk
+        with invoice_monitor.batch():
+            return ingest_ledger(file_path, invoice_monitor.merge_invoices, chunk_size=1000)
+    except (ValueError, ImportError, FileNotFoundError) as e:
+        return {"error": str(e)}
+
+
+def get_exposure_summary(vendor: str = "", date: str = "", top_n: int = 5) -> Dict:
+    """
+    Gets current 43B(h) exposure from the live aggregates (no invoice re-scan).
+
+    Args:
+        vendor: Optional client/vendor name to get that vendor's exposure
+        date: Optional deadline date (YYYY-MM-DD) to get exposure due that day
+        top_n: Number of top vendors (by amount at risk) to include
+
+    Returns:
+        Amount at risk, tax deduction at stake (35% of unpaid), overdue totals
+        and invoice counts by urgency level.
+    """
+    if vendor:
+        return exposure.vendor(vendor) or {"vendor": vendor, "invoice_count": 0, "amount_at_risk": 0.0}
+    if date:
+        return exposure.day(date) or {"date": date, "invoice_count": 0, "amount_at_risk": 0.0}
+
+    return {
+        "totals": exposure.totals(),
+        "top_vendors": exposure.top_vendors(top_n)
+    }
+
+
+def get_payment_calendar(start_date: str = "", end_date: str = "", limit: int = 20) -> Dict:
+    """
+    Lists unpaid invoices falling due in a date range (payment calendar).
+
+    Args:
+        start_date: First day to include (YYYY-MM-DD); empty means from now
+        end_date: Last day to include (YYYY-MM-DD); empty means no end
+        limit: Maximum invoices to list
+
+    Returns:
+        Number of invoices due in the range and the earliest ones with their deadlines.
+    """
+    try:
+        start = datetime.combine(datetime.fromisoformat(start_date).date(), time.min) if start_date else datetime.now()
+        end = datetime.combine(datetime.fromisoformat(end_date).date(), time.max) if end_date else None
+    except ValueError as e:
+        return {"error": f"Invalid date: {e}"}
+
+    invoices = deadlines.range(start, end, limit=limit)
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat() if end else None,
+        "due_count": deadlines.count(start, end),
+        "listed": len(invoices),
+        "listed_amount": round(sum(float(inv["amount"] or 0) for inv in invoices), 2),
+        "invoices": invoices
+    }
+
+
+def reconcile_payments(file_path: str, dry_run: bool = False) -> Dict:
+    """
+    Matches a bank statement / payment export to open invoices and marks matches paid.
+
+    Args:
+        file_path: Path to the .csv or .xlsx payment export
+        dry_run: If True, only report matches without marking invoices paid
+
+    Returns:
+        Reconciliation report with matched invoices, payments needing review and unmatched payments.
+    """
+    try:
+        return run_reconciliation(file_path, invoice_monitor, state_manager, dry_run=dry_run)
+    except (ValueError, ImportError, FileNotFoundError) as e:
+        return {"error": str(e)}
+
+
 # Create the root_agent with enhanced features
 root_agent = Agent(
     name="invoice_notification_agent",
@@ -192,6 +287,10 @@ Available tools:
 - analyze_invoices(): Get invoices with enhanced time info (includes "Due tomorrow at 05:00 PM" style descriptions)
 - send_notification(invoice_id, client_name, time_description, urgency_level): Send notification WITH TIME
 - get_notification_strategy(invoice_datetime, deadline_days): Get strategy with time calculation
+- import_invoice_ledger(file_path): Import invoices from a CSV/XLSX accounting export
+- get_exposure_summary(vendor, date, top_n): Amount at risk, tax at stake and urgency counts (overall, per vendor or per deadline day)
+- get_payment_calendar(start_date, end_date, limit): Invoices falling due in a date range (e.g. "due this week"), earliest first
+- reconcile_payments(file_path, dry_run): Match a bank statement / payment export to invoices and mark them paid
 
 IMPORTANT - Time Descriptions:
 When sending notifications, ALWAYS include the time_description parameter from analyze_invoices().
@@ -211,7 +310,8 @@ Never say "1 days left" - always use the time_description like "Due tomorrow at
 Be precise with times and always include hour information from the time_description field.
 """,
     description="An AI agent that manages invoice notifications with precise time tracking",
-    tools=[analyze_invoices, send_notification, get_notification_strategy]
+    tools=[analyze_invoices, send_notification, get_notification_strategy, import_invoice_ledger,
+           get_exposure_summary, get_payment_calendar, reconcile_payments]
 )
 
 
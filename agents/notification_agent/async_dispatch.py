@@ -0,0 +1,102 @@
+"""
+Async Dispatch Module - Concurrent multi-channel notification delivery
+
+NotificationDispatcher sends desktop, then WhatsApp, then email, one invoice
+after another, so one slow SMTP server delays every later alert. The
+pipeline here runs each (invoice, channel) send as its own task:
+
+    - a per-channel semaphore bounds how many sends of that channel are in
+      flight (e.g. SMTP sessions, Twilio throughput)
+    - the blocking channel senders run on a dedicated thread pool
+    - a send is never abandoned: its slot is held and its result recorded
+      only once the sender returns. Worker threads cannot be interrupted, so
+      giving up on one early would leave it running past the channel limit,
+      and a late success would go unrecorded and be sent again next cycle.
+      Each sender bounds its own time instead (SMTP socket timeout, Twilio
+      request timeout and capped retries, desktop command timeout).
+
+A cycle then takes about as long as its slowest single send rather than the
+sum of all sends. Results have the same shape as send_notification: the list
+of channels that succeeded, per invoice.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import functools
+
+CHANNELS = ("desktop", "whatsapp", "email")
+DEFAULT_CONCURRENCY = {"desktop": 4, "whatsapp": 8, "email": 4}
+
+# (message, urgency_level, invoice_data, user_preferences)
+NotificationJob = Tuple[str, str, Dict, Optional[Dict]]
+
+
+class AsyncDispatcher:
+    """Runs a NotificationDispatcher's channel senders concurrently"""
+
+    def __init__(self, dispatcher, concurrency: Optional[Dict[str, int]] = None):
+        self.dispatcher = dispatcher
+        self.concurrency = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+        # Enough threads for every channel's limit, so no channel waits on another's
+        self._executor = ThreadPoolExecutor(max_workers=sum(self.concurrency.values()),
+                                            thread_name_prefix="dispatch")
+
+    def _sends(self, message: str, urgency_level: str, invoice_data: Dict,
+               user_preferences: Optional[Dict]) -> List[Tuple[str, functools.partial]]:
+        """The (channel, blocking call) pairs send_notification would make, in its order"""
+        d = self.dispatcher
+        invoice_id = invoice_data.get("invoice_id")
+        sends = []
+
+        if d.enable_desktop:
+            sends.append(("desktop", functools.partial(
+                d.send_desktop_notification, f"Invoice #{invoice_id} Reminder", message,
+                urgency_level == "explosive"
+            )))
+
+        # Disabled channels would just return False, so they are skipped outright
+        if (d.enable_whatsapp and user_preferences and user_preferences.get("whatsapp_consent")
+                and user_preferences.get("phone_number")):
+            sends.append(("whatsapp", functools.partial(
+                d.send_whatsapp_notification, user_preferences["phone_number"], message
+            )))
+
+        if d.enable_email and user_preferences and user_preferences.get("email"):
+            sends.append(("email", functools.partial(
+                d.send_email_notification, user_preferences["email"],
+                f"Invoice Reminder: #{invoice_id}", message
+            )))
+        return sends
+
+    async def _send(self, semaphores: Dict[str, asyncio.Semaphore], channel: str, call) -> bool:
+        loop = asyncio.get_running_loop()
+        async with semaphores[channel]:
+            try:
+                return bool(await loop.run_in_executor(self._executor, call))
+            except Exception as e:
+                print(f"❌ {channel} send failed: {e}")
+                return False
+
+    async def _dispatch(self, semaphores: Dict[str, asyncio.Semaphore], job: NotificationJob) -> List[str]:
+        sends = self._sends(*job)
+        results = await asyncio.gather(*(self._send(semaphores, channel, call) for channel, call in sends))
+        return [channel for (channel, _), ok in zip(sends, results) if ok]
+
+    async def dispatch_many_async(self, jobs: List[NotificationJob]) -> List[List[str]]:
+        """Send every job on every channel concurrently; successful channels per job, in order"""
+        semaphores = {channel: asyncio.Semaphore(self.concurrency[channel]) for channel in CHANNELS}
+        return list(await asyncio.gather(*(self._dispatch(semaphores, job) for job in jobs)))
+
+    def dispatch_many(self, jobs: List[NotificationJob]) -> List[List[str]]:
+        """Blocking entry point for synchronous callers (runs its own event loop)"""
+        if not jobs:
+            return []
+        return asyncio.run(self.dispatch_many_async(jobs))
+
+    def send_notification(self, message: str, urgency_level: str, invoice_data: Dict,
+                          user_preferences: Dict = None) -> List[str]:
+        """Drop-in for NotificationDispatcher.send_notification, channels sent in parallel"""
+        return self.dispatch_many([(message, urgency_level, invoice_data, user_preferences)])[0]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,117 @@
+"""
+Deadline Index Module - Sorted index of unpaid invoice deadlines
+
+Backs payment-calendar queries ("what falls due between Monday and Friday")
+without reloading and recomputing every invoice. Deadlines are kept in one
+sorted list maintained with bisect, so range counts are O(log n) and range /
+next-K listings are O(log n + k). An insert or removal finds its place in
+O(log n) but shifts the tail of the list, so it is O(n); that is one memmove
+of pointers, cheap next to re-reading the invoice store, and invoices change
+far less often than the calendar is queried.
+"""
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import threading
+
+try:
+    from .scheduler import invoice_deadline
+except ImportError:
+    from scheduler import invoice_deadline
+
+
+class DeadlineIndex:
+    """Unpaid invoices ordered by exact deadline"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []     # sorted (deadline, invoice_id)
+        self._entries = {}  # invoice_id -> {invoice_id, client_name, amount, deadline_datetime}
+        self._deadlines = {}  # invoice_id -> deadline, to find its key on removal
+
+    def load(self, invoices: Iterable[Dict]):
+        """Rebuild from a full invoice list"""
+        with self._lock:
+            self._keys = []
+            self._entries.clear()
+            self._deadlines.clear()
+            self.upsert(invoices)
+
+    def upsert(self, invoices: Iterable[Dict]):
+        """Add or move invoices; paid ones are dropped from the index"""
+        with self._lock:
+            for inv in invoices:
+                invoice_id = inv.get("invoice_id")
+                self.remove(invoice_id)
+                if inv.get("paid", False):
+                    continue
+                try:
+                    deadline = invoice_deadline(inv)
+                except (TypeError, ValueError):
+                    continue
+                insort(self._keys, (deadline, invoice_id))
+                self._deadlines[invoice_id] = deadline
+                self._entries[invoice_id] = {
+                    "invoice_id": invoice_id,
+                    "client_name": inv.get("client_name") or inv.get("vendor_name"),
+                    "amount": inv.get("amount", 0),
+                    "deadline_datetime": deadline.isoformat()
+                }
+
+    def remove(self, invoice_id: str):
+        """Drop an invoice (e.g. once paid)"""
+        with self._lock:
+            deadline = self._deadlines.pop(invoice_id, None)
+            if deadline is None:
+                return
+            pos = bisect_left(self._keys, (deadline, invoice_id))
+            del self._keys[pos]
+            del self._entries[invoice_id]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _bounds(self, start: Optional[datetime], end: Optional[datetime]) -> tuple:
+        # Tuples compare by deadline first; ("",) / (chr(0x10FFFF),) bracket every invoice_id
+        lo = bisect_left(self._keys, (start, "")) if start else 0
+        hi = bisect_right(self._keys, (end, chr(0x10FFFF))) if end else len(self._keys)
+        return lo, max(lo, hi)
+
+    def count(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+        """Number of deadlines in [start, end] (open-ended when None)"""
+        with self._lock:
+            lo, hi = self._bounds(start, end)
+            return hi - lo
+
+    def range(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              limit: Optional[int] = None) -> List[Dict]:
+        """Invoices due in [start, end], earliest first"""
+        with self._lock:
+            lo, hi = self._bounds(start, end)
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            return [dict(self._entries[invoice_id]) for _, invoice_id in self._keys[lo:hi]]
+
+    def next_deadlines(self, k: int = 10, after: Optional[datetime] = None) -> List[Dict]:
+        """The next k deadlines from `after` (now by default)"""
+        return self.range(after or datetime.now(), None, limit=k)
+
+    def attach(self, invoice_monitor, state_manager=None):
+        """
+        Seed from the monitor's invoices and follow its writes (and paid marks)
+
+        Paid marks made through the state manager live only in its store, and
+        its listeners fire only in the process that made them, so the seed and
+        every write are also checked against state_manager.is_paid.
+        """
+        def with_paid_marks(invoices):
+            if state_manager is None:
+                return invoices
+            return [dict(inv, paid=True) if state_manager.is_paid(inv.get("invoice_id")) else inv
+                    for inv in invoices]
+
+        self.load(with_paid_marks(invoice_monitor.load_invoices()))
+        invoice_monitor.add_listener(lambda invoices: self.upsert(with_paid_marks(invoices)))
+        if state_manager is not None:
+            state_manager.add_paid_listener(self.remove)
+        return self
@@ -0,0 +1,226 @@
+"""
+Exposure Aggregates Module - Incrementally maintained 43B(h) exposure totals
+
+Keeps running totals (amount at risk, tax deduction at stake, counts by
+urgency level) overall, per vendor and per deadline day. Totals are updated
+when invoices are added, paid or cross an urgency boundary, so reading them
+never re-walks the invoice list.
+
+Boundary crossings are driven by a min-heap of the next time each invoice
+changes urgency level; entries made stale by an update are skipped lazily.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import heapq
+import threading
+
+try:
+    from .scheduler import NotificationScheduler, LEVEL_FLOORS, invoice_deadline
+except ImportError:
+    from scheduler import NotificationScheduler, LEVEL_FLOORS, invoice_deadline
+
+TAX_RATE = 0.35  # Corporate tax lost on disallowed (unpaid) amounts
+URGENCY_LEVELS = list(LEVEL_FLOORS) + ["explosive"]
+_TICK = timedelta(microseconds=1)
+
+
+def _days_left(deadline: datetime, now: datetime) -> int:
+    return int((deadline - now).total_seconds() // 86400)
+
+
+def _to_paise(amount) -> int:
+    # Integer paise so repeated add/remove never drifts
+    return int(round(float(amount or 0) * 100))
+
+
+class _Bucket:
+    """Running totals for one group of invoices"""
+
+    __slots__ = ("invoice_count", "amount_paise", "overdue_count", "overdue_paise", "by_level")
+
+    def __init__(self):
+        self.invoice_count = 0
+        self.amount_paise = 0
+        self.overdue_count = 0
+        self.overdue_paise = 0
+        self.by_level = dict.fromkeys(URGENCY_LEVELS, 0)
+
+    def apply(self, amount_paise: int, level: str, overdue: bool, sign: int):
+        self.invoice_count += sign
+        self.amount_paise += sign * amount_paise
+        self.by_level[level] += sign
+        if overdue:
+            self.overdue_count += sign
+            self.overdue_paise += sign * amount_paise
+
+    def to_dict(self) -> Dict:
+        amount = self.amount_paise / 100
+        overdue_amount = self.overdue_paise / 100
+        return {
+            "invoice_count": self.invoice_count,
+            "amount_at_risk": round(amount, 2),
+            "tax_at_stake": round(amount * TAX_RATE, 2),
+            "overdue_count": self.overdue_count,
+            "overdue_amount": round(overdue_amount, 2),
+            "tax_lost": round(overdue_amount * TAX_RATE, 2),
+            "by_urgency": dict(self.by_level)
+        }
+
+
+class ExposureAggregates:
+    """Materialized exposure totals over all unpaid invoices"""
+
+    def __init__(self, scheduler: Optional[NotificationScheduler] = None):
+        self.scheduler = scheduler or NotificationScheduler()
+        self._lock = threading.RLock()
+        self._entries = {}  # invoice_id -> (vendor, day, deadline, amount_paise, level, overdue, version)
+        self._totals = _Bucket()
+        self._vendors = {}
+        self._days = {}
+        self._transitions = []  # heap of (when, version, invoice_id)
+        self._version = 0
+
+    # ---- updates ----
+
+    def load(self, invoices: Iterable[Dict], now: Optional[datetime] = None):
+        """Rebuild from a full invoice list"""
+        with self._lock:
+            self._entries.clear()
+            self._totals = _Bucket()
+            self._vendors.clear()
+            self._days.clear()
+            self._transitions = []
+            self.upsert(invoices, now)
+
+    def upsert(self, invoices: Iterable[Dict], now: Optional[datetime] = None):
+        """Add or replace invoices; paid ones are removed from the totals"""
+        now = now or datetime.now()
+        with self._lock:
+            for inv in invoices:
+                invoice_id = inv.get("invoice_id")
+                self._remove(invoice_id)
+                if inv.get("paid", False):
+                    continue
+                try:
+                    deadline = invoice_deadline(inv)
+                except (TypeError, ValueError):
+                    continue
+                vendor = inv.get("client_name") or inv.get("vendor_name") or "unknown"
+                self._add(invoice_id, vendor, deadline, _to_paise(inv.get("amount")), now)
+
+    def mark_paid(self, invoice_id: str):
+        """Drop a paid invoice from the totals"""
+        with self._lock:
+            self._remove(invoice_id)
+
+    def advance(self, now: Optional[datetime] = None) -> int:
+        """
+        Move invoices whose urgency level changed by `now` into their new level
+
+        Returns:
+            Number of invoices that changed level or became overdue
+        """
+        now = now or datetime.now()
+        moved = 0
+        with self._lock:
+            while self._transitions and self._transitions[0][0] <= now:
+                _, version, invoice_id = heapq.heappop(self._transitions)
+                entry = self._entries.get(invoice_id)
+                if entry is None or entry[6] != version:
+                    continue  # stale: invoice was paid or replaced since
+                vendor, _, deadline, amount_paise, _, _, _ = entry
+                self._remove(invoice_id)
+                self._add(invoice_id, vendor, deadline, amount_paise, now)
+                moved += 1
+        return moved
+
+    def _add(self, invoice_id: str, vendor: str, deadline: datetime, amount_paise: int, now: datetime):
+        days_left = _days_left(deadline, now)
+        level = self.scheduler.get_urgency_level(days_left)
+        overdue = days_left < 0
+        day = deadline.date().isoformat()
+
+        self._version += 1
+        self._entries[invoice_id] = (vendor, day, deadline, amount_paise, level, overdue, self._version)
+        for bucket in self._buckets(vendor, day, create=True):
+            bucket.apply(amount_paise, level, overdue, +1)
+
+        # days_left drops below `floor` just after exactly floor days remain, and the
+        # invoice turns overdue just after the deadline; scheduling strictly after
+        # the boundary keeps advance() from re-queuing the same instant forever
+        if level in LEVEL_FLOORS:
+            next_change = deadline - timedelta(days=LEVEL_FLOORS[level]) + _TICK
+        elif not overdue:
+            next_change = deadline + _TICK
+        else:
+            return
+        heapq.heappush(self._transitions, (next_change, self._version, invoice_id))
+
+    def _remove(self, invoice_id: str):
+        entry = self._entries.pop(invoice_id, None)
+        if entry is None:
+            return
+        vendor, day, _, amount_paise, level, overdue, _ = entry
+        for bucket in self._buckets(vendor, day):
+            bucket.apply(amount_paise, level, overdue, -1)
+        if not self._vendors[vendor].invoice_count:
+            del self._vendors[vendor]
+        if not self._days[day].invoice_count:
+            del self._days[day]
+
+    def _buckets(self, vendor: str, day: str, create: bool = False) -> List[_Bucket]:
+        if create:
+            self._vendors.setdefault(vendor, _Bucket())
+            self._days.setdefault(day, _Bucket())
+        return [self._totals, self._vendors[vendor], self._days[day]]
+
+    # ---- queries ----
+
+    def totals(self, now: Optional[datetime] = None) -> Dict:
+        """Portfolio-wide exposure"""
+        with self._lock:
+            self.advance(now)
+            return dict(self._totals.to_dict(), vendor_count=len(self._vendors))
+
+    def vendor(self, vendor: str, now: Optional[datetime] = None) -> Optional[Dict]:
+        """Exposure for one vendor (None if nothing unpaid)"""
+        with self._lock:
+            self.advance(now)
+            bucket = self._vendors.get(vendor)
+            return dict(bucket.to_dict(), vendor=vendor) if bucket else None
+
+    def day(self, day: str, now: Optional[datetime] = None) -> Optional[Dict]:
+        """Exposure for invoices whose deadline falls on `day` (YYYY-MM-DD)"""
+        with self._lock:
+            self.advance(now)
+            bucket = self._days.get(day)
+            return dict(bucket.to_dict(), date=day) if bucket else None
+
+    def top_vendors(self, n: int = 10, now: Optional[datetime] = None) -> List[Dict]:
+        """Vendors with the most money at risk"""
+        with self._lock:
+            self.advance(now)
+            top = heapq.nlargest(n, self._vendors.items(), key=lambda item: item[1].amount_paise)
+            return [dict(bucket.to_dict(), vendor=vendor) for vendor, bucket in top]
+
+    # ---- wiring ----
+
+    def attach(self, invoice_monitor, state_manager=None):
+        """
+        Seed from the monitor's invoices and follow its writes (and paid marks)
+
+        Paid marks made through the state manager live only in its store, and
+        its listeners fire only in the process that made them, so the seed and
+        every write are also checked against state_manager.is_paid.
+        """
+        def with_paid_marks(invoices):
+            if state_manager is None:
+                return invoices
+            return [dict(inv, paid=True) if state_manager.is_paid(inv.get("invoice_id")) else inv
+                    for inv in invoices]
+
+        self.load(with_paid_marks(invoice_monitor.load_invoices()))
+        invoice_monitor.add_listener(lambda invoices: self.upsert(with_paid_marks(invoices)))
+        if state_manager is not None:
+            state_manager.add_paid_listener(self.mark_paid)
+        return self
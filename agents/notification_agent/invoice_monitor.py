@@ -2,36 +2,98 @@
 Enhanced Invoice Monitor - With datetime support
 """
 from datetime import datetime, timedelta
-from typing import List, Dict
-import json
+from typing import Dict, Iterator, List, Optional
+
+try:
+    from .invoice_store import open_invoice_store
+except ImportError:
+    from invoice_store import open_invoice_store
 
 class InvoiceMonitor:
     """Monitors invoices with full datetime support"""
 
     def __init__(self, invoices_file: str = "invoices.json"):
         self.invoices_file = invoices_file
+        # .json -> cached JSON array, .jsonl -> streamed JSON Lines, .db -> SQLite
+        self.store = open_invoice_store(invoices_file)
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Register callback(invoices) to run after every upsert_invoices write"""
+        self._listeners.append(callback)
+
+    def iter_invoices(self) -> Iterator[Dict]:
+        """
+        Stream all invoices from the data source
+
+        Invoice dicts may be shared with the store's cache - copy one before
+        modifying it.
+        """
+        return self.store.iter_invoices()
 
     def load_invoices(self) -> List[Dict]:
         """Load all invoices from data source"""
-        try:
-            with open(self.invoices_file, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print(f"⚠️  Invoice file not found: {self.invoices_file}")
-            return []
+        return list(self.iter_invoices())
+
+    def upsert_invoices(self, invoices: List[Dict]) -> int:
+        """
+        Add or replace invoices (matched by invoice_id) in one write
+
+        Returns:
+            Number of invoices written
+        """
+        self.store.upsert(invoices)
+
+        for callback in self._listeners:
+            callback(invoices)
+        return len(invoices)
+
+    def merge_invoices(self, invoices: List[Dict]) -> int:
+        """
+        Like upsert_invoices, but fields an incoming invoice doesn't have keep
+        their stored values, so re-importing a ledger doesn't unmark paid
+        invoices or drop contact details added since
+
+        Returns:
+            Number of invoices written
+        """
+        incoming = {inv["invoice_id"]: inv for inv in invoices}
+        # One scan per call rather than one lookup per invoice (a JSONL get scans too)
+        stored = {inv["invoice_id"]: inv for inv in self.iter_invoices() if inv.get("invoice_id") in incoming}
+
+        merged = []
+        for inv in invoices:
+            current = stored.get(inv["invoice_id"])
+            if current is None:
+                merged.append(inv)
+                continue
+            record = dict(current, **inv)
+            if "invoice_datetime" not in inv and current.get("invoice_date") != inv.get("invoice_date"):
+                record.pop("invoice_datetime", None)  # the old time belongs to the old date
+            merged.append(record)
+        return self.upsert_invoices(merged)
+
+    def batch(self):
+        """Context manager grouping upsert_invoices calls into one store write (bulk imports)"""
+        return self.store.batch()
+
+    def iter_active_invoices(self) -> Iterator[Dict]:
+        """Stream unpaid, active invoices"""
+        return self.store.iter_active()
+
+    def iter_invoices_due_between(self, start: Optional[datetime] = None,
+                                  end: Optional[datetime] = None) -> Iterator[Dict]:
+        """Stream unpaid invoices whose deadline falls in [start, end]"""
+        return self.store.iter_due_between(start, end)
 
     def get_active_invoices(self) -> List[Dict]:
         """Get all unpaid, active invoices"""
-        invoices = self.load_invoices()
-        return [inv for inv in invoices if not inv.get("paid", False)]
+        return list(self.iter_active_invoices())
 
     def get_invoice_by_id(self, invoice_id: str) -> Dict:
         """Get specific invoice by ID"""
-        invoices = self.load_invoices()
-        for inv in invoices:
-            if inv.get("invoice_id") == invoice_id:
-                return inv
-        return None
+        inv = self.store.get(invoice_id)
+        return dict(inv) if inv is not None else None
 
     def calculate_time_info(self, invoice: Dict) -> tuple:
         """
@@ -99,15 +161,22 @@ class InvoiceMonitor:
             time_str = deadline.strftime("%I:%M %p")
             return f"Due on {date_str} at {time_str}"
 
+    def with_time_info(self, invoice: Dict) -> Dict:
+        """Copy of an invoice with days_left, hours_left, deadline and description added"""
+        # Copy, so the time fields never leak into a cached snapshot
+        inv = dict(invoice)
+        days, hours, deadline, human = self.calculate_time_info(inv)
+        inv["days_left"] = days
+        inv["hours_left"] = hours
+        inv["deadline_datetime"] = deadline.isoformat()
+        inv["human_description"] = human
+        return inv
+
+    def iter_invoices_needing_notification(self) -> Iterator[Dict]:
+        """Stream active invoices with complete time information"""
+        for inv in self.iter_active_invoices():
+            yield self.with_time_info(inv)
+
     def get_invoices_needing_notification(self) -> List[Dict]:
         """Get all invoices with complete time information"""
-        active = self.get_active_invoices()
-
-        for inv in active:
-            days, hours, deadline, human = self.calculate_time_info(inv)
-            inv["days_left"] = days
-            inv["hours_left"] = hours
-            inv["deadline_datetime"] = deadline.isoformat()
-            inv["human_description"] = human
-
-        return active
+        return list(self.iter_invoices_needing_notification())
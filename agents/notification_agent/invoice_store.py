@@ -0,0 +1,394 @@
+"""
+Invoice Store Module - Storage backends behind InvoiceMonitor
+
+    .json    JsonInvoiceStore   one JSON array, parsed snapshot cached until
+                                the file changes
+    .jsonl   JsonlInvoiceStore  one invoice per line, streamed; updates are
+                                appended to a side log and compacted later
+    .db      SqliteInvoiceStore indexed on (paid, deadline); filtering and
+                                deadline windows run in SQL
+
+Every store offers iter_invoices() / iter_active() / iter_due_between()
+generators, get(id) and upsert(invoices). Wrap a bulk import's upserts in
+`with store.batch():` so the file is rewritten once, not once per chunk.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from pathlib import Path
+import json
+import os
+import sqlite3
+import threading
+
+try:
+    from .scheduler import invoice_deadline
+except ImportError:
+    from scheduler import invoice_deadline
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# One shared encoder: json.dumps(default=...) builds a new one per call
+_encode = json.JSONEncoder(default=str).encode
+
+
+def _deadline_key(invoice: Dict) -> str:
+    """Sortable deadline (ISO datetime); '' when the invoice date is unusable"""
+    try:
+        return invoice_deadline(invoice).isoformat()
+    except (TypeError, ValueError):
+        return ""
+
+
+def _filter_due(invoices: Iterator[Dict], start: Optional[datetime],
+                end: Optional[datetime]) -> Iterator[Dict]:
+    lo = start.isoformat() if start else None
+    hi = end.isoformat() if end else None
+    for inv in invoices:
+        key = _deadline_key(inv)
+        if key and (lo is None or key >= lo) and (hi is None or key <= hi):
+            yield inv
+
+
+def _ends_with_newline(path: str) -> bool:
+    """False when a file's last line is unterminated (e.g. a torn append); missing/empty counts as True"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+    except OSError:
+        return True
+
+
+def _file_signature(path: str) -> Optional[tuple]:
+    """(inode, mtime_ns, size) of a file, or None if it is missing"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class JsonInvoiceStore:
+    """Invoices as one JSON array, re-parsed only when the file changes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._snapshot = []
+        self._by_id = {}
+        self._positions = {}
+        self._signature = False  # never loaded
+        self._batch_depth = 0
+        self._dirty = False
+
+    def _set_snapshot(self, invoices: List[Dict], signature):
+        self._snapshot = invoices
+        self._by_id = {inv.get("invoice_id"): inv for inv in invoices}
+        self._positions = {inv.get("invoice_id"): i for i, inv in enumerate(invoices)}
+        self._signature = signature
+
+    def _refresh(self):
+        if self._batch_depth:
+            return  # the in-memory snapshot is ahead of the file until the batch ends
+        signature = _file_signature(self.path)
+        if signature == self._signature:
+            return
+        if signature is None:
+            print(f"⚠️  Invoice file not found: {self.path}")
+            self._set_snapshot([], None)
+            return
+        with open(self.path, 'r') as f:
+            invoices = json.load(f)
+        self._set_snapshot(invoices, signature)
+
+    def iter_invoices(self) -> Iterator[Dict]:
+        self._refresh()
+        return iter(list(self._snapshot))
+
+    def iter_active(self) -> Iterator[Dict]:
+        return (inv for inv in self.iter_invoices() if not inv.get("paid", False))
+
+    def iter_due_between(self, start: Optional[datetime] = None,
+                         end: Optional[datetime] = None) -> Iterator[Dict]:
+        return _filter_due(self.iter_active(), start, end)
+
+    def get(self, invoice_id: str) -> Optional[Dict]:
+        self._refresh()
+        return self._by_id.get(invoice_id)
+
+    def upsert(self, invoices: List[Dict]):
+        self._refresh()
+        # Readers iterate over copies of the snapshot, so it is updated in place
+        for inv in invoices:
+            invoice_id = inv["invoice_id"]
+            pos = self._positions.get(invoice_id)
+            if pos is None:
+                self._positions[invoice_id] = len(self._snapshot)
+                self._snapshot.append(inv)
+            else:
+                self._snapshot[pos] = inv
+            self._by_id[invoice_id] = inv
+
+        self._dirty = True
+        if not self._batch_depth:
+            self._write()
+
+    def _write(self):
+        # Write to a temp file and swap, so readers never see a half-written file
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self._snapshot, f, indent=2, default=str)
+        os.replace(tmp_file, self.path)
+        # Our own write is already parsed: adopt it instead of re-reading
+        self._signature = _file_signature(self.path)
+        self._dirty = False
+
+    @contextmanager
+    def batch(self):
+        """Apply upserts in memory and write the file once, when the outermost batch ends"""
+        self._refresh()
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._dirty:
+                self._write()
+
+
+class JsonlInvoiceStore:
+    """
+    Invoices as JSON Lines, streamed so memory stays flat with ledger size
+
+    Upserts are appended to `<path>.updates`; that log (bounded by
+    compact_threshold) is the only thing held in memory. Reads stream the base
+    file, substituting updated records, then yield invoices that exist only in
+    the log. Once the log passes the threshold it is merged into a new base
+    file (temp file + os.replace) and removed; replaying a log over an already
+    merged base is harmless, so a crash between the two steps loses nothing.
+    """
+
+    def __init__(self, path: str, compact_threshold: int = 10000):
+        self.path = path
+        self.log_path = f"{path}.updates"
+        self.compact_threshold = compact_threshold
+        self._updates = {}
+        self._log_signature = False  # never loaded
+        self._batch_depth = 0
+
+    def _read_lines(self, path: str) -> Iterator[Dict]:
+        try:
+            f = open(path, 'r')
+        except FileNotFoundError:
+            return
+        with f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Typically a torn final line from an interrupted append
+                    print(f"⚠️  Skipping unreadable line {line_no} in {path}")
+
+    def _refresh_updates(self):
+        signature = _file_signature(self.log_path)
+        if signature == self._log_signature:
+            return
+        self._updates = {}
+        for inv in self._read_lines(self.log_path):
+            self._updates[inv.get("invoice_id")] = inv
+        self._log_signature = signature
+
+    def iter_invoices(self) -> Iterator[Dict]:
+        self._refresh_updates()
+        updates = dict(self._updates)  # upserts during iteration don't disturb this pass
+        if not os.path.exists(self.path) and not updates:
+            print(f"⚠️  Invoice file not found: {self.path}")
+            return
+
+        replaced = set()
+        for inv in self._read_lines(self.path):
+            invoice_id = inv.get("invoice_id")
+            if invoice_id in updates:
+                if invoice_id in replaced:
+                    continue
+                replaced.add(invoice_id)
+                inv = updates[invoice_id]
+            yield inv
+
+        for invoice_id, inv in updates.items():
+            if invoice_id not in replaced:
+                yield inv
+
+    def iter_active(self) -> Iterator[Dict]:
+        return (inv for inv in self.iter_invoices() if not inv.get("paid", False))
+
+    def iter_due_between(self, start: Optional[datetime] = None,
+                         end: Optional[datetime] = None) -> Iterator[Dict]:
+        return _filter_due(self.iter_active(), start, end)
+
+    def get(self, invoice_id: str) -> Optional[Dict]:
+        """Updated records are found in memory; others take one streamed scan"""
+        self._refresh_updates()
+        if invoice_id in self._updates:
+            return self._updates[invoice_id]
+        for inv in self._read_lines(self.path):
+            if inv.get("invoice_id") == invoice_id:
+                return inv
+        return None
+
+    def upsert(self, invoices: List[Dict]):
+        self._refresh_updates()
+        torn = not _ends_with_newline(self.log_path)
+        with open(self.log_path, 'a') as f:
+            if torn:
+                f.write("\n")  # end the torn line so it doesn't swallow our first record
+            for inv in invoices:
+                f.write(_encode(inv) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for inv in invoices:
+            self._updates[inv["invoice_id"]] = inv
+        self._log_signature = _file_signature(self.log_path)
+
+        if len(self._updates) >= self.compact_threshold and not self._batch_depth:
+            self.compact()
+
+    @contextmanager
+    def batch(self):
+        """
+        Defer compaction until the outermost batch ends
+
+        Compacting rewrites the whole base file; during a bulk import that
+        would happen every compact_threshold invoices.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and len(self._updates) >= self.compact_threshold:
+                self.compact()
+
+    def compact(self):
+        """Merge the update log into the base file"""
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'w') as f:
+            for inv in self.iter_invoices():
+                f.write(_encode(inv) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        self._updates = {}
+        self._log_signature = None
+
+
+class SqliteInvoiceStore:
+    """
+    Invoices in SQLite, one JSON row each, with paid and deadline columns
+    indexed together so unpaid / deadline-window reads never scan paid rows
+
+    Reads stream in keyset-paged batches, so no lock or cursor is held while
+    the caller works through the results.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS invoices (
+        invoice_id TEXT PRIMARY KEY,
+        paid INTEGER NOT NULL DEFAULT 0,
+        deadline TEXT NOT NULL DEFAULT '',
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_invoices_paid_deadline ON invoices (paid, deadline, invoice_id);
+    """
+
+    def __init__(self, path: str, page_size: int = 1000):
+        self.path = path
+        self.page_size = page_size
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+
+    def _pages(self, where: str, params: tuple) -> Iterator[Dict]:
+        """Stream rows matching `where` ordered by (paid, deadline, invoice_id)"""
+        last = None
+        while True:
+            clause, args = where, params
+            if last is not None:
+                clause += " AND (paid, deadline, invoice_id) > (?, ?, ?)"
+                args = params + last
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT paid, deadline, invoice_id, data FROM invoices WHERE {clause} "
+                    f"ORDER BY paid, deadline, invoice_id LIMIT ?",
+                    args + (self.page_size,)
+                ).fetchall()
+            for row in rows:
+                yield json.loads(row[3])
+            if len(rows) < self.page_size:
+                return
+            last = rows[-1][:3]
+
+    def iter_invoices(self) -> Iterator[Dict]:
+        return self._pages("1", ())
+
+    def iter_active(self) -> Iterator[Dict]:
+        return self._pages("paid = 0", ())
+
+    def iter_due_between(self, start: Optional[datetime] = None,
+                         end: Optional[datetime] = None) -> Iterator[Dict]:
+        """Unpaid invoices with a deadline in [start, end], earliest first"""
+        where = "paid = 0 AND deadline >= ? AND deadline <= ?"
+        # '' marks an unusable date; chr(0x10FFFF) sorts after any ISO datetime
+        params = (start.isoformat() if start else "0", end.isoformat() if end else chr(0x10FFFF))
+        return self._pages(where, params)
+
+    def count_active(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM invoices WHERE paid = 0").fetchone()[0]
+
+    def get(self, invoice_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM invoices WHERE invoice_id = ?", (invoice_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def upsert(self, invoices: List[Dict]):
+        """Bulk insert-or-replace in one transaction"""
+        rows = [
+            (inv["invoice_id"], 1 if inv.get("paid", False) else 0, _deadline_key(inv),
+             _encode(inv))
+            for inv in invoices
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO invoices (invoice_id, paid, deadline, data) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    @contextmanager
+    def batch(self):
+        """Same interface as the file stores; each upsert is already one transaction"""
+        yield self
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_invoice_store(path: str):
+    """
+    Pick the store for a file by its extension:
+    .jsonl -> JSON Lines, .db/.sqlite -> SQLite, anything else -> JSON array
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return JsonlInvoiceStore(path)
+    if suffix in SQLITE_SUFFIXES:
+        return SqliteInvoiceStore(path)
+    return JsonInvoiceStore(path)
@@ -4,11 +4,15 @@ Imports and coordinates all modules
 """
 import time
 from datetime import datetime, timedelta
-from scheduler import NotificationScheduler
+from scheduler import (NotificationScheduler, NotificationQueue, EXPLOSIVE_REPEAT,
+                       invoice_datetime, invoice_deadline)
 from message_generator import MessageGenerator
-from state_manager import StateManager
+from state_manager import SqliteStateManager
 from invoice_monitor import InvoiceMonitor
 from notification_dispatcher import NotificationDispatcher
+from async_dispatch import AsyncDispatcher
+
+DISPATCH_BATCH = 200  # Invoices sent concurrently per dispatch round
 
 class NotificationAgent:
     """Main agent that orchestrates invoice notification system"""
@@ -23,13 +27,14 @@ class NotificationAgent:
         # Initialize all modules
         self.scheduler = NotificationScheduler()
         self.message_gen = MessageGenerator()
-        self.state_manager = StateManager()
+        self.state_manager = SqliteStateManager()
         self.invoice_monitor = InvoiceMonitor(invoices_file)
         self.dispatcher = NotificationDispatcher(
             enable_desktop=enable_desktop,
             enable_whatsapp=enable_whatsapp,
             enable_email=enable_email
         )
+        self.async_dispatcher = AsyncDispatcher(self.dispatcher)
 
         print("🤖 Notification Agent initialized!")
         print(f"   📊 Scheduler: Ready")
@@ -40,22 +45,22 @@ class NotificationAgent:
               f"WhatsApp={'✓' if enable_whatsapp else '✗'}, "
               f"Email={'✓' if enable_email else '✗'}")
 
-    def process_invoice(self, invoice: dict, user_preferences: dict = None) -> bool:
+    def prepare_notification(self, invoice: dict):
         """
-        Process single invoice and send notification if needed
+        Decide whether an invoice (with time info) needs a notification now
 
         Returns:
-            True if notification was sent
+            (urgency_level, message), or None if nothing should be sent
         """
         invoice_id = invoice["invoice_id"]
 
         # Check if already paid
         if self.state_manager.is_paid(invoice_id):
-            return False
+            return None
 
         # Check if notifications are disabled
         if not self.state_manager.is_notification_enabled(invoice_id):
-            return False
+            return None
 
         # Calculate days left and urgency
         days_left = invoice["days_left"]
@@ -66,15 +71,48 @@ class NotificationAgent:
         last_notification = self.state_manager.get_last_notification_time(invoice_id)
 
         if last_notification:
-            should_notify = self.scheduler.should_notify_now(last_notification, urgency_level)
+            should_notify = self.scheduler.should_notify_now(
+                last_notification, urgency_level, invoice_datetime(invoice)
+            )
         else:
             should_notify = True  # First notification
 
         if not should_notify:
-            return False
+            return None
 
         # Generate message
-        message = self.message_gen.generate_message(urgency_level, invoice)
+        return urgency_level, self.message_gen.generate_message(urgency_level, invoice)
+
+    def record_notification(self, invoice: dict, urgency_level: str, message: str, channels: list) -> bool:
+        """Update state after a send; True if any channel succeeded"""
+        if not channels:
+            return False
+
+        invoice_id = invoice["invoice_id"]
+        self.state_manager.update_notification_sent(
+            invoice_id=invoice_id,
+            channels=channels,
+            urgency_level=urgency_level
+        )
+
+        print(f"✅ Notification sent for {invoice_id}")
+        print(f"   📍 Urgency: {urgency_level}")
+        print(f"   📊 Days left: {invoice['days_left']}")
+        print(f"   📤 Channels: {', '.join(channels)}")
+        print(f"   💬 Message: {message[:60]}...")
+        return True
+
+    def process_invoice(self, invoice: dict, user_preferences: dict = None) -> bool:
+        """
+        Process single invoice and send notification if needed
+
+        Returns:
+            True if notification was sent
+        """
+        prepared = self.prepare_notification(invoice)
+        if prepared is None:
+            return False
+        urgency_level, message = prepared
 
         # Send notification
         channels = self.dispatcher.send_notification(
@@ -85,66 +123,135 @@ class NotificationAgent:
         )
 
         # Update state
-        if channels:
-            self.state_manager.update_notification_sent(
-                invoice_id=invoice_id,
-                channels=channels,
-                urgency_level=urgency_level
-            )
+        return self.record_notification(invoice, urgency_level, message, channels)
 
-            print(f"✅ Notification sent for {invoice_id}")
-            print(f"   📍 Urgency: {urgency_level}")
-            print(f"   📊 Days left: {days_left}")
-            print(f"   📤 Channels: {', '.join(channels)}")
-            print(f"   💬 Message: {message[:60]}...")
+    def process_invoices(self, invoices, user_preferences: dict = None) -> dict:
+        """
+        Process many invoices, sending their notifications concurrently
 
-            return True
+        Returns:
+            {invoice_id: True if a notification was sent} for every invoice
+        """
+        sent = {}
+        pending = []
 
-        return False
+        def flush():
+            jobs = [(message, urgency, inv, user_preferences) for inv, urgency, message in pending]
+            for (inv, urgency, message), channels in zip(pending, self.async_dispatcher.dispatch_many(jobs)):
+                sent[inv["invoice_id"]] = self.record_notification(inv, urgency, message, channels)
+            pending.clear()
+
+        for invoice in invoices:
+            prepared = self.prepare_notification(invoice)
+            if prepared is None:
+                sent[invoice["invoice_id"]] = False
+                continue
+            pending.append((invoice,) + prepared)
+            if len(pending) >= DISPATCH_BATCH:
+                flush()
+        flush()
+        return sent
 
     def run_cycle(self, user_preferences: dict = None):
         """Run one notification check cycle"""
         print(f"\n🔄 Running notification cycle at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-        # Get all active invoices
-        invoices = self.invoice_monitor.get_invoices_needing_notification()
+        # Stream active invoices; due ones are sent concurrently, DISPATCH_BATCH at a time.
+        # State changes of the whole cycle share one commit
+        with self.state_manager.batch():
+            sent = self.process_invoices(
+                self.invoice_monitor.iter_invoices_needing_notification(), user_preferences
+            )
 
-        if not invoices:
+        if not sent:
             print("   ℹ️  No active invoices to monitor")
             return
 
-        print(f"   📋 Found {len(invoices)} active invoice(s)")
+        print(f"   📋 Checked {len(sent)} active invoice(s)")
+        print(f"   ✉️  Sent {sum(sent.values())} notification(s)")
 
-        # Process each invoice
-        notifications_sent = 0
-        for invoice in invoices:
-            if self.process_invoice(invoice, user_preferences):
-                notifications_sent += 1
+    def next_notification_time(self, invoice: dict):
+        """When this invoice is next due a notification (None if it never is)"""
+        invoice_id = invoice["invoice_id"]
+        if self.state_manager.is_paid(invoice_id) or not self.state_manager.is_notification_enabled(invoice_id):
+            return None
+        try:
+            invoice_dt = invoice_datetime(invoice)
+            deadline = invoice_deadline(invoice)
+        except (TypeError, ValueError):
+            return None
+        return self.scheduler.next_notification_time(
+            self.state_manager.get_last_notification_time(invoice_id), invoice_dt, deadline
+        )
 
-        print(f"   ✉️  Sent {notifications_sent} notification(s)")
+    def schedule_invoices(self, queue: NotificationQueue, invoices, not_before: datetime = None):
+        """(Re)compute queue entries for invoices; paid / muted ones are dropped"""
+        for invoice in invoices:
+            when = None if invoice.get("paid", False) else self.next_notification_time(invoice)
+            if when is None:
+                queue.remove(invoice["invoice_id"])
+            else:
+                queue.schedule(invoice["invoice_id"], max(when, not_before or when))
 
     def run_daemon(self, check_interval_minutes: int = 30, user_preferences: dict = None):
         """
         Run agent as background daemon
 
+        Each invoice's next notification time is kept in a queue; the daemon
+        sleeps until the earliest one and only processes invoices that are due.
+        Invoices written through the monitor and paid marks update the queue
+        immediately; a full resync picks up outside edits to the invoice file.
+
         Args:
-            check_interval_minutes: How often to check (default 30 min)
+            check_interval_minutes: Longest sleep / full resync interval (default 30 min)
             user_preferences: User contact info and preferences
         """
         print(f"\n🚀 Starting Notification Agent Daemon")
-        print(f"   ⏰ Check interval: {check_interval_minutes} minutes")
+        print(f"   ⏰ Full resync every {check_interval_minutes} minutes")
         print(f"   🔁 Press Ctrl+C to stop\n")
 
+        queue = NotificationQueue()
+        self.invoice_monitor.add_listener(lambda invoices: self.schedule_invoices(queue, invoices))
+        self.state_manager.add_paid_listener(queue.remove)
+        resync_seconds = check_interval_minutes * 60
+        next_resync = datetime.now()
+
         try:
             while True:
-                self.run_cycle(user_preferences)
-
-                # Sleep until next check
-                sleep_seconds = check_interval_minutes * 60
-                print(f"   😴 Sleeping for {check_interval_minutes} minutes...\n")
-                time.sleep(sleep_seconds)
+                now = datetime.now()
+                if now >= next_resync:
+                    self.schedule_invoices(queue, self.invoice_monitor.iter_active_invoices())
+                    next_resync = now + timedelta(seconds=resync_seconds)
+                    print(f"   📋 {len(queue)} invoice(s) scheduled")
+
+                due = queue.pop_due(now)
+                if due:
+                    print(f"\n🔄 {len(due)} invoice(s) due at {now.strftime('%Y-%m-%d %H:%M:%S')}")
+                invoices = []
+                for invoice_id in due:
+                    invoice = self.invoice_monitor.get_invoice_by_id(invoice_id)
+                    if invoice is not None and not invoice.get("paid", False):
+                        invoices.append(self.invoice_monitor.with_time_info(invoice))
+
+                with self.state_manager.batch():
+                    sent = self.process_invoices(invoices, user_preferences)
+                    for invoice in invoices:
+                        # A failed send is retried after a pause rather than immediately
+                        retry_at = None if sent[invoice["invoice_id"]] else now + EXPLOSIVE_REPEAT
+                        self.schedule_invoices(queue, [invoice], retry_at)
+
+                sleep_seconds = queue.seconds_until_next(
+                    (next_resync - datetime.now()).total_seconds()
+                )
+                next_due = queue.next_due()
+                if next_due:
+                    print(f"   😴 Next notification due {next_due.strftime('%Y-%m-%d %H:%M')}, "
+                          f"sleeping {sleep_seconds / 60:.1f} minutes...")
+                time.sleep(max(sleep_seconds, 1))
 
         except KeyboardInterrupt:
+            self.async_dispatcher.close()
+            self.state_manager.close()
             print("\n\n🛑 Notification Agent stopped by user")
 
 
@@ -2,7 +2,19 @@
 Notification Dispatcher Module - Sends notifications via multiple channels
 """
 import platform
-from typing import List, Dict
+import threading
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from typing import List, Dict, Optional, Tuple
+
+try:
+    from .smtp_pool import SmtpConnectionPool
+    from .whatsapp_sender import WhatsAppSender
+except ImportError:
+    from smtp_pool import SmtpConnectionPool
+    from whatsapp_sender import WhatsAppSender
+
+DESKTOP_COMMAND_TIMEOUT = 10  # seconds for notify-send / osascript to return
 
 class NotificationDispatcher:
     """Handles multi-channel notification delivery"""
@@ -12,6 +24,30 @@ class NotificationDispatcher:
         self.enable_whatsapp = enable_whatsapp
         self.enable_email = enable_email
         self.platform = platform.system()
+        self._smtp_pool = None  # created from the environment on first email
+        self._whatsapp = None   # likewise, on first WhatsApp message
+        self._senders_lock = threading.Lock()  # AsyncDispatcher sends from several threads
+
+    def _get_smtp_pool(self) -> Optional[SmtpConnectionPool]:
+        with self._senders_lock:
+            if self._smtp_pool is None:
+                self._smtp_pool = SmtpConnectionPool.from_env()
+            return self._smtp_pool
+
+    def _get_whatsapp_sender(self) -> Optional[WhatsAppSender]:
+        with self._senders_lock:
+            if self._whatsapp is None:
+                self._whatsapp = WhatsAppSender.from_env()
+            return self._whatsapp
+
+    @staticmethod
+    def _build_email(sender: str, recipient_email: str, subject: str, body: str) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg['From'] = sender
+        msg['To'] = recipient_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
 
     def send_desktop_notification(self, title: str, message: str, is_persistent: bool = False) -> bool:
         """
@@ -49,7 +85,7 @@ class NotificationDispatcher:
                     "-t", "0" if is_persistent else "10000",
                     title,
                     message
-                ])
+                ], timeout=DESKTOP_COMMAND_TIMEOUT)
                 return True
 
             elif self.platform == "Darwin":  # macOS
@@ -58,7 +94,7 @@ class NotificationDispatcher:
                     "osascript",
                     "-e",
                     f'display notification "{message}" with title "{title}"'
-                ])
+                ], timeout=DESKTOP_COMMAND_TIMEOUT)
                 return True
 
             elif self.platform == "Windows":
@@ -100,32 +136,48 @@ class NotificationDispatcher:
             return False
 
         try:
-            from twilio.rest import Client
-            import os
-
-            account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-            auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-            whatsapp_number = os.getenv("TWILIO_WHATSAPP_NUMBER", "whatsapp:+14155238886")
-
-            if not account_sid or not auth_token:
+            sender = self._get_whatsapp_sender()
+            if sender is None:
                 print("⚠️  Twilio credentials not configured")
                 return False
 
-            client = Client(account_sid, auth_token)
-
-            message = client.messages.create(
-                from_=whatsapp_number,
-                body=message,
-                to=f"whatsapp:{phone_number}"
-            )
+            sid = sender.send(phone_number, message)
+            if sid is None:
+                return False
 
-            print(f"✅ WhatsApp sent: {message.sid}")
+            print(f"✅ WhatsApp sent: {sid}")
             return True
 
         except Exception as e:
             print(f"❌ WhatsApp notification failed: {e}")
             return False
 
+    def send_whatsapp_batch(self, messages: List[Tuple[str, str]]) -> List[bool]:
+        """
+        Send many WhatsApp messages concurrently, within Twilio's rate limit
+
+        Args:
+            messages: (phone_number, message) tuples
+
+        Returns:
+            Success flag per message, in order
+        """
+        if not self.enable_whatsapp or not messages:
+            return [False] * len(messages)
+
+        try:
+            sender = self._get_whatsapp_sender()
+            if sender is None:
+                print("⚠️  Twilio credentials not configured")
+                return [False] * len(messages)
+            results = [sid is not None for sid in sender.send_many(messages)]
+        except Exception as e:
+            print(f"❌ WhatsApp batch failed: {e}")
+            return [False] * len(messages)
+
+        print(f"✅ Sent {sum(results)}/{len(results)} WhatsApp message(s)")
+        return results
+
     def send_email_notification(self, recipient_email: str, subject: str, body: str) -> bool:
         """
         Send email notification via SMTP
@@ -141,33 +193,14 @@ class NotificationDispatcher:
         if not self.enable_email:
             return False
 
-        try:
-            import smtplib
-            from email.mime.text import MIMEText
-            from email.mime.multipart import MIMEMultipart
-            import os
-
-            smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-            smtp_port = int(os.getenv("SMTP_PORT", 587))
-            smtp_email = os.getenv("SMTP_EMAIL")
-            smtp_password = os.getenv("SMTP_PASSWORD")
-
-            if not smtp_email or not smtp_password:
-                print("⚠️  SMTP credentials not configured")
-                return False
-
-            msg = MIMEMultipart()
-            msg['From'] = smtp_email
-            msg['To'] = recipient_email
-            msg['Subject'] = subject
-
-            msg.attach(MIMEText(body, 'plain'))
-
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                server.starttls()
-                server.login(smtp_email, smtp_password)
-                server.send_message(msg)
+        pool = self._get_smtp_pool()
+        if pool is None:
+            print("⚠️  SMTP credentials not configured")
+            return False
 
+        try:
+            # Pooled session: no new connect / STARTTLS / login per email
+            pool.send_message(self._build_email(pool.username, recipient_email, subject, body))
             print(f"✅ Email sent to {recipient_email}")
             return True
 
@@ -175,6 +208,34 @@ class NotificationDispatcher:
             print(f"❌ Email notification failed: {e}")
             return False
 
+    def send_email_batch(self, emails: List[Tuple[str, str, str]]) -> List[bool]:
+        """
+        Send many emails over pooled SMTP sessions
+
+        Args:
+            emails: (recipient_email, subject, body) tuples
+
+        Returns:
+            Success flag per email, in order
+        """
+        if not self.enable_email or not emails:
+            return [False] * len(emails)
+
+        pool = self._get_smtp_pool()
+        if pool is None:
+            print("⚠️  SMTP credentials not configured")
+            return [False] * len(emails)
+
+        messages = [self._build_email(pool.username, to, subject, body) for to, subject, body in emails]
+        try:
+            results = pool.send_many(messages)
+        except Exception as e:
+            print(f"❌ Email batch failed: {e}")
+            return [False] * len(emails)
+
+        print(f"✅ Sent {sum(results)}/{len(results)} email(s)")
+        return results
+
     def send_notification(
         self,
         message: str,
@@ -1,14 +1,19 @@
 """
 Automatic Notification Service - Fully Fixed
 Runs continuously and sends notifications based on schedule
+
+A full sweep runs at start-up and every RESYNC_MINUTES; in between, the service
+sleeps until the next invoice is due (NotificationQueue) and only handles
+invoices whose notification time has arrived.
 """
 import time
-import schedule
-from datetime import datetime
-from scheduler import NotificationScheduler
+from datetime import datetime, timedelta
+from scheduler import (NotificationScheduler, NotificationQueue, EXPLOSIVE_REPEAT,
+                       invoice_datetime, invoice_deadline)
 from invoice_monitor import InvoiceMonitor
 from notification_dispatcher import NotificationDispatcher
-from state_manager import StateManager
+from async_dispatch import AsyncDispatcher
+from state_manager import SqliteStateManager
 
 print("🚀 Starting Notification Service...\n")
 
@@ -16,7 +21,13 @@ print("🚀 Starting Notification Service...\n")
 scheduler = NotificationScheduler()
 invoice_monitor = InvoiceMonitor("invoices.json")
 dispatcher = NotificationDispatcher(enable_desktop=True)
-state_manager = StateManager()
+async_dispatcher = AsyncDispatcher(dispatcher)  # sends channels and invoices concurrently
+state_manager = SqliteStateManager()
+queue = NotificationQueue()
+state_manager.add_paid_listener(queue.remove)
+
+RESYNC_MINUTES = 60  # Picks up invoices edited outside this process
+DISPATCH_BATCH = 200  # Invoices sent concurrently per dispatch round
 
 # Show status
 print("✅ Modules initialized:")
@@ -26,80 +37,120 @@ print("   📤 Dispatcher: Desktop notifications enabled")
 print("   📝 State Manager: Ready")
 print()
 
-def check_and_notify():
-    """Check invoices and send notifications if needed"""
-    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Checking invoices...")
+URGENCY_PREFIX = {
+    "explosive": "🔴🔴🔴 CRITICAL",
+    "high_critical": "🔴🔴 VERY URGENT",
+    "critical": "🔴 CRITICAL",
+    "urgent": "🚨 URGENT",
+    "moderate": "⚠️",
+    "calm": "📅",
+    "extreme_calm": "ℹ️"
+}
+
+
+def schedule_next(inv, not_before=None):
+    """Queue the invoice's next notification time (or drop it if none is due)"""
+    invoice_id = inv["invoice_id"]
+    if state_manager.is_paid(invoice_id) or not state_manager.is_notification_enabled(invoice_id):
+        queue.remove(invoice_id)
+        return
+    try:
+        invoice_dt = invoice_datetime(inv)
+        deadline = invoice_deadline(inv)
+    except (TypeError, ValueError):
+        queue.remove(invoice_id)  # unusable invoice date: never due
+        return
+    when = scheduler.next_notification_time(
+        state_manager.get_last_notification_time(invoice_id), invoice_dt, deadline
+    )
+    queue.schedule(invoice_id, max(when, not_before or when))
+
+
+def prepare_message(inv):
+    """(urgency_level, message) if the invoice (with time info) is due a notification, else None"""
+    invoice_id = inv["invoice_id"]
+    days_left = inv["days_left"]
+    hours_left = inv.get("hours_left", 0)
+    time_desc = inv.get("human_description", f"{days_left} days left")
+
+    # Get schedule info
+    schedule_info = scheduler.get_schedule_info(days_left, hours_left, time_desc)
+    urgency_level = schedule_info["urgency_level"]
+
+    # Check if we should notify now (FIXED METHOD NAME!)
+    last_notif_time = state_manager.get_last_notification_time(invoice_id)
+
+    should_notify = scheduler.should_notify_now(
+        last_notif_time,
+        urgency_level,
+        invoice_datetime(inv)
+    )
+    if not should_notify:
+        return None
+
+    # Create message
+    prefix = URGENCY_PREFIX.get(urgency_level, "")
+    return urgency_level, f"{prefix} Invoice #{invoice_id} - {inv['client_name']}: {time_desc}"
+
+
+def notify_invoices(invoices) -> dict:
+    """
+    Send notifications for the due ones among `invoices`, all concurrently
+
+    Returns:
+        {invoice_id: True if a notification was sent}
+    """
+    sent = {}
+    jobs = []
+    for inv in invoices:
+        prepared = prepare_message(inv)
+        sent[inv["invoice_id"]] = False
+        if prepared is not None:
+            urgency_level, message = prepared
+            print(f"  📤 Sending: {message[:70]}...")
+            jobs.append((message, urgency_level, inv, None))
 
-    # Get all invoices needing notification
-    invoices = invoice_monitor.get_invoices_needing_notification()
+    for (message, urgency_level, inv, _), channels in zip(jobs, async_dispatcher.dispatch_many(jobs)):
+        if channels:
+            state_manager.update_notification_sent(inv["invoice_id"], channels, urgency_level)
+            sent[inv["invoice_id"]] = True
+            print(f"  ✅ Sent #{inv['invoice_id']} via {', '.join(channels)}")
+        else:
+            print(f"  ⚠️  No channels available for #{inv['invoice_id']}")
+    return sent
 
-    if not invoices:
-        print("  ℹ️  No active invoices found\n")
-        return
 
-    print(f"  📋 Found {len(invoices)} active invoice(s):")
-    for inv in invoices:
-        print(f"     • {inv['invoice_id']}: {inv.get('human_description', 'checking...')}")
-    print()
+def check_and_notify():
+    """Full sweep: check every active invoice and rebuild the queue"""
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Checking invoices...")
 
+    # Stream invoices needing notification, dispatching DISPATCH_BATCH at a time
+    checked = 0
     notifications_sent = 0
+    chunk = []
+
+    def flush():
+        nonlocal notifications_sent
+        notifications_sent += sum(notify_invoices(chunk).values())
+        for inv in chunk:
+            schedule_next(inv)
+        chunk.clear()
+
+    # State changes of the whole sweep share one commit
+    with state_manager.batch():
+        for inv in invoice_monitor.iter_invoices_needing_notification():
+            checked += 1
+            print(f"     • {inv['invoice_id']}: {inv.get('human_description', 'checking...')}")
+            chunk.append(inv)
+            if len(chunk) >= DISPATCH_BATCH:
+                flush()
+        flush()
+
+    if not checked:
+        print("  ℹ️  No active invoices found\n")
+        return
 
-    for inv in invoices:
-        invoice_id = inv["invoice_id"]
-        days_left = inv["days_left"]
-        hours_left = inv.get("hours_left", 0)
-        time_desc = inv.get("human_description", f"{days_left} days left")
-
-        # Get schedule info
-        schedule_info = scheduler.get_schedule_info(days_left, hours_left, time_desc)
-        urgency_level = schedule_info["urgency_level"]
-
-        # Check if we should notify now (FIXED METHOD NAME!)
-        last_notif_time = state_manager.get_last_notification_time(invoice_id)
-
-        # Get invoice creation time
-        invoice_datetime_str = inv.get("invoice_datetime")
-        if not invoice_datetime_str:
-            invoice_datetime_str = datetime.now().isoformat()
-
-        invoice_dt = datetime.fromisoformat(invoice_datetime_str)
-
-        should_notify = scheduler.should_notify_now(
-            last_notif_time,
-            urgency_level,
-            invoice_dt
-        )
-
-        if should_notify:
-            # Create message
-            urgency_prefix = {
-                "explosive": "🔴🔴🔴 CRITICAL",
-                "high_critical": "🔴🔴 VERY URGENT",
-                "critical": "🔴 CRITICAL",
-                "urgent": "🚨 URGENT",
-                "moderate": "⚠️",
-                "calm": "📅",
-                "extreme_calm": "ℹ️"
-            }
-
-            prefix = urgency_prefix.get(urgency_level, "")
-            message = f"{prefix} Invoice #{invoice_id} - {inv['client_name']}: {time_desc}"
-
-            # Send notification
-            print(f"  📤 Sending: {message[:70]}...")
-            channels = dispatcher.send_notification(
-                message=message,
-                urgency_level=urgency_level,
-                invoice_data=inv
-            )
-
-            if channels:
-                state_manager.update_notification_sent(invoice_id, channels, urgency_level)
-                notifications_sent += 1
-                print(f"  ✅ Sent successfully!")
-            else:
-                print(f"  ⚠️  No channels available")
-
+    print(f"\n  📋 Checked {checked} active invoice(s)")
     if notifications_sent > 0:
         print(f"\n✅ Sent {notifications_sent} notification(s)")
     else:
@@ -107,22 +158,40 @@ def check_and_notify():
 
     print("="*70 + "\n")
 
-# Schedule checks every 15 minutes
-schedule.every(15).minutes.do(check_and_notify)
+
+def notify_due():
+    """Handle only the invoices whose notification time has arrived"""
+    now = datetime.now()
+    invoices = []
+    for invoice_id in queue.pop_due(now):
+        inv = invoice_monitor.get_invoice_by_id(invoice_id)
+        if inv is not None and not inv.get("paid", False):
+            invoices.append(invoice_monitor.with_time_info(inv))
+
+    with state_manager.batch():
+        sent = notify_invoices(invoices)
+        for inv in invoices:
+            # A failed send is retried after a pause rather than immediately
+            schedule_next(inv, None if sent[inv["invoice_id"]] else now + EXPLOSIVE_REPEAT)
+
 
 print("✅ Service started!")
-print("⏰ Checking invoices every 15 minutes")
+print(f"⏰ Sleeping until the next invoice is due (full check every {RESYNC_MINUTES} minutes)")
 print("📋 Press Ctrl+C to stop")
 print("="*70 + "\n")
 
-# Run immediately on start
-check_and_notify()
-
 # Keep running
 try:
+    next_resync = datetime.now()
     while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
+        if datetime.now() >= next_resync:
+            check_and_notify()
+            next_resync = datetime.now() + timedelta(minutes=RESYNC_MINUTES)
+        else:
+            notify_due()
+        time.sleep(max(1, queue.seconds_until_next((next_resync - datetime.now()).total_seconds())))
 except KeyboardInterrupt:
+    async_dispatcher.close()
+    state_manager.close()
     print("\n\n⚠️  Service stopped by user")
-    print("👋 Goodbye!")
\ No newline at end of file
+    print("👋 Goodbye!")
@@ -0,0 +1,251 @@
+"""
+Reconciliation Module - Matches a bank statement / payment export against
+open invoices and marks every match paid in one batch.
+
+Open invoices are indexed once (hash maps on invoice reference and on
+vendor + amount, plus per-vendor sorted amounts for tolerance matches), then
+the payment file is streamed through in a single pass. Match order per payment:
+
+    1. reference   an invoice number appears in the payment reference and the
+                   amount agrees (within tolerance)
+    2. exact       same vendor and exact amount (oldest deadline first)
+    3. tolerance   same vendor, closest amount within the tolerance
+
+A reference match with a disagreeing amount is reported for review instead of
+being marked paid.
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+import re
+
+from lib.ledger_ingest import iter_rows, parse_amount, parse_date
+
+try:
+    from .scheduler import invoice_deadline
+except ImportError:
+    from scheduler import invoice_deadline
+
+# Accepted header spellings per payment field (compared case/space-insensitively)
+PAYMENT_COLUMN_ALIASES = {
+    "vendor": ["vendor", "vendor_name", "client_name", "client", "party", "party name",
+               "beneficiary", "beneficiary name", "payee", "payee name"],
+    "amount": ["amount", "paid amount", "payment amount", "debit", "debit amount",
+               "withdrawal", "withdrawal amt.", "withdrawal amount"],
+    "reference": ["reference", "reference no", "reference no.", "ref no", "ref no.", "utr",
+                  "chq./ref.no.", "cheque no", "invoice_id", "invoice no", "invoice no.",
+                  "narration", "description", "remarks"],
+    "date": ["date", "payment date", "value date", "txn date", "transaction date"]
+}
+
+DEFAULT_TOLERANCE = 1.0  # Rupees: absorbs rounding and small bank charges
+MAX_REPORTED = 100
+
+_COMPANY_SUFFIXES = re.compile(
+    r"\b(private|pvt|limited|ltd|llp|inc|co|company|enterprises?|and|the)\b"
+)
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_REF_SPLIT = re.compile(r"[\s/,;:|()]+")
+
+
+def normalize_vendor(name) -> str:
+    """'ABC Pvt. Ltd.' and 'abc private limited' both become 'abc'"""
+    text = _NON_ALNUM.sub(" ", str(name or "").lower())
+    return " ".join(_COMPANY_SUFFIXES.sub(" ", text).split())
+
+
+def normalize_reference(token) -> str:
+    return re.sub(r"[^A-Z0-9]", "", str(token or "").upper())
+
+
+def reference_tokens(text) -> List[str]:
+    """Candidate invoice numbers inside a free-text reference / narration"""
+    tokens = [normalize_reference(t) for t in _REF_SPLIT.split(str(text or ""))]
+    return [t for t in tokens if t]
+
+
+def _to_paise(amount) -> int:
+    return int(round(float(amount or 0) * 100))
+
+
+class PaymentReconciler:
+    """One-pass matcher of payments against a fixed set of open invoices"""
+
+    def __init__(self, open_invoices: Iterable[Dict], tolerance: float = DEFAULT_TOLERANCE):
+        self.tolerance_paise = _to_paise(tolerance)
+        self.invoices = {}
+        self.matched = set()
+        self._by_reference = {}
+        self._by_vendor_amount = {}
+        self._by_vendor = {}
+
+        for inv in open_invoices:
+            invoice_id = inv["invoice_id"]
+            try:
+                deadline = invoice_deadline(inv).isoformat()
+            except (TypeError, ValueError):
+                deadline = ""
+            vendor = normalize_vendor(inv.get("client_name") or inv.get("vendor_name"))
+            paise = _to_paise(inv.get("amount"))
+
+            self.invoices[invoice_id] = inv
+            self._by_reference.setdefault(normalize_reference(invoice_id), invoice_id)
+            self._by_vendor_amount.setdefault((vendor, paise), []).append((deadline, invoice_id))
+            self._by_vendor.setdefault(vendor, []).append((paise, deadline, invoice_id))
+
+        # Oldest deadline first, so repeated equal payments settle the oldest invoice
+        for candidates in self._by_vendor_amount.values():
+            candidates.sort(reverse=True)  # pop() from the end takes the oldest
+        for amounts in self._by_vendor.values():
+            amounts.sort()
+
+    def match(self, vendor, amount: float, reference: str = "") -> Dict:
+        """
+        Match one payment
+
+        Returns:
+            {"method": reference|exact|tolerance|review|unmatched, "invoice_id": ...}
+        """
+        vendor = normalize_vendor(vendor)
+        paise = _to_paise(amount)
+
+        for token in reference_tokens(reference):
+            invoice_id = self._by_reference.get(token)
+            if invoice_id is None or invoice_id in self.matched:
+                continue
+            expected = _to_paise(self.invoices[invoice_id].get("amount"))
+            if abs(expected - paise) <= self.tolerance_paise:
+                self.matched.add(invoice_id)
+                return {"method": "reference", "invoice_id": invoice_id}
+            return {"method": "review", "invoice_id": invoice_id,
+                    "reason": f"amount {amount} differs from invoice amount {expected / 100}"}
+
+        candidates = self._by_vendor_amount.get((vendor, paise))
+        while candidates:
+            _, invoice_id = candidates.pop()
+            if invoice_id not in self.matched:
+                self.matched.add(invoice_id)
+                return {"method": "exact", "invoice_id": invoice_id}
+
+        amounts = self._by_vendor.get(vendor)
+        if amounts and self.tolerance_paise:
+            best = None
+            pos = bisect_left(amounts, (paise - self.tolerance_paise,))
+            while pos < len(amounts) and amounts[pos][0] <= paise + self.tolerance_paise:
+                candidate_paise, deadline, invoice_id = amounts[pos]
+                if invoice_id not in self.matched:
+                    key = (abs(candidate_paise - paise), deadline)
+                    if best is None or key < best[0]:
+                        best = (key, invoice_id)
+                pos += 1
+            if best:
+                self.matched.add(best[1])
+                return {"method": "tolerance", "invoice_id": best[1]}
+
+        return {"method": "unmatched", "invoice_id": None}
+
+
+def _resolve_payment_columns(headers: List[str], column_map: Optional[Dict[str, str]] = None) -> Dict[str, List[str]]:
+    """Map payment fields to source headers; reference may draw on several columns"""
+    by_norm = {" ".join(str(h).strip().lower().split()): h for h in headers if h is not None}
+    mapping = {}
+    for field, aliases in PAYMENT_COLUMN_ALIASES.items():
+        found = [by_norm[a] for a in aliases if a in by_norm]
+        if found:
+            mapping[field] = found if field == "reference" else found[:1]
+
+    for field, source in (column_map or {}).items():
+        key = " ".join(str(source).strip().lower().split())
+        if key not in by_norm:
+            raise ValueError(f"Column '{source}' (for {field}) not found in file headers")
+        mapping[field] = [by_norm[key]]
+
+    if "amount" not in mapping:
+        raise ValueError("Could not find an amount column; pass column_map to map it")
+    if "vendor" not in mapping and "reference" not in mapping:
+        raise ValueError("Need a vendor or reference column to match payments")
+    return mapping
+
+
+def reconcile_payments(payments_file: str, invoice_monitor, state_manager,
+                       tolerance: float = DEFAULT_TOLERANCE,
+                       column_map: Optional[Dict[str, str]] = None,
+                       dry_run: bool = False) -> Dict:
+    """
+    Reconcile a payment export against open invoices and mark matches paid
+
+    Args:
+        payments_file: CSV/XLSX bank statement or payment export
+        invoice_monitor: Source of invoices (InvoiceMonitor)
+        state_manager: Where paid status is recorded (StateManager)
+        tolerance: Largest amount difference (rupees) accepted for a match
+        column_map: Explicit {vendor|amount|reference|date: source_header} overrides
+        dry_run: Report matches without marking anything paid
+
+    Returns:
+        Report with counts per match method, matched invoices, and the
+        payments that need review or matched nothing
+    """
+    open_invoices = [inv for inv in invoice_monitor.get_active_invoices()
+                     if not state_manager.is_paid(inv["invoice_id"])]
+    reconciler = PaymentReconciler(open_invoices, tolerance)
+
+    headers, rows = iter_rows(payments_file)
+    mapping = _resolve_payment_columns(headers, column_map)
+    get = lambda row, field: [row.get(h) for h in mapping.get(field, [])]
+
+    counts = {"reference": 0, "exact": 0, "tolerance": 0, "review": 0, "unmatched": 0, "invalid": 0}
+    matched = []
+    review = []
+    unmatched = []
+    matched_amount = 0.0
+
+    for line_no, row in enumerate(rows, start=2):  # header is line 1
+        try:
+            amount = parse_amount(get(row, "amount")[0])
+        except (ValueError, TypeError, IndexError):
+            counts["invalid"] += 1
+            continue
+        if amount <= 0:
+            counts["invalid"] += 1
+            continue
+
+        vendor = (get(row, "vendor") or [""])[0]
+        reference = " ".join(str(v) for v in get(row, "reference") if v not in (None, ""))
+        result = reconciler.match(vendor, amount, reference)
+        counts[result["method"]] += 1
+
+        payment = {"line": line_no, "vendor": vendor, "amount": amount, "reference": reference}
+        dates = get(row, "date")
+        if dates and dates[0] not in (None, ""):
+            try:
+                payment["date"] = parse_date(dates[0])[0]
+            except ValueError:
+                pass
+
+        if result["method"] == "unmatched":
+            if len(unmatched) < MAX_REPORTED:
+                unmatched.append(payment)
+        elif result["method"] == "review":
+            if len(review) < MAX_REPORTED:
+                review.append(dict(payment, invoice_id=result["invoice_id"], reason=result["reason"]))
+        else:
+            matched_amount += amount
+            matched.append(dict(payment, invoice_id=result["invoice_id"], method=result["method"]))
+
+    marked = 0
+    if matched and not dry_run:
+        marked = state_manager.mark_many_as_paid([m["invoice_id"] for m in matched])
+
+    return {
+        "file": str(payments_file),
+        "open_invoices": len(open_invoices),
+        "payments_read": sum(counts.values()),
+        "matched": len(matched),
+        "marked_paid": marked,
+        "matched_amount": round(matched_amount, 2),
+        "by_method": counts,
+        "dry_run": dry_run,
+        "matches": matched[:MAX_REPORTED],
+        "needs_review": review,
+        "unmatched_payments": unmatched
+    }
@@ -1,8 +1,13 @@
 """
 Enhanced Scheduler Module - With time support and better day descriptions
+
+Besides answering "notify now?", the scheduler computes when each invoice is
+next due for a notification, and NotificationQueue keeps those times in a
+min-heap so daemons can sleep exactly until the earliest one.
 """
 from datetime import datetime, timedelta
-from typing import Tuple
+from typing import Dict, List, Optional, Tuple
+import heapq
 
 FREQUENCY_MAP = {
     "extreme_calm": 12 * 3600,
@@ -14,6 +19,36 @@ FREQUENCY_MAP = {
     "explosive": 0
 }
 
+# Lowest days_left of each urgency band (get_urgency_level); explosive has none
+LEVEL_FLOORS = {
+    "extreme_calm": 41,
+    "calm": 30,
+    "moderate": 20,
+    "urgent": 11,
+    "critical": 6,
+    "high_critical": 3
+}
+
+ALIGNMENT_WINDOW = timedelta(minutes=15)  # Regular notifications land near the invoice's time of day
+EXPLOSIVE_REPEAT = timedelta(minutes=15)  # "Persistent" cadence once an invoice is explosive
+DEFAULT_DEADLINE_DAYS = 45
+DEFAULT_INVOICE_TIME = "T09:00:00"
+
+
+def invoice_datetime(invoice: Dict) -> datetime:
+    """Invoice creation time; date-only invoices default to 9 AM"""
+    invoice_datetime_str = invoice.get("invoice_datetime") or invoice.get("invoice_date")
+    if "T" not in invoice_datetime_str:
+        invoice_datetime_str += DEFAULT_INVOICE_TIME
+    return datetime.fromisoformat(invoice_datetime_str)
+
+
+def invoice_deadline(invoice: Dict) -> datetime:
+    """Exact deadline of an invoice (same rules as InvoiceMonitor.calculate_time_info)"""
+    deadline_days = invoice.get("deadline_days", DEFAULT_DEADLINE_DAYS)
+    return invoice_datetime(invoice) + timedelta(days=deadline_days)
+
+
 class NotificationScheduler:
     """Determines urgency level and notification frequency with time awareness"""
 
@@ -118,7 +153,8 @@ class NotificationScheduler:
         return FREQUENCY_MAP.get(urgency_level, 12 * 3600)
 
     def should_notify_now(self, last_notification_time: datetime, 
-                          urgency_level: str, invoice_time: datetime) -> bool:
+                          urgency_level: str, invoice_time: datetime,
+                          now: Optional[datetime] = None) -> bool:
         """
         Check if notification should be sent now (considering exact time)
 
@@ -126,6 +162,7 @@ class NotificationScheduler:
             last_notification_time: When last notification was sent
             urgency_level: Current urgency level
             invoice_time: Original invoice creation time
+            now: Time to check at (default: current time)
         """
         interval = self.get_notification_interval(urgency_level)
 
@@ -139,7 +176,7 @@ class NotificationScheduler:
 
         # Check time-based alignment for regular notifications
         # Notification should align with invoice creation time
-        now = datetime.now()
+        now = now or datetime.now()
         time_since_last = (now - last_notification_time).total_seconds()
 
         # Check if enough time has passed
@@ -161,6 +198,51 @@ class NotificationScheduler:
 
         return False
 
+    def _level_at(self, deadline: datetime, when: datetime) -> str:
+        return self.get_urgency_level(int((deadline - when).total_seconds() // 86400))
+
+    def next_notification_time(self, last_notification_time: Optional[datetime],
+                               invoice_time: datetime, deadline: datetime,
+                               now: Optional[datetime] = None) -> datetime:
+        """
+        Earliest time at or after `now` when should_notify_now would say yes
+
+        Regular levels need their FREQUENCY_MAP interval since the last
+        notification and a time of day within ALIGNMENT_WINDOW of the invoice
+        time; explosive invoices repeat every EXPLOSIVE_REPEAT. Urgency only
+        rises as the deadline nears, so a level boundary crossed while waiting
+        can bring the time forward.
+        """
+        now = now or datetime.now()
+        if last_notification_time is None:
+            return now
+
+        # The instant an invoice turns explosive (days_left drops below 3)
+        explosive_at = deadline - timedelta(days=LEVEL_FLOORS["high_critical"]) + timedelta(microseconds=1)
+        if self._level_at(deadline, now) == "explosive":
+            return max(now, last_notification_time + EXPLOSIVE_REPEAT)
+
+        # Walk the daily alignment windows until one admits a notification
+        window_center = now.replace(hour=invoice_time.hour, minute=invoice_time.minute,
+                                    second=0, microsecond=0) - timedelta(days=1)
+        while window_center - ALIGNMENT_WINDOW < explosive_at:
+            start = max(now, window_center - ALIGNMENT_WINDOW)
+            end = window_center + ALIGNMENT_WINDOW
+            t = start
+            while t <= end:
+                level = self._level_at(deadline, t)
+                if level == "explosive":
+                    return t
+                due = last_notification_time + timedelta(seconds=self.get_notification_interval(level))
+                if due <= t:
+                    return t
+                # Either the interval elapses at this level, or the next level starts first
+                boundary = deadline - timedelta(days=LEVEL_FLOORS[level]) + timedelta(microseconds=1)
+                t = min(due, boundary)
+            window_center += timedelta(days=1)
+
+        return max(now, explosive_at)
+
     def get_schedule_info(self, days_left: int, hours_left: int = 0, 
                           human_description: str = "") -> dict:
         """Get complete scheduling information"""
@@ -182,3 +264,54 @@ class NotificationScheduler:
             "is_persistent": urgency == "explosive",
             "human_description": human_description or f"{days_left} days left"
         }
+
+
+class NotificationQueue:
+    """
+    Min-heap of (next notification time, invoice_id)
+
+    Rescheduling or removing an invoice leaves its old entry in the heap;
+    stale entries are skipped when they reach the top.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}  # invoice_id -> currently scheduled time
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def schedule(self, invoice_id: str, when: datetime):
+        self._due[invoice_id] = when
+        heapq.heappush(self._heap, (when, invoice_id))
+
+    def remove(self, invoice_id: str):
+        self._due.pop(invoice_id, None)
+
+    def _drop_stale(self):
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def next_due(self) -> Optional[datetime]:
+        """Earliest scheduled time, or None if nothing is queued"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[str]:
+        """Remove and return every invoice due at or before `now`"""
+        now = now or datetime.now()
+        due = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, invoice_id = heapq.heappop(self._heap)
+            del self._due[invoice_id]
+            due.append(invoice_id)
+            self._drop_stale()
+        return due
+
+    def seconds_until_next(self, max_wait: float, now: Optional[datetime] = None) -> float:
+        """How long a daemon should sleep: until the next due time, capped at max_wait"""
+        next_due = self.next_due()
+        if next_due is None:
+            return max_wait
+        return min(max_wait, max(0.0, (next_due - (now or datetime.now())).total_seconds()))
@@ -0,0 +1,204 @@
+"""
+SMTP Pool Module - Reusable, authenticated SMTP connections
+
+Opening an SMTP session costs a TCP connect, STARTTLS handshake and login.
+The pool keeps up to max_connections sessions open and hands them out for
+sends:
+
+    - a session idle for longer than health_check_after is probed with NOOP
+      before reuse; dead ones are replaced
+    - a session is retired after max_messages_per_connection messages (many
+      providers cap messages per connection) or idle_timeout seconds unused
+    - a send that fails because the connection dropped is retried once on a
+      fresh session; a refused recipient or message is not retried
+"""
+from collections import deque
+from contextlib import contextmanager
+from email.message import Message
+from typing import List, Optional
+import os
+import smtplib
+import ssl
+import threading
+import time
+
+# Failures that mean the session is unusable (as opposed to a rejected message)
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+
+class _PooledConnection:
+    __slots__ = ("smtp", "messages_sent", "last_used")
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+class SmtpConnectionPool:
+    """Thread-safe pool of logged-in SMTP sessions to one server"""
+
+    def __init__(self, host: str, port: int = 587, username: Optional[str] = None,
+                 password: Optional[str] = None, use_tls: bool = True,
+                 max_connections: int = 2, max_messages_per_connection: int = 100,
+                 idle_timeout: float = 300.0, health_check_after: float = 30.0,
+                 timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._idle = []  # most recently used last
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self.connections_opened = 0
+
+    @classmethod
+    def from_env(cls, **kwargs) -> Optional["SmtpConnectionPool"]:
+        """Pool configured from SMTP_SERVER / SMTP_PORT / SMTP_EMAIL / SMTP_PASSWORD (None if unset)"""
+        smtp_email = os.getenv("SMTP_EMAIL")
+        smtp_password = os.getenv("SMTP_PASSWORD")
+        if not smtp_email or not smtp_password:
+            return None
+        return cls(
+            host=os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+            port=int(os.getenv("SMTP_PORT", 587)),
+            username=smtp_email,
+            password=smtp_password,
+            **kwargs
+        )
+
+    def _connect(self) -> _PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls(context=ssl.create_default_context())
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._close(smtp)
+            raise
+        self.connections_opened += 1
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _is_alive(self, conn: _PooledConnection) -> bool:
+        try:
+            return conn.smtp.noop()[0] == 250
+        except CONNECTION_ERRORS + (smtplib.SMTPException,):
+            return False
+
+    def _checkout(self) -> _PooledConnection:
+        """Reuse an idle session if one is still good, else open a new one"""
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+
+            idle_for = time.monotonic() - conn.last_used
+            if idle_for > self.idle_timeout:
+                self._close(conn.smtp)
+            elif idle_for > self.health_check_after and not self._is_alive(conn):
+                conn.smtp.close()
+            else:
+                return conn
+
+    def _checkin(self, conn: _PooledConnection):
+        conn.last_used = time.monotonic()
+        if conn.messages_sent >= self.max_messages_per_connection:
+            self._close(conn.smtp)
+            return
+        with self._lock:
+            self._idle.append(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a session for one or more sends
+
+        A session that raises a connection error is dropped instead of being
+        returned to the pool.
+        """
+        with self._slots:
+            conn = self._checkout()
+            try:
+                yield conn
+            except CONNECTION_ERRORS:
+                conn.smtp.close()
+                raise
+            finally:
+                if conn.smtp.sock is not None:
+                    self._checkin(conn)
+
+    def _send_on(self, conn: _PooledConnection, msg: Message):
+        conn.smtp.send_message(msg)
+        conn.messages_sent += 1
+
+    def send_message(self, msg: Message):
+        """Send one message, retrying once on a fresh session if the connection dropped"""
+        try:
+            with self.connection() as conn:
+                self._send_on(conn, msg)
+        except CONNECTION_ERRORS:
+            with self.connection() as conn:
+                self._send_on(conn, msg)
+
+    def send_many(self, messages: List[Message]) -> List[bool]:
+        """
+        Send a batch over as few sessions as the message limit allows
+
+        Returns:
+            Success flag per message, in order
+        """
+        results = [False] * len(messages)
+        pending = deque(range(len(messages)))
+        retried = None       # message whose send already lost one connection
+        connect_failures = 0  # consecutive failures to even open a session
+
+        while pending:
+            connected = False
+            try:
+                with self.connection() as conn:
+                    connected = True
+                    connect_failures = 0
+                    while pending and conn.messages_sent < self.max_messages_per_connection:
+                        i = pending[0]
+                        try:
+                            self._send_on(conn, messages[i])
+                            results[i] = True
+                        except CONNECTION_ERRORS:
+                            raise
+                        except smtplib.SMTPException as e:
+                            print(f"❌ Email to {messages[i].get('To')} refused: {e}")
+                        pending.popleft()
+            except CONNECTION_ERRORS as e:
+                if not connected:
+                    connect_failures += 1
+                    if connect_failures >= 2:
+                        print(f"❌ SMTP server unreachable, {len(pending)} email(s) not sent: {e}")
+                        break
+                elif retried == pending[0]:
+                    # The message in flight gets one more try on a new session, not more
+                    print(f"❌ Email to {messages[pending[0]].get('To')} failed: {e}")
+                    pending.popleft()
+                else:
+                    retried = pending[0]
+        return results
+
+    def close(self):
+        """Close every idle session"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn.smtp)
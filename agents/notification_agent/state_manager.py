@@ -1,29 +1,209 @@
 """
 State Manager Module - Tracks notification history and state
+
+Persistence is a JSON snapshot (notification_state.json) plus an append-only
+log next to it (notification_state.json.log). Every change appends the full
+new record of one invoice as a JSON line, so a write costs the same however
+many invoices are tracked. Loading replays the log over the snapshot; records
+are whole, so replaying one twice is harmless.
+
+Appends are fsynced on commit(): immediately by default, or once at the end of
+a `with state_manager.batch():` block, so a notification cycle pays for a
+single fsync. Once the log grows past compact_threshold records it is folded
+into a new snapshot on a background thread.
 """
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Tuple
 import json
+import os
+import shutil
+import sqlite3
+import threading
+
+# One shared encoder: json.dumps(default=...) builds a new one per call
+_encode = json.JSONEncoder(default=str).encode
+
+
+def read_state_file(state_file: str) -> Tuple[Dict, int]:
+    """
+    Read a snapshot and replay its logs
+
+    Returns:
+        (state by invoice_id, number of log records replayed)
+    """
+    try:
+        with open(state_file, 'r') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = {}
+
+    # .log.compacting exists only if a crash interrupted compaction; it predates .log
+    log_records = 0
+    for path in (f"{state_file}.log.compacting", f"{state_file}.log"):
+        try:
+            f = open(path, 'r')
+        except FileNotFoundError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from an interrupted append
+                state[record["invoice_id"]] = record
+                log_records += 1
+    return state, log_records
+
+
+def _ends_with_newline(path: str) -> bool:
+    """False when a file's last line is unterminated (e.g. a torn append); missing/empty counts as True"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+    except OSError:
+        return True
+
+
+def _new_record(invoice_id: str, first_notification: Optional[str] = None) -> Dict:
+    record = {
+        "invoice_id": invoice_id,
+        "last_notification": None,
+        "notification_count": 0,
+        "channels_used": [],
+        "notification_enabled": True,
+        "dismissed_count": 0
+    }
+    if first_notification:
+        record["first_notification"] = first_notification
+    return record
+
+
+def _record_notification(record: Dict, channels: list, urgency_level: str) -> Dict:
+    """New record with one more notification sent over `channels`"""
+    record = dict(record)
+    record["last_notification"] = datetime.now().isoformat()
+    record["notification_count"] += 1
+    record["urgency_level"] = urgency_level
+    record["channels_used"] = record["channels_used"] + [
+        channel for channel in dict.fromkeys(channels) if channel not in record["channels_used"]
+    ]
+    return record
+
 
 class StateManager:
     """Manages notification state for invoices (in-memory + file persistence)"""
 
-    def __init__(self, state_file: str = "notification_state.json"):
+    def __init__(self, state_file: str = "notification_state.json", compact_threshold: int = 1000):
         self.state_file = state_file
+        self.log_file = f"{state_file}.log"
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._compactor = None
+        self._paid_listeners = []
         self.state = self._load_state()
+        if os.path.exists(f"{self.log_file}.compacting"):
+            self._write_snapshot(dict(self.state))  # finish a compaction a crash interrupted
+        torn = not _ends_with_newline(self.log_file)
+        self._log = open(self.log_file, 'a')
+        if torn:
+            self._log.write("\n")  # end the torn line so it doesn't swallow the next record
+
+    def add_paid_listener(self, callback):
+        """Register callback(invoice_id) to run whenever an invoice is marked paid"""
+        self._paid_listeners.append(callback)
 
     def _load_state(self) -> Dict:
-        """Load state from file"""
+        """Load the snapshot, then replay the logs written since"""
+        state, self._log_records = read_state_file(self.state_file)
+        return state
+
+    def _put(self, record: Dict):
+        """Replace one invoice's record and append it to the log"""
+        with self._lock:
+            self.state[record["invoice_id"]] = record
+            self._log.write(_encode(record) + "\n")
+            self._log_records += 1
+            if not self._batch_depth:
+                self.commit()
+
+    def commit(self):
+        """Make every appended record durable (one fsync)"""
+        with self._lock:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            if self._log_records >= self.compact_threshold:
+                self.compact(wait=False)
+
+    @contextmanager
+    def batch(self):
+        """Group updates so they share one commit, e.g. a whole notification cycle"""
+        with self._lock:
+            self._batch_depth += 1
         try:
-            with open(self.state_file, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self.commit()
+
+    def compact(self, wait: bool = True):
+        """
+        Fold the log into a new snapshot
+
+        The current log is set aside and a fresh one started under the lock;
+        writing the snapshot happens on a background thread (wait=False) or
+        before returning (wait=True). If an earlier snapshot write never
+        finished, its set-aside records are kept and this log is appended
+        to them, so the file replayed on open still covers everything since
+        the last good snapshot.
+        """
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                if not wait:
+                    return
+                self._compactor.join()
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._log.close()
+            pending = f"{self.log_file}.compacting"
+            if os.path.exists(pending):
+                with open(self.log_file, 'r') as src, open(pending, 'a') as dst:
+                    shutil.copyfileobj(src, dst)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(self.log_file)
+            else:
+                os.replace(self.log_file, pending)
+            self._log = open(self.log_file, 'a')
+            self._log_records = 0
+            # Records are replaced, never mutated in place, so a shallow copy is a stable view
+            snapshot = dict(self.state)
+            self._compactor = threading.Thread(target=self._write_snapshot, args=(snapshot,), daemon=True)
+            self._compactor.start()
+        if wait:
+            self._compactor.join()
 
-    def _save_state(self):
-        """Save state to file"""
-        with open(self.state_file, 'w') as f:
-            json.dump(self.state, f, indent=2, default=str)
+    def _write_snapshot(self, snapshot: Dict):
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            f.write(_encode(snapshot))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.state_file)
+        os.remove(f"{self.log_file}.compacting")
+
+    def close(self):
+        """Commit, wait for any running compaction and close the log"""
+        with self._lock:
+            self.commit()
+            compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        self._log.close()
 
     def get_invoice_state(self, invoice_id: str) -> Optional[Dict]:
         """Get state for specific invoice"""
@@ -36,28 +216,9 @@ class StateManager:
         urgency_level: str
     ):
         """Record that notification was sent"""
-        if invoice_id not in self.state:
-            self.state[invoice_id] = {
-                "invoice_id": invoice_id,
-                "first_notification": datetime.now().isoformat(),
-                "last_notification": None,
-                "notification_count": 0,
-                "channels_used": [],
-                "notification_enabled": True,
-                "dismissed_count": 0
-            }
-
-        # Update state
-        self.state[invoice_id]["last_notification"] = datetime.now().isoformat()
-        self.state[invoice_id]["notification_count"] += 1
-        self.state[invoice_id]["urgency_level"] = urgency_level
-
-        # Track channels
-        for channel in channels:
-            if channel not in self.state[invoice_id]["channels_used"]:
-                self.state[invoice_id]["channels_used"].append(channel)
-
-        self._save_state()
+        with self._lock:
+            record = self.state.get(invoice_id) or _new_record(invoice_id, datetime.now().isoformat())
+            self._put(_record_notification(record, channels, urgency_level))
 
     def get_last_notification_time(self, invoice_id: str) -> Optional[datetime]:
         """Get when last notification was sent"""
@@ -75,16 +236,43 @@ class StateManager:
 
     def disable_notifications(self, invoice_id: str):
         """User turned off notifications"""
-        if invoice_id in self.state:
-            self.state[invoice_id]["notification_enabled"] = False
-            self._save_state()
+        with self._lock:
+            if invoice_id in self.state:
+                self._put(dict(self.state[invoice_id], notification_enabled=False))
 
     def mark_as_paid(self, invoice_id: str):
         """Mark invoice as paid (stops notifications)"""
-        if invoice_id in self.state:
-            self.state[invoice_id]["paid"] = True
-            self.state[invoice_id]["paid_at"] = datetime.now().isoformat()
-            self._save_state()
+        with self._lock:
+            if invoice_id in self.state:
+                self._put(dict(self.state[invoice_id], paid=True, paid_at=datetime.now().isoformat()))
+
+        for callback in self._paid_listeners:
+            callback(invoice_id)
+
+    def mark_many_as_paid(self, invoice_ids: Iterable[str], paid_at: Optional[str] = None) -> int:
+        """
+        Mark a batch of invoices as paid with a single commit
+
+        Unlike mark_as_paid, invoices that were never notified get a state
+        entry too, so is_paid() holds for every invoice in the batch.
+
+        Returns:
+            Number of invoices marked
+        """
+        paid_at = paid_at or datetime.now().isoformat()
+        invoice_ids = list(dict.fromkeys(invoice_ids))
+        if not invoice_ids:
+            return 0
+
+        with self.batch():
+            for invoice_id in invoice_ids:
+                record = self.state.get(invoice_id) or _new_record(invoice_id)
+                self._put(dict(record, paid=True, paid_at=paid_at))
+
+        for invoice_id in invoice_ids:
+            for callback in self._paid_listeners:
+                callback(invoice_id)
+        return len(invoice_ids)
 
     def is_paid(self, invoice_id: str) -> bool:
         """Check if invoice is marked as paid"""
@@ -95,3 +283,199 @@ class StateManager:
         """Get total notifications sent for invoice"""
         invoice_state = self.get_invoice_state(invoice_id)
         return invoice_state.get("notification_count", 0) if invoice_state else 0
+
+
+class SqliteStateManager:
+    """
+    Notification state shared between processes, one SQLite row per invoice
+
+    Every change is its own short write transaction (BEGIN IMMEDIATE, so two
+    writers never both read-modify-write the same row), and every read goes to
+    the database, so notification_service, NotificationAgent and ADK sessions
+    all see each other's updates. WAL mode lets readers proceed while a write
+    is in progress; busy_timeout makes a writer wait its turn instead of
+    failing. Paid listeners fire only in the process that marked the invoice.
+
+    On first use the table is filled from an existing JSON state file
+    (snapshot + log) if there is one.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS notification_state (
+        invoice_id TEXT PRIMARY KEY,
+        paid INTEGER NOT NULL DEFAULT 0,
+        notification_enabled INTEGER NOT NULL DEFAULT 1,
+        last_notification TEXT,
+        notification_count INTEGER NOT NULL DEFAULT 0,
+        data TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, db_path: str = "notification_state.db",
+                 legacy_file: Optional[str] = "notification_state.json",
+                 busy_timeout_ms: int = 30000):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._paid_listeners = []
+        # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(db_path, timeout=busy_timeout_ms / 1000,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; commits skip the fsync
+        self._conn.executescript(self._SCHEMA)
+        if legacy_file:
+            self._migrate(legacy_file)
+
+    def add_paid_listener(self, callback):
+        """Register callback(invoice_id) to run whenever an invoice is marked paid"""
+        self._paid_listeners.append(callback)
+
+    @contextmanager
+    def _write(self):
+        """One write transaction holding the database write lock"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _migrate(self, legacy_file: str):
+        """Import a JSON state file once (PRAGMA user_version marks it done)"""
+        with self._write() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= 1:
+                return
+            state, _ = read_state_file(legacy_file)
+            self._put_many(conn, state.values())
+            conn.execute("PRAGMA user_version = 1")
+        if state:
+            print(f"📦 Migrated {len(state)} invoice state(s) from {legacy_file} to {self.db_path}")
+
+    @staticmethod
+    def _get(conn, invoice_id: str) -> Optional[Dict]:
+        row = conn.execute(
+            "SELECT data FROM notification_state WHERE invoice_id = ?", (invoice_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def _put_many(conn, records: Iterable[Dict]):
+        conn.executemany(
+            "INSERT OR REPLACE INTO notification_state "
+            "(invoice_id, paid, notification_enabled, last_notification, notification_count, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (r["invoice_id"], 1 if r.get("paid", False) else 0,
+                 1 if r.get("notification_enabled", True) else 0,
+                 r.get("last_notification"), r.get("notification_count", 0), _encode(r))
+                for r in records
+            ]
+        )
+
+    def get_invoice_state(self, invoice_id: str) -> Optional[Dict]:
+        """Get state for specific invoice"""
+        with self._lock:
+            return self._get(self._conn, invoice_id)
+
+    def update_notification_sent(self, invoice_id: str, channels: list, urgency_level: str):
+        """Record that notification was sent"""
+        with self._write() as conn:
+            record = self._get(conn, invoice_id) or _new_record(invoice_id, datetime.now().isoformat())
+            self._put_many(conn, [_record_notification(record, channels, urgency_level)])
+
+    def get_last_notification_time(self, invoice_id: str) -> Optional[datetime]:
+        """Get when last notification was sent"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_notification FROM notification_state WHERE invoice_id = ?", (invoice_id,)
+            ).fetchone()
+        return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+    def is_notification_enabled(self, invoice_id: str) -> bool:
+        """Check if notifications are enabled for this invoice"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT notification_enabled FROM notification_state WHERE invoice_id = ?", (invoice_id,)
+            ).fetchone()
+        return bool(row[0]) if row else True
+
+    def disable_notifications(self, invoice_id: str):
+        """User turned off notifications"""
+        with self._write() as conn:
+            record = self._get(conn, invoice_id)
+            if record is not None:
+                self._put_many(conn, [dict(record, notification_enabled=False)])
+
+    def mark_as_paid(self, invoice_id: str):
+        """Mark invoice as paid (stops notifications)"""
+        with self._write() as conn:
+            record = self._get(conn, invoice_id)
+            if record is not None:
+                self._put_many(conn, [dict(record, paid=True, paid_at=datetime.now().isoformat())])
+
+        for callback in self._paid_listeners:
+            callback(invoice_id)
+
+    def mark_many_as_paid(self, invoice_ids: Iterable[str], paid_at: Optional[str] = None) -> int:
+        """
+        Mark a batch of invoices as paid in one transaction
+
+        Invoices that were never notified get a state row too, so is_paid()
+        holds for every invoice in the batch.
+
+        Returns:
+            Number of invoices marked
+        """
+        paid_at = paid_at or datetime.now().isoformat()
+        invoice_ids = list(dict.fromkeys(invoice_ids))
+        if not invoice_ids:
+            return 0
+
+        with self._write() as conn:
+            self._put_many(conn, [
+                dict(self._get(conn, invoice_id) or _new_record(invoice_id), paid=True, paid_at=paid_at)
+                for invoice_id in invoice_ids
+            ])
+
+        for invoice_id in invoice_ids:
+            for callback in self._paid_listeners:
+                callback(invoice_id)
+        return len(invoice_ids)
+
+    def is_paid(self, invoice_id: str) -> bool:
+        """Check if invoice is marked as paid"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT paid FROM notification_state WHERE invoice_id = ?", (invoice_id,)
+            ).fetchone()
+        return bool(row[0]) if row else False
+
+    def get_notification_count(self, invoice_id: str) -> int:
+        """Get total notifications sent for invoice"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT notification_count FROM notification_state WHERE invoice_id = ?", (invoice_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    @contextmanager
+    def batch(self):
+        """
+        Same interface as StateManager.batch
+
+        Each change already commits on its own, cheaply under WAL; holding one
+        write transaction across a cycle would lock out the other processes
+        while notifications are being sent.
+        """
+        yield self
+
+    def commit(self):
+        """Nothing to do: every change is committed when it is made"""
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
@@ -0,0 +1,149 @@
+"""
+WhatsApp Sender Module - Long-lived Twilio REST client for WhatsApp messages
+
+One requests.Session (pooled keep-alive connections) is shared by every send.
+Bulk sends run on a thread pool, and a token bucket holds them to the
+sender's throughput (TWILIO_WHATSAPP_MPS messages per second). A 429 or 5xx
+response is retried after the server's Retry-After, or else after an
+exponential backoff with jitter; a 429 pauses the whole bucket, since every
+worker shares the sender's limit. Each wait is capped at max_retry_delay, so
+with the per-request timeout a send's total time is bounded.
+
+TWILIO_API_BASE overrides the API host, e.g. to point at a local stub.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import os
+import random
+import threading
+import time
+
+DEFAULT_API_BASE = "https://api.twilio.com"
+DEFAULT_FROM_NUMBER = "whatsapp:+14155238886"  # Twilio sandbox
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Blocking rate limiter: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold every caller back for `seconds` (e.g. after a 429)"""
+        with self._lock:
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class WhatsAppSender:
+    """Sends WhatsApp messages through Twilio's Messages API over one session"""
+
+    def __init__(self, account_sid: str, auth_token: str, from_number: str = DEFAULT_FROM_NUMBER,
+                 api_base: str = DEFAULT_API_BASE, messages_per_second: float = 10.0,
+                 max_workers: int = 8, max_retries: int = 4, backoff: float = 0.5,
+                 timeout: float = 10.0, max_retry_delay: float = 30.0):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.from_number = from_number
+        self.url = f"{api_base.rstrip('/')}/2010-04-01/Accounts/{account_sid}/Messages.json"
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_retry_delay = max_retry_delay
+        self.rate_limiter = TokenBucket(messages_per_second)
+
+        self.session = requests.Session()
+        self.session.auth = (account_sid, auth_token)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="whatsapp")
+
+    @classmethod
+    def from_env(cls, **kwargs) -> Optional["WhatsAppSender"]:
+        """Sender configured from the TWILIO_* environment (None without credentials)"""
+        account_sid = os.getenv("TWILIO_ACCOUNT_SID")
+        auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+        if not account_sid or not auth_token:
+            return None
+        return cls(
+            account_sid,
+            auth_token,
+            from_number=os.getenv("TWILIO_WHATSAPP_NUMBER", DEFAULT_FROM_NUMBER),
+            api_base=os.getenv("TWILIO_API_BASE", DEFAULT_API_BASE),
+            messages_per_second=float(os.getenv("TWILIO_WHATSAPP_MPS", 10)),
+            **kwargs
+        )
+
+    def _retry_delay(self, response, attempt: int) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(self.max_retry_delay, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return min(self.max_retry_delay, self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    def send(self, phone_number: str, body: str) -> Optional[str]:
+        """
+        Send one message
+
+        Returns:
+            Twilio message SID, or None if it could not be sent
+        """
+        import requests
+
+        data = {"From": self.from_number, "To": f"whatsapp:{phone_number}", "Body": body}
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            response = None
+            try:
+                response = self.session.post(self.url, data=data, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = str(e)
+            else:
+                if response.status_code < 300:
+                    return response.json().get("sid")
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code not in RETRY_STATUSES:
+                    break  # bad number, auth failure, ... retrying will not help
+
+            if attempt < self.max_retries:
+                delay = self._retry_delay(response, attempt)
+                if response is not None and response.status_code == 429:
+                    self.rate_limiter.pause(delay)  # throttled: slow down every worker, not just this one
+                else:
+                    time.sleep(delay)
+
+        print(f"❌ WhatsApp to {phone_number} failed: {error}")
+        return None
+
+    def send_many(self, messages: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+        Send (phone_number, body) pairs concurrently within the rate limit
+
+        Returns:
+            Message SID (or None) per message, in order
+        """
+        return list(self._executor.map(lambda m: self.send(*m), messages))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
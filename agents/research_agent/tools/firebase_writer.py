@@ -0,0 +1,174 @@
+"""
+Buffered Firestore writer - Takes document writes off the request path.
+
+Writes are queued in memory and a background thread commits them in batches.
+A batch is committed when it is full (size trigger) or when the oldest queued
+write has waited flush_interval seconds (time trigger). The queue is bounded,
+so producers block when Firestore cannot keep up (backpressure). Failed
+commits are retried with exponential backoff, and pending writes are flushed
+when the interpreter exits.
+"""
+import atexit
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+from lib.firebase_config import get_db, invalidate_collection
+
+FIRESTORE_BATCH_LIMIT = 500  # Hard limit on writes per Firestore batch
+
+
+class BufferedFirestoreWriter:
+    """Queues Firestore writes and commits them in batches from a background thread"""
+
+    def __init__(
+        self,
+        client_factory: Callable = get_db,
+        batch_size: int = 400,
+        flush_interval: float = 2.0,
+        max_pending: int = 5000,
+        max_retries: int = 5,
+        base_backoff: float = 0.5
+    ):
+        self.client_factory = client_factory
+        self.batch_size = min(batch_size, FIRESTORE_BATCH_LIMIT)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()  # producers and the flusher both update stats
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "retries": 0, "failed": 0}
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, amount in increments.items():
+                self.stats[name] += amount
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._thread_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stop.clear()
+                    self._thread = threading.Thread(
+                        target=self._run, name="firestore-writer", daemon=True
+                    )
+                    self._thread.start()
+
+    def write(self, collection: str, data: dict, doc_id: Optional[str] = None,
+              timeout: Optional[float] = None) -> str:
+        """
+        Queue a document write and return its ID immediately
+
+        Args:
+            collection: Target collection
+            data: Document data
+            doc_id: Optional explicit ID (auto-generated client-side otherwise)
+            timeout: Max seconds to block when the buffer is full (None = wait)
+
+        Raises:
+            queue.Full: Buffer stayed full for longer than timeout
+        """
+        col = self.client_factory().collection(collection)
+        doc_ref = col.document(doc_id) if doc_id else col.document()
+
+        self._ensure_started()
+        self._queue.put((collection, doc_ref, data), timeout=timeout)
+        self._count(queued=1)
+        return doc_ref.id
+
+    def flush(self):
+        """Block until every queued write has been committed (or given up on)"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Flush pending writes and stop the background thread"""
+        self.flush()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 1)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _collect_batch(self) -> list:
+        """Wait for the first write, then coalesce until full or flush_interval elapses"""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit(self, items: list):
+        """Commit one batch, retrying with exponential backoff"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                batch = self.client_factory().batch()
+                for _, doc_ref, data in items:
+                    batch.set(doc_ref, data)
+                batch.commit()
+                # Cached reads of these collections are now stale
+                for collection in {collection for collection, _, _ in items}:
+                    invalidate_collection(collection)
+                self._count(written=len(items), batches=1)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self._count(failed=len(items))
+                    print(f"❌ Firestore batch of {len(items)} writes failed: {e}")
+                    return
+                self._count(retries=1)
+                time.sleep(self.base_backoff * (2 ** attempt))
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            items = self._collect_batch()
+            if not items:
+                continue
+            try:
+                self._commit(items)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> BufferedFirestoreWriter:
+    """Shared writer for all agents in this process (flushed at exit)"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = BufferedFirestoreWriter()
+                atexit.register(_writer.close)
+    return _writer
+
+
+def save_to_firestore_async(collection: str, data: dict) -> str:
+    """Non-blocking save_to_firestore: queues the write and returns the doc ID"""
+    return get_writer().write(collection, data)
+
+
+def flush_firestore_writes():
+    """Wait for all queued writes to reach Firestore"""
+    if _writer is not None:
+        _writer.flush()
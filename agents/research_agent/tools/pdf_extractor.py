@@ -0,0 +1,135 @@
+"""
+PDF text extraction - Streams government circulars (CBDT, MSME notifications),
+reads only the first few pages and caches extracted text by content hash.
+"""
+import hashlib
+import io
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Tuple
+
+MAX_PDF_BYTES = 5 * 1024 * 1024   # Larger PDFs are skipped, not parsed
+MAX_PDF_PAGES = 5                 # Circular summaries live on the first pages
+MAX_PDF_CHARS = 20000
+CHUNK_SIZE = 64 * 1024
+CACHE_SIZE = 128
+
+_cache = OrderedDict()
+_cache_lock = Lock()
+
+
+def is_pdf_response(response, url: str) -> bool:
+    """Detect PDFs from the Content-Type header, falling back to the URL"""
+    content_type = response.headers.get("Content-Type", "").lower()
+    if "application/pdf" in content_type:
+        return True
+    return url.lower().split("?")[0].endswith(".pdf")
+
+
+def read_capped(response, max_bytes: int = MAX_PDF_BYTES) -> Tuple[bytes, bool]:
+    """
+    Read a streamed response body up to max_bytes
+
+    A PDF's cross-reference table sits at the end of the file, so a cut-off
+    body can't be parsed; callers should treat truncated=True as "too large".
+    When Content-Length already says so, nothing is downloaded.
+
+    Returns:
+        Tuple of (body, truncated)
+    """
+    declared = response.headers.get("Content-Length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        response.close()
+        return b"", True
+
+    buf = bytearray()
+    truncated = False
+
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        if not chunk:
+            continue
+        buf.extend(chunk)
+        if len(buf) > max_bytes:
+            truncated = True
+            del buf[max_bytes:]
+            break
+
+    response.close()
+    return bytes(buf), truncated
+
+
+def _load_reader():
+    """pypdf is optional; PyPDF2 exposes the same reader API"""
+    try:
+        from pypdf import PdfReader
+        return PdfReader
+    except ImportError:
+        pass
+    try:
+        from PyPDF2 import PdfReader
+        return PdfReader
+    except ImportError:
+        return None
+
+
+def extract_pdf_text(data: bytes, max_pages: int = MAX_PDF_PAGES,
+                     max_chars: int = MAX_PDF_CHARS) -> Dict:
+    """
+    Extract text from the first max_pages pages, stopping at max_chars
+
+    Results are cached by SHA-256 of the PDF bytes, so the same circular
+    mirrored on several sites is only parsed once.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    key = (digest, max_pages, max_chars)
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return dict(_cache[key], cached=True)
+
+    PdfReader = _load_reader()
+    if PdfReader is None:
+        return {"success": False, "error": "pypdf not installed (pip install pypdf)"}
+
+    if not data.startswith(b"%PDF"):
+        return {"success": False, "error": "Response is not a PDF document"}
+
+    try:
+        reader = PdfReader(io.BytesIO(data), strict=False)
+        total_pages = len(reader.pages)
+        parts = []
+        chars = 0
+        pages_read = 0
+
+        # Pages are parsed lazily by the reader; stop as soon as the budget is met
+        for page in reader.pages:
+            if pages_read >= max_pages or chars >= max_chars:
+                break
+            page_text = ' '.join((page.extract_text() or "").split())
+            pages_read += 1
+            if page_text:
+                parts.append(page_text)
+                chars += len(page_text) + 1
+
+        title = None
+        if reader.metadata is not None:
+            title = reader.metadata.get("/Title")
+
+        result = {
+            "success": True,
+            "text": ' '.join(parts)[:max_chars],
+            "title": str(title) if title else None,
+            "pages_read": pages_read,
+            "total_pages": total_pages,
+            "content_hash": digest
+        }
+    except Exception as e:
+        return {"success": False, "error": f"PDF parse failed: {e}"}
+
+    with _cache_lock:
+        _cache[key] = result
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return dict(result, cached=False)
@@ -0,0 +1,159 @@
+"""
+Query yield analytics - Records what each SerpAPI search actually produced
+and plans the cheapest query set that keeps the same topic coverage.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+# Yield score weights: priority domains and topic coverage matter most
+NEW_URL_WEIGHT = 1.0
+PRIORITY_WEIGHT = 2.0
+TOPIC_WEIGHT = 3.0
+DUPLICATE_PENALTY = 0.5
+
+DEFAULT_MIN_SCORE = 4.0          # Below this a query is low-yield
+DEFAULT_OVERLAP_THRESHOLD = 0.6  # Jaccard overlap of result URLs to treat queries as redundant
+
+
+def build_yield_record(query: str, result_urls: List[str], seen_urls: Iterable[str],
+                       priority_domains: List[str], topics: Iterable[str]) -> Dict:
+    """
+    Build the yield record for one search
+
+    Args:
+        query: Search query sent to SerpAPI
+        result_urls: Organic result links returned (in rank order)
+        seen_urls: URLs already collected earlier in the same run
+        priority_domains: Domains counted as priority hits
+        topics: Topic categories the query's pages were filed under
+    """
+    seen = set(seen_urls)
+    unique_urls = list(dict.fromkeys(u for u in result_urls if u))
+    new_urls = [u for u in unique_urls if u not in seen]
+    priority_hits = [u for u in new_urls if any(d in u for d in priority_domains)]
+    topics = sorted(set(topics))
+
+    return {
+        "query": query,
+        "result_count": len(unique_urls),
+        "new_urls": len(new_urls),
+        "duplicates": len(unique_urls) - len(new_urls),
+        "priority_hits": len(priority_hits),
+        "topics": topics,
+        "urls": unique_urls,
+        "score": yield_score(len(new_urls), len(priority_hits), len(topics),
+                             len(unique_urls) - len(new_urls)),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def yield_score(new_urls: int, priority_hits: int, topic_count: int, duplicates: int) -> float:
+    """Single number used to rank queries by usefulness"""
+    return round(new_urls * NEW_URL_WEIGHT
+                 + priority_hits * PRIORITY_WEIGHT
+                 + topic_count * TOPIC_WEIGHT
+                 - duplicates * DUPLICATE_PENALTY, 2)
+
+
+def aggregate_query_stats(records: Iterable[Dict]) -> Dict[str, Dict]:
+    """Average yield per query across all recorded runs"""
+    stats = {}
+    for rec in records:
+        query = rec.get("query")
+        if not query:
+            continue
+        s = stats.setdefault(query, {
+            "query": query, "runs": 0, "score_total": 0.0, "new_urls_total": 0,
+            "priority_total": 0, "duplicates_total": 0, "topics": set(), "urls": set()
+        })
+        s["runs"] += 1
+        s["score_total"] += rec.get("score", 0)
+        s["new_urls_total"] += rec.get("new_urls", 0)
+        s["priority_total"] += rec.get("priority_hits", 0)
+        s["duplicates_total"] += rec.get("duplicates", 0)
+        s["topics"].update(rec.get("topics", []))
+        s["urls"].update(rec.get("urls", []))
+
+    for s in stats.values():
+        runs = s["runs"]
+        s["avg_score"] = round(s.pop("score_total") / runs, 2)
+        s["avg_new_urls"] = round(s.pop("new_urls_total") / runs, 2)
+        s["avg_priority_hits"] = round(s.pop("priority_total") / runs, 2)
+        s["avg_duplicates"] = round(s.pop("duplicates_total") / runs, 2)
+
+    return stats
+
+
+def url_overlap(a: set, b: set) -> float:
+    """Jaccard similarity of two result URL sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def plan_queries(candidates: List[str], stats: Dict[str, Dict],
+                 min_score: float = DEFAULT_MIN_SCORE,
+                 overlap_threshold: float = DEFAULT_OVERLAP_THRESHOLD,
+                 max_queries: Optional[int] = None) -> Dict:
+    """
+    Choose the cheapest subset of candidate queries that keeps topic coverage
+
+    Queries without history are always kept (we need data on them). Observed
+    queries are merged when their result URLs overlap heavily (the weaker one
+    is dropped), then low-yield queries are dropped, weakest first, unless
+    they are the only source for a topic. The best query always survives, so
+    the plan is never empty while there are candidates.
+
+    Returns:
+        Dict with planned queries, dropped queries (with reasons) and the
+        topic coverage the plan is expected to keep
+    """
+    unseen = [q for q in candidates if q not in stats]
+    observed = sorted((q for q in candidates if q in stats),
+                      key=lambda q: stats[q]["avg_score"], reverse=True)
+
+    kept = []
+    dropped = []
+    topics_of = {q: set(stats[q]["topics"]) for q in observed}
+
+    # 1. Merge overlapping queries into the stronger one
+    for query in observed:
+        twin = next((k for k in kept
+                     if url_overlap(stats[query]["urls"], stats[k]["urls"]) >= overlap_threshold), None)
+        if twin:
+            topics_of[twin] |= topics_of[query]
+            dropped.append({"query": query, "reason": "overlap", "merged_into": twin})
+        else:
+            kept.append(query)
+
+    # 2. Drop low-yield queries unless they alone cover a topic or are all that is left
+    for query in reversed(list(kept)):
+        if stats[query]["avg_score"] >= min_score:
+            continue
+        if len(kept) == 1 and not unseen:
+            break
+        others = set().union(*(topics_of[k] for k in kept if k != query))
+        if topics_of[query] - others:
+            continue
+        kept.remove(query)
+        dropped.append({"query": query, "reason": "low_yield",
+                        "avg_score": stats[query]["avg_score"]})
+
+    planned = [q for q in candidates if q in kept or q in unseen]
+    if max_queries is not None and len(planned) > max_queries:
+        rank = {q: stats[q]["avg_score"] if q in stats else float("inf") for q in planned}
+        keep = set(sorted(planned, key=lambda q: rank[q], reverse=True)[:max_queries])
+        for q in planned:
+            if q not in keep:
+                dropped.append({"query": q, "reason": "budget"})
+        planned = [q for q in planned if q in keep]
+
+    coverage = set().union(*(topics_of.get(q, set()) for q in planned)) if planned else set()
+
+    return {
+        "queries": planned,
+        "dropped": dropped,
+        "searches_saved": len(candidates) - len(planned),
+        "expected_topics": sorted(coverage),
+        "unobserved": unseen
+    }
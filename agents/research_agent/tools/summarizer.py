@@ -0,0 +1,130 @@
+"""
+Extractive summarizer - Runs at scrape time so tools hand Gemini a few
+relevant sentences and numeric facts instead of 4k chars of page text.
+"""
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Topic keywords used to score sentences (matches batch research categories)
+TOPIC_KEYWORDS = {
+    "section_43bh": ["43b", "43b(h)", "section 43b", "msme", "payment", "45 days",
+                     "15 days", "deduction", "micro", "small", "enterprise", "supplier"],
+    "penalties": ["penalty", "interest", "disallow", "disallowance", "compound",
+                  "bank rate", "delayed", "samadhaan", "section 16", "tax"],
+    "udyam": ["udyam", "registration", "classification", "micro", "small", "medium",
+              "turnover", "investment", "certificate", "msme"],
+    "case_studies": ["case study", "example", "company", "illustration", "scenario",
+                     "deduction", "assessment", "year"],
+    "automation": ["automation", "software", "erp", "tally", "tracking", "compliance",
+                   "reminder", "workflow"]
+}
+
+DEFAULT_KEYWORDS = sorted({kw for kws in TOPIC_KEYWORDS.values() for kw in kws})
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9("\'])')
+_WORD = re.compile(r"[a-z0-9()]+")
+
+_DAYS = re.compile(r'\b(\d{1,3})\s*(?:-\s*)?days?\b', re.IGNORECASE)
+_PERCENT = re.compile(r'\b(\d{1,3}(?:\.\d+)?)\s*(?:%|per\s?cent\b|percent\b)', re.IGNORECASE)
+_DATES = re.compile(
+    r'\b(?:\d{1,2}(?:st|nd|rd|th)?\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*,?\s+\d{4}'
+    r'|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}'
+    r'|\d{4}-\d{2}-\d{2}'
+    r'|\d{1,2}[/.-]\d{1,2}[/.-]\d{4})\b',
+    re.IGNORECASE
+)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split page text into sentences (cheap regex, no NLP dependency)"""
+    sentences = _SENTENCE_SPLIT.split(text)
+    return [s.strip() for s in sentences if 30 <= len(s.strip()) <= 600]
+
+
+def score_sentence(sentence: str, keywords: List[str], word_freq: Counter) -> float:
+    """Score sentence by keyword hits, numeric content and page-level word frequency"""
+    lower = sentence.lower()
+    words = _WORD.findall(lower)
+    if not words:
+        return 0.0
+
+    keyword_hits = sum(1 for kw in keywords if kw in lower)
+    numeric_bonus = 0.5 if (_DAYS.search(sentence) or _PERCENT.search(sentence)) else 0.0
+    # Frequent page terms indicate the page's main subject; normalise by length
+    # so long boilerplate sentences do not win on volume alone
+    freq_score = sum(word_freq[w] for w in set(words) if len(w) > 3) / (len(words) + 5)
+
+    return keyword_hits * 2.0 + numeric_bonus + freq_score * 0.1
+
+
+def summarize_text(text: str, keywords: Optional[List[str]] = None,
+                   max_sentences: int = 4, max_chars: int = 600) -> str:
+    """
+    Build an extractive summary from the highest scoring sentences
+
+    Args:
+        text: Full page text
+        keywords: Topic keywords to score against (defaults to all topics)
+        max_sentences: Maximum sentences kept
+        max_chars: Hard cap on summary length
+
+    Returns:
+        Selected sentences in original page order
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return text[:max_chars]
+
+    keywords = [kw.lower() for kw in (keywords or DEFAULT_KEYWORDS)]
+    word_freq = Counter(w for w in _WORD.findall(text.lower()) if len(w) > 3)
+
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: score_sentence(sentences[i], keywords, word_freq),
+        reverse=True
+    )
+
+    chosen = []
+    total = 0
+    for i in ranked:
+        if len(chosen) >= max_sentences:
+            break
+        if total + len(sentences[i]) > max_chars and chosen:
+            continue
+        chosen.append(i)
+        total += len(sentences[i]) + 1
+
+    summary = ' '.join(sentences[i] for i in sorted(chosen))
+    return summary[:max_chars]
+
+
+def extract_key_facts(text: str, max_per_type: int = 8) -> Dict[str, List[str]]:
+    """Pull numeric facts (day limits, percentages, dates) most frequent first"""
+    def top(matches):
+        return [value for value, _ in Counter(matches).most_common(max_per_type)]
+
+    return {
+        "days": top(f"{m} days" for m in _DAYS.findall(text)),
+        "percentages": top(f"{m}%" for m in _PERCENT.findall(text)),
+        "dates": top(m.strip() for m in _DATES.findall(text))
+    }
+
+
+def keywords_for_topics(topics: List[str]) -> List[str]:
+    """Merge keyword lists for the given topic names"""
+    merged = []
+    for topic in topics:
+        for kw in TOPIC_KEYWORDS.get(topic, []):
+            if kw not in merged:
+                merged.append(kw)
+    return merged or DEFAULT_KEYWORDS
+
+
+def compact_research_data(data):
+    """Drop raw page text from research data, keeping summaries and key facts"""
+    if isinstance(data, dict):
+        return {k: compact_research_data(v) for k, v in data.items() if k != "content"}
+    if isinstance(data, list):
+        return [compact_research_data(item) for item in data]
+    return data
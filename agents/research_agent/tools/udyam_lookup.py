@@ -0,0 +1,287 @@
+"""
+Udyam lookup - Bulk MSME verification against a local, indexed registry.
+
+Registrations are loaded from a bulk file (CSV / JSON / JSON Lines) into
+SQLite, keyed by Udyam number, and batch queries answer thousands of vendors
+in a handful of indexed lookups. Numbers missing from the local registry go
+to a pluggable remote lookup whose answers are cached with a TTL.
+
+Section 43B(h) only covers micro and small enterprises (not medium), and only
+while the registration is valid.
+"""
+import csv
+import json
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from lib.ledger_ingest import parse_date
+from lib.read_cache import TTLCache
+
+UDYAM_PATTERN = re.compile(r"^UDYAM-[A-Z]{2}-\d{2}-\d{7}$")
+SECTION_43BH_CLASSES = {"micro", "small"}
+SQLITE_MAX_PARAMS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS registrations (
+    udyam_number TEXT PRIMARY KEY,
+    enterprise_name TEXT,
+    classification TEXT,
+    valid_from TEXT,
+    valid_until TEXT,
+    status TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_registrations_class ON registrations (classification);
+"""
+
+_COLUMNS = ("udyam_number", "enterprise_name", "classification", "valid_from", "valid_until", "status")
+
+
+def normalize_udyam(number: str) -> str:
+    """Canonical form: upper case, no spaces, hyphen separated"""
+    text = re.sub(r"\s+", "", str(number or "")).upper()
+    return text.replace("_", "-")
+
+
+def is_valid_format(number: str) -> bool:
+    return bool(UDYAM_PATTERN.match(normalize_udyam(number)))
+
+
+def _iso_date(value) -> Optional[str]:
+    """YYYY-MM-DD for any date format the ledger importer accepts, None when empty (raises ValueError)"""
+    if value is None or not str(value).strip():
+        return None
+    return parse_date(value)[0]
+
+
+def stub_remote_lookup(udyam_number: str) -> Optional[Dict]:
+    """Stand-in for the Udyam portal: knows nothing, so unknowns stay unverified"""
+    return None
+
+
+class UdyamRegistry:
+    """Local Udyam registration index with batch lookups"""
+
+    def __init__(self, db_path: str = "udyam_registry.db",
+                 remote_lookup: Callable[[str], Optional[Dict]] = stub_remote_lookup,
+                 cache_ttl_seconds: float = 24 * 3600,
+                 cache_size: int = 50000,
+                 remote_workers: int = 4):
+        self.db_path = db_path
+        self.remote_lookup = remote_lookup
+        self.remote_workers = remote_workers
+        self.remote_cache = TTLCache(max_entries=cache_size, ttl_seconds=cache_ttl_seconds)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def _rows_from_file(self, path: str) -> Iterator[Dict]:
+        suffix = Path(path).suffix.lower()
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            if suffix == ".csv":
+                yield from csv.DictReader(f)
+            elif suffix in (".jsonl", ".ndjson"):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            elif suffix == ".json":
+                yield from json.load(f)
+            else:
+                raise ValueError(f"Unsupported registry file: {suffix} (use .csv, .json or .jsonl)")
+
+    def load_bulk_file(self, path: str, chunk_size: int = 5000) -> Dict:
+        """
+        Load (or refresh) registrations from a bulk export
+
+        Expected fields: udyam_number, enterprise_name, classification
+        (micro/small/medium), valid_from, valid_until (empty = open-ended), status.
+        Dates may be in any format the ledger importer reads; rows with a
+        malformed number or an unreadable date are rejected.
+
+        Returns:
+            Counts of loaded and rejected rows
+        """
+        loaded = 0
+        rejected = 0
+        batch = []
+        now = datetime.now().isoformat()
+
+        def flush():
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO registrations ({', '.join(_COLUMNS)}, updated_at) "
+                    f"VALUES ({', '.join('?' * (len(_COLUMNS) + 1))})",
+                    batch
+                )
+
+        for row in self._rows_from_file(path):
+            number = normalize_udyam(row.get("udyam_number"))
+            try:
+                if not UDYAM_PATTERN.match(number):
+                    raise ValueError(f"malformed Udyam number {number!r}")
+                valid_from = _iso_date(row.get("valid_from"))
+                valid_until = _iso_date(row.get("valid_until"))
+            except ValueError:
+                rejected += 1
+                continue
+            batch.append((
+                number,
+                (row.get("enterprise_name") or "").strip(),
+                (row.get("classification") or "").strip().lower(),
+                valid_from,
+                valid_until,
+                (row.get("status") or "active").strip().lower(),
+                now
+            ))
+            if len(batch) >= chunk_size:
+                flush()
+                loaded += len(batch)
+                batch = []
+
+        if batch:
+            flush()
+            loaded += len(batch)
+
+        self.remote_cache.clear()
+        return {"loaded": loaded, "rejected": rejected}
+
+    def _fetch_local(self, numbers: List[str]) -> Dict[str, Dict]:
+        found = {}
+        for start in range(0, len(numbers), SQLITE_MAX_PARAMS):
+            chunk = numbers[start:start + SQLITE_MAX_PARAMS]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(_COLUMNS)} FROM registrations "
+                    f"WHERE udyam_number IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+            for row in rows:
+                found[row[0]] = dict(zip(_COLUMNS, row))
+        return found
+
+    def _fetch_remote(self, numbers: List[str]) -> Dict[str, Optional[Dict]]:
+        results = {}
+        pending = []
+        missing = object()
+        for number in numbers:
+            cached = self.remote_cache.get(number, missing)
+            if cached is missing:
+                pending.append(number)
+            else:
+                results[number] = cached
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.remote_workers) as pool:
+                for number, record in zip(pending, pool.map(self._safe_remote, pending)):
+                    results[number] = record
+                    self.remote_cache.set(number, record)
+        return results
+
+    def _safe_remote(self, number: str) -> Optional[Dict]:
+        try:
+            return self.remote_lookup(number)
+        except Exception as e:
+            print(f"⚠️  Udyam remote lookup failed for {number}: {e}")
+            return None
+
+    @staticmethod
+    def _evaluate(record: Dict, as_of: date) -> Dict:
+        today = as_of.isoformat()
+        classification = (record.get("classification") or "").lower()
+        try:
+            # Stored dates are already ISO; remote answers may use any format
+            valid_from = _iso_date(record.get("valid_from"))
+            valid_until = _iso_date(record.get("valid_until"))
+            in_force = (not valid_from or valid_from <= today) and (not valid_until or valid_until >= today)
+        except ValueError:
+            in_force = False  # unreadable validity dates can't confirm the registration
+        valid = record.get("status", "active") == "active" and in_force
+        return dict(
+            record,
+            registered=True,
+            valid=valid,
+            section_43bh_applies=valid and classification in SECTION_43BH_CLASSES
+        )
+
+    def lookup_many(self, udyam_numbers: Iterable[str], as_of: Optional[date] = None,
+                    use_remote: bool = True) -> Dict[str, Dict]:
+        """
+        Verify many Udyam numbers at once
+
+        Returns:
+            {input_number: result} where result has registered, valid,
+            section_43bh_applies, source and the stored registration fields
+        """
+        as_of = as_of or date.today()
+        inputs = list(dict.fromkeys(udyam_numbers))
+        normalized = {n: normalize_udyam(n) for n in inputs}
+
+        well_formed = sorted({v for v in normalized.values() if UDYAM_PATTERN.match(v)})
+        local = self._fetch_local(well_formed)
+        unknown = [n for n in well_formed if n not in local]
+        remote = self._fetch_remote(unknown) if (use_remote and unknown) else {}
+
+        results = {}
+        for original, number in normalized.items():
+            if not UDYAM_PATTERN.match(number):
+                results[original] = {"udyam_number": number, "registered": False, "valid": False,
+                                     "section_43bh_applies": False, "source": "invalid_format"}
+            elif number in local:
+                results[original] = dict(self._evaluate(local[number], as_of), source="local")
+            elif remote.get(number):
+                record = dict(remote[number], udyam_number=number)
+                results[original] = dict(self._evaluate(record, as_of), source="remote")
+            else:
+                results[original] = {"udyam_number": number, "registered": False, "valid": False,
+                                     "section_43bh_applies": False, "source": "not_found"}
+        return results
+
+    def classify_ledger(self, invoices: List[Dict], as_of: Optional[date] = None) -> Dict:
+        """
+        Tag every invoice with its vendor's MSME status in one batch lookup
+
+        Invoices need a udyam_number field; ones without it are unverified.
+        """
+        numbers = [inv["udyam_number"] for inv in invoices if inv.get("udyam_number")]
+        status = self.lookup_many(numbers, as_of)
+
+        counts = {"covered_by_43bh": 0, "not_covered": 0, "unverified": 0}
+        covered_amount = 0.0
+        classified = []
+        for inv in invoices:
+            result = status.get(inv.get("udyam_number")) if inv.get("udyam_number") else None
+            if result is None or not result["registered"]:
+                counts["unverified"] += 1
+                label = "unverified"
+            elif result["section_43bh_applies"]:
+                counts["covered_by_43bh"] += 1
+                covered_amount += float(inv.get("amount", 0) or 0)
+                label = "covered_by_43bh"
+            else:
+                counts["not_covered"] += 1
+                label = "not_covered"
+            classified.append(dict(
+                inv,
+                msme_status=label,
+                msme_classification=(result or {}).get("classification")
+            ))
+
+        return {
+            "total_invoices": len(invoices),
+            **counts,
+            "covered_amount": round(covered_amount, 2),
+            "invoices": classified
+        }
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM registrations").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,26 +1,108 @@
 from google.adk.agents.llm_agent import Agent
 from datetime import datetime
+from .portfolio import score_ledger, merge_scores
+from .payment_optimizer import optimize_payments
+from .msme_interest import accrue_ledger_interest, interest_for_invoice
+from lib.ledger_ingest import iter_invoice_chunks
 
 
 def check_msme_payment_overdue(invoice_id: str, vendor_name: str, amount: float, invoice_date: str) -> dict:
     """Check if MSME payment violates Section 43B(h) 45-day rule"""
     days = (datetime.now() - datetime.strptime(invoice_date, '%Y-%m-%d')).days
     overdue_days = max(0, days - 45)
+    interest = interest_for_invoice(amount, invoice_date)
     
     return {
         "invoice_id": invoice_id,
         "risk_level": "HIGH" if overdue_days > 0 else "LOW",
         "overdue_days": overdue_days,
         "tax_penalty": amount * 0.35 if overdue_days > 0 else 0,
+        "msmed_interest": interest["interest"],
         "whatsapp_alert": f"🚨 Invoice #{invoice_id}\nPay {vendor_name} ₹{amount/1000:.0f}K\n{overdue_days} days OVERDUE!"
     }
 
+
+def check_portfolio_risk(invoices: list[dict], top_n: int = 10) -> dict:
+    """Score a whole invoice ledger for Section 43B(h) risk in one call.
+    Each invoice needs invoice_id, vendor_name, amount and invoice_date (YYYY-MM-DD).
+    Returns portfolio totals and the top_n riskiest invoices."""
+    result = score_ledger(invoices, top_n=top_n)
+    result["whatsapp_alert"] = (
+        f"🚨 {result['high_risk_count']} MSME invoices OVERDUE\n"
+        f"₹{result['overdue_amount']/1000:.0f}K unpaid, ₹{result['total_tax_penalty']/1000:.0f}K deduction at risk"
+    ) if result["high_risk_count"] else "✅ No MSME invoices past the 45-day limit"
+    return result
+
+
+def analyze_ledger_file(file_path: str, top_n: int = 10) -> dict:
+    """Stream a CSV/XLSX accounting export (Tally, ERP) and score every invoice
+    for Section 43B(h) risk. Returns portfolio totals, the top_n riskiest
+    invoices and an import report (rows read, duplicates, invalid and already
+    paid rows). Paid invoices are not scored."""
+    stats = {}
+    paid = 0
+    chunk_results = []
+    for chunk in iter_invoice_chunks(file_path, chunk_size=5000, stats=stats):
+        unpaid = [inv for inv in chunk if not inv.get("paid")]
+        paid += len(chunk) - len(unpaid)
+        chunk_results.append(score_ledger(unpaid, top_n=top_n))
+    result = merge_scores(chunk_results, top_n)
+    result["import_report"] = {
+        "rows_read": stats.get("rows_read", 0),
+        "duplicates": stats.get("duplicates", 0),
+        "invalid": stats.get("invalid", 0),
+        "paid": paid,
+        "errors": stats.get("errors", [])[:10]
+    }
+    return result
+
+
+def optimize_payment_plan(invoices: list[dict], weekly_budget: float, weeks: int = 4,
+                          cash_on_hand: float = 0.0) -> dict:
+    """Plan which open MSME invoices to pay each week with a limited cash budget,
+    so the least Section 43B(h) deduction is lost. Each invoice needs invoice_id,
+    vendor_name, amount and invoice_date (YYYY-MM-DD), optionally deadline_days.
+    Unspent budget carries over to the next week. Returns the weekly plan,
+    deductions preserved vs lost, and invoices already overdue."""
+    if weekly_budget < 0 or weeks < 1:
+        return {"error": "weekly_budget must be >= 0 and weeks >= 1"}
+    result = optimize_payments(invoices, weekly_budget, weeks, cash_on_hand)
+    first_week = result["plan"][0]
+    result["whatsapp_alert"] = (
+        f"💰 Pay {first_week['invoice_count']} MSME invoices this week "
+        f"(₹{first_week['spend']/1000:.0f}K)\n"
+        f"₹{result['deductions_preserved']/1000:.0f}K deduction saved, "
+        f"₹{result['deductions_lost']/1000:.0f}K lost to cash shortfall"
+    )
+    return result
+
+
+def calculate_msme_interest(invoices: list[dict], top_n: int = 10) -> dict:
+    """Compute MSMED Act Section 16 interest (3x RBI bank rate, compounded monthly)
+    owed on late MSME payments across a whole ledger. Each invoice needs invoice_id,
+    vendor_name, amount and invoice_date (YYYY-MM-DD); optional deadline_days and
+    paid_date (for invoices already paid late). Returns total interest and the
+    top_n invoices by interest."""
+    result = accrue_ledger_interest(invoices, top_n=top_n)
+    result["whatsapp_alert"] = (
+        f"📈 {result['late_count']} late MSME invoices\n"
+        f"₹{result['total_interest']/1000:.1f}K MSMED interest accrued (not tax deductible)"
+    ) if result["late_count"] else "✅ No MSMED Act interest accrued"
+    return result
+
+
 root_agent = Agent(
     model='gemini-2.5-flash',
     name='risk_agent',
-    tools=[check_mjsme_payment_overdue],
+    tools=[check_msme_payment_overdue, check_portfolio_risk, analyze_ledger_file, optimize_payment_plan,
+           calculate_msme_interest],
     description='A helpful assistant for user questions.',
     instruction="""MSME Payment Alert Agent. Indian tax law Section 43B(h): 
     Companies must pay MSMEs within 45 days or lose tax deduction.
-    Analyze invoices → Flag overdue → Generate alert notifications."""
+    Analyze invoices → Flag overdue → Generate alert notifications.
+    For more than one invoice, call check_portfolio_risk once with the whole list
+    instead of calling check_msme_payment_overdue per invoice.
+    For an accounting export file (CSV/XLSX), call analyze_ledger_file with its path.
+    When asked what to pay with a limited budget, call optimize_payment_plan.
+    For interest owed to MSMEs on late payments (MSMED Act Section 16), call calculate_msme_interest."""
 )
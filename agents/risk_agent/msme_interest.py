@@ -0,0 +1,176 @@
+"""
+MSMED Act interest - Section 16 interest on delayed MSME payments.
+
+A buyer who pays an MSME supplier after the due date (Section 15: the agreed
+period, at most 45 days) owes compound interest with monthly rests at three
+times the bank rate notified by the RBI, from the day after the due date until
+payment. Under Section 23 that interest is not deductible.
+
+The bank rate in force on the day after the due date applies to the whole
+delay. Rates live in a date-indexed table: single lookups use bisect, ledgers
+use np.searchsorted over the same table in one vectorized pass. A final
+partial month is pro-rated (simple interest for the fraction).
+"""
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .portfolio import DEFAULT_DEADLINE_DAYS, parse_dates
+
+RATE_MULTIPLIER = 3
+DAYS_PER_MONTH = 365 / 12
+
+# RBI Bank Rate (aligned to the MSF rate), effective date -> % p.a.
+# Append new rows when the RBI changes the rate.
+BANK_RATE_HISTORY = [
+    ("2019-02-07", 6.50),
+    ("2019-04-04", 6.25),
+    ("2019-06-06", 6.00),
+    ("2019-08-07", 5.65),
+    ("2019-10-04", 5.40),
+    ("2020-03-27", 4.65),
+    ("2020-05-22", 4.25),
+    ("2022-05-04", 4.65),
+    ("2022-06-08", 5.15),
+    ("2022-08-05", 5.65),
+    ("2022-09-30", 6.15),
+    ("2022-12-07", 6.50),
+    ("2023-02-08", 6.75),
+    ("2025-02-07", 6.50),
+    ("2025-04-09", 6.25),
+    ("2025-06-06", 5.75),
+]
+
+
+class BankRateTable:
+    """Bank rate history sorted by effective date"""
+
+    def __init__(self, history: Iterable[Tuple[str, float]] = BANK_RATE_HISTORY):
+        rows = sorted((str(d)[:10], float(r)) for d, r in history)
+        if not rows:
+            raise ValueError("Bank rate table is empty")
+        self.dates = [d for d, _ in rows]
+        self.rates = [r for _, r in rows]
+        self._np_dates = np.array(self.dates, dtype="datetime64[D]")
+        self._np_rates = np.array(self.rates, dtype=np.float64)
+
+    def rate_on(self, day) -> float:
+        """Bank rate (% p.a.) in force on `day`; the earliest rate before the table starts"""
+        pos = bisect_right(self.dates, str(day)[:10]) - 1
+        return self.rates[max(pos, 0)]
+
+    def rates_on(self, days: np.ndarray) -> np.ndarray:
+        """Vectorized rate_on for a datetime64[D] array"""
+        pos = np.searchsorted(self._np_dates, days, side="right") - 1
+        return self._np_rates[np.maximum(pos, 0)]
+
+
+DEFAULT_RATES = BankRateTable()
+
+
+def compound_interest(principal, annual_rate, days_late):
+    """
+    Interest with monthly rests; the final partial month is pro-rated
+
+    Works on scalars or NumPy arrays (annual_rate as a fraction, e.g. 0.1725).
+    """
+    monthly = np.asarray(annual_rate) / 12
+    months = np.maximum(np.asarray(days_late, dtype=np.float64), 0) / DAYS_PER_MONTH
+    full = np.floor(months)
+    return np.asarray(principal) * ((1 + monthly) ** full * (1 + monthly * (months - full)) - 1)
+
+
+def interest_for_invoice(amount: float, invoice_date: str, deadline_days: int = DEFAULT_DEADLINE_DAYS,
+                         paid_date: Optional[str] = None, as_of: Optional[datetime] = None,
+                         rates: BankRateTable = DEFAULT_RATES) -> Dict:
+    """Section 16 interest owed on one invoice (until paid_date, else as_of/today)"""
+    due = date.fromisoformat(str(invoice_date)[:10]) + timedelta(days=deadline_days)
+    end = date.fromisoformat(str(paid_date)[:10]) if paid_date else (as_of or datetime.now()).date()
+    days_late = max(0, (end - due).days)
+    bank_rate = rates.rate_on(due + timedelta(days=1))
+    annual = RATE_MULTIPLIER * bank_rate / 100
+
+    return {
+        "due_date": due.isoformat(),
+        "days_late": days_late,
+        "bank_rate": bank_rate,
+        "interest_rate": round(annual * 100, 2),
+        "interest": round(float(compound_interest(amount, annual, days_late)), 2)
+    }
+
+
+def accrue_ledger_interest(invoices: List[Dict], top_n: int = 10, as_of: Optional[datetime] = None,
+                           rates: BankRateTable = DEFAULT_RATES) -> Dict:
+    """
+    Section 16 interest across a whole ledger in one vectorized pass
+
+    Args:
+        invoices: Dicts with invoice_id, vendor_name (or client_name), amount,
+                  invoice_date, optional deadline_days, and optional paid_date
+                  (interest stops there; paid invoices without one are skipped)
+        top_n: How many invoices with the most interest to return
+        as_of: Accrual date for unpaid invoices (today by default)
+
+    Returns:
+        Totals plus the top-N invoices by accrued interest
+    """
+    n = len(invoices)
+    if n == 0:
+        return {"total_invoices": 0, "late_count": 0, "late_principal": 0.0,
+                "total_interest": 0.0, "top_interest": []}
+
+    today = np.datetime64((as_of or datetime.now()).date(), "D")
+    dates = parse_dates([inv.get("invoice_date") or inv.get("invoice_datetime") for inv in invoices])
+    amounts = np.fromiter((float(inv.get("amount", 0) or 0) for inv in invoices), dtype=np.float64, count=n)
+    terms = np.fromiter((int(inv.get("deadline_days", DEFAULT_DEADLINE_DAYS)) for inv in invoices),
+                        dtype=np.int64, count=n)
+    paid_dates = parse_dates([inv.get("paid_date") for inv in invoices])
+    settled_unknown = np.fromiter((bool(inv.get("paid")) and not inv.get("paid_date") for inv in invoices),
+                                  dtype=bool, count=n)
+
+    valid = ~np.isnat(dates) & ~settled_unknown
+    due = dates + terms.astype("timedelta64[D]")
+    end = np.where(np.isnat(paid_dates), today, paid_dates)
+    days_late = np.where(valid, (end - due).astype("timedelta64[D]").astype(np.int64), 0)
+    late = valid & (days_late > 0)
+
+    safe_due = np.where(valid, due, today)
+    annual = RATE_MULTIPLIER * rates.rates_on(safe_due + np.timedelta64(1, "D")) / 100
+    interest = np.where(late, compound_interest(amounts, annual, days_late), 0.0)
+
+    k = min(top_n, n)
+    if k > 0:
+        candidates = np.argpartition(-interest, k - 1)[:k]
+        top = candidates[np.lexsort((-days_late[candidates], -interest[candidates]))]
+    else:
+        top = np.array([], dtype=np.int64)
+
+    top_interest = []
+    for i in top:
+        if not late[i]:
+            break
+        inv = invoices[i]
+        top_interest.append({
+            "invoice_id": inv.get("invoice_id"),
+            "vendor_name": inv.get("vendor_name") or inv.get("client_name"),
+            "amount": float(amounts[i]),
+            "due_date": str(due[i]),
+            "days_late": int(days_late[i]),
+            "interest_rate": round(float(annual[i]) * 100, 2),
+            "interest": round(float(interest[i]), 2)
+        })
+
+    late_principal = float(amounts[late].sum())
+    total_interest = float(interest.sum())
+    return {
+        "total_invoices": n,
+        "late_count": int(late.sum()),
+        "late_principal": round(late_principal, 2),
+        "total_interest": round(total_interest, 2),
+        "interest_to_principal_pct": round(100 * total_interest / late_principal, 2) if late_principal else 0.0,
+        "max_days_late": int(days_late.max()),
+        "top_interest": top_interest,
+        "note": "Section 23 MSMED Act: this interest is not deductible for income tax"
+    }
@@ -0,0 +1,205 @@
+"""
+Payment optimizer - Chooses which open MSME invoices to pay, week by week,
+under a cash budget so that the least Section 43B(h) deduction is lost.
+
+Every rupee paid on time preserves TAX_RATE of it as a deduction, so the goal
+is to maximize the amount paid by each invoice's deadline subject to cash:
+everything due by the end of week t must fit in the cash available by then
+(opening cash + t+1 weekly budgets; unspent cash carries over).
+
+Greedy solver, O(n log n):
+    1. Walk the weeks in deadline order, admitting every invoice due that week.
+    2. If the admitted total exceeds the cash available, drop the cheapest set
+       of invoices found that covers the shortfall (largest-below-shortfall
+       first, or one invoice that covers the rest). Dropped invoices are the
+       ones whose deduction is given up.
+    3. Refill: retry dropped invoices (largest first) wherever the later weeks
+       still have slack.
+    4. Schedule chosen invoices earliest-deadline-first into the first week
+       with enough cash.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .portfolio import DEFAULT_DEADLINE_DAYS, TAX_RATE, parse_dates, score_arrays
+
+
+def _evict(chosen: np.ndarray, amounts: np.ndarray, overflow: int) -> List[int]:
+    """
+    Indices to drop from `chosen` so its total falls by at least `overflow`,
+    giving up as little as possible
+
+    Two candidates are priced and the cheaper one returned:
+        - walk down the largest invoices below the remaining shortfall, at each
+          step pricing "finish with the smallest invoice that covers the rest"
+        - drop the smallest invoices until the shortfall is covered (the
+          refill pass later restores whichever of them still fit)
+    """
+    by_amount = chosen[np.argsort(amounts[chosen], kind="stable")]
+    sorted_amounts = amounts[by_amount]
+    taken = []
+    taken_set = set()
+    taken_cost = 0
+    best_cost, best = None, []
+    remaining = overflow
+    lowest_taken = len(by_amount)  # shortfall only shrinks, so picks move down
+
+    while remaining > 0:
+        pos = int(np.searchsorted(sorted_amounts, remaining, side="left"))
+        cover = pos
+        while cover in taken_set:
+            cover += 1
+        if cover < len(by_amount):
+            cost = taken_cost + int(sorted_amounts[cover])
+            if best_cost is None or cost < best_cost:
+                best_cost, best = cost, taken + [cover]
+
+        # Otherwise drop the largest invoice still below the shortfall
+        below = min(pos, lowest_taken) - 1
+        if below < 0:
+            break
+        lowest_taken = below
+        taken.append(below)
+        taken_set.add(below)
+        taken_cost += int(sorted_amounts[below])
+        remaining -= int(sorted_amounts[below])
+
+    if remaining <= 0 and (best_cost is None or taken_cost < best_cost):
+        best_cost, best = taken_cost, taken
+
+    smallest_first = np.cumsum(sorted_amounts)
+    count = int(np.searchsorted(smallest_first, overflow, side="left")) + 1
+    if count <= len(by_amount) and (best_cost is None or int(smallest_first[count - 1]) < best_cost):
+        return [int(i) for i in by_amount[:count]]
+    return [int(by_amount[i]) for i in best]
+
+
+def optimize_payments(invoices: List[Dict], weekly_budget: float, weeks: int = 4,
+                      cash_on_hand: float = 0.0, as_of: Optional[datetime] = None,
+                      max_listed: int = 50) -> Dict:
+    """
+    Build a payment plan for the next `weeks` weeks
+
+    Args:
+        invoices: Dicts with invoice_id, vendor_name (or client_name), amount,
+                  invoice_date, optional deadline_days and paid (paid
+                  invoices are left out of the plan)
+        weekly_budget: Cash available for MSME payments each week
+        weeks: Planning horizon in weeks
+        cash_on_hand: Extra cash available from week 1
+        as_of: Planning date (today by default)
+        max_listed: Invoices listed per week / per group in the response
+
+    Returns:
+        Weekly plan (spend and invoices to pay), deductions preserved and lost,
+        plus already-overdue and beyond-horizon invoices
+    """
+    as_of = as_of or datetime.now()
+    today = as_of.date()
+    n = len(invoices)
+
+    dates = parse_dates([inv.get("invoice_date") or inv.get("invoice_datetime") for inv in invoices])
+    amounts = np.fromiter((float(inv.get("amount", 0) or 0) for inv in invoices), dtype=np.float64, count=n)
+    terms = np.fromiter((int(inv.get("deadline_days", DEFAULT_DEADLINE_DAYS)) for inv in invoices),
+                        dtype=np.int64, count=n)
+    paise = np.round(amounts * 100).astype(np.int64)
+    paid = np.fromiter((bool(inv.get("paid", False)) for inv in invoices), dtype=bool, count=n)
+
+    scores = score_arrays(dates, amounts, terms, as_of, paid)
+    days_left = scores["days_to_deadline"]
+    valid = scores["valid"] & (paise > 0)
+    overdue = valid & (days_left < 0)
+    in_horizon = valid & (days_left >= 0) & (days_left < weeks * 7)
+    beyond = valid & (days_left >= weeks * 7)
+    due_week = np.where(in_horizon, days_left // 7, -1)
+
+    # Cash available by the end of each week (unspent cash carries over)
+    caps = [int(round((cash_on_hand + weekly_budget * (t + 1)) * 100)) for t in range(weeks)]
+
+    # 1-2. Admit week by week, evicting on overflow
+    chosen = np.zeros(n, dtype=bool)
+    total = 0
+    for t in range(weeks):
+        week_items = in_horizon & (due_week == t)
+        chosen |= week_items
+        total += int(paise[week_items].sum())
+        if total > caps[t]:
+            for i in _evict(np.flatnonzero(chosen), paise, total - caps[t]):
+                chosen[i] = False
+                total -= int(paise[i])
+
+    # 3. Refill dropped invoices where every week from their deadline on has slack
+    spent_by = np.cumsum(np.bincount(due_week[chosen], weights=paise[chosen], minlength=weeks)[:weeks])
+    slack = [caps[t] - int(spent_by[t]) for t in range(weeks)]
+    dropped = np.flatnonzero(in_horizon & ~chosen)
+    for i in dropped[np.argsort(-paise[dropped], kind="stable")]:
+        w, amount = int(due_week[i]), int(paise[i])
+        if amount <= min(slack[w:]):
+            chosen[i] = True
+            for t in range(w, weeks):
+                slack[t] -= amount
+
+    # 4. Earliest deadline first into the first week with enough cash
+    plan_idx = np.flatnonzero(chosen)
+    plan_idx = plan_idx[np.lexsort((paise[plan_idx], days_left[plan_idx]))]
+    pay_week = np.searchsorted(np.array(caps, dtype=np.int64), np.cumsum(paise[plan_idx]), side="left")
+
+    def describe(i) -> Dict:
+        inv = invoices[i]
+        return {
+            "invoice_id": inv.get("invoice_id"),
+            "vendor_name": inv.get("vendor_name") or inv.get("client_name"),
+            "amount": float(amounts[i]),
+            "deadline": (today + timedelta(days=int(days_left[i]))).isoformat(),
+            "days_to_deadline": int(days_left[i]),
+            "deduction_at_stake": round(float(amounts[i]) * TAX_RATE, 2)
+        }
+
+    plan = []
+    for t in range(weeks):
+        in_week = plan_idx[pay_week == t]
+        spend = float(paise[in_week].sum()) / 100
+        plan.append({
+            "week": t + 1,
+            "start": (today + timedelta(days=7 * t)).isoformat(),
+            "end": (today + timedelta(days=7 * t + 6)).isoformat(),
+            "invoice_count": int(len(in_week)),
+            "spend": round(spend, 2),
+            "invoices": [describe(i) for i in in_week[:max_listed]]
+        })
+
+    unfunded = np.flatnonzero(in_horizon & ~chosen)
+    unfunded = unfunded[np.argsort(-paise[unfunded], kind="stable")]
+    overdue_idx = np.flatnonzero(overdue)
+    paid_amount = float(paise[chosen].sum()) / 100
+    unfunded_amount = float(paise[unfunded].sum()) / 100
+
+    return {
+        "as_of": today.isoformat(),
+        "weeks": weeks,
+        "weekly_budget": weekly_budget,
+        "cash_on_hand": cash_on_hand,
+        "total_invoices": n,
+        "due_in_horizon": int(in_horizon.sum()),
+        "scheduled_count": int(chosen.sum()),
+        "scheduled_amount": round(paid_amount, 2),
+        "deductions_preserved": round(paid_amount * TAX_RATE, 2),
+        "unfunded_count": int(len(unfunded)),
+        "unfunded_amount": round(unfunded_amount, 2),
+        "deductions_lost": round(unfunded_amount * TAX_RATE, 2),
+        "plan": plan,
+        "unfunded": [describe(i) for i in unfunded[:max_listed]],
+        "already_overdue": {
+            "count": int(len(overdue_idx)),
+            "amount": round(float(amounts[overdue_idx].sum()), 2),
+            "deduction_lost": round(float(amounts[overdue_idx].sum()) * TAX_RATE, 2)
+        },
+        "beyond_horizon": {
+            "count": int(beyond.sum()),
+            "amount": round(float(amounts[beyond].sum()), 2)
+        },
+        "paid_count": int(paid.sum()),
+        "invalid_count": int(n - paid.sum() - valid.sum())
+    }
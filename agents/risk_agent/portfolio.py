@@ -0,0 +1,200 @@
+"""
+Portfolio risk scoring - Scores a whole invoice ledger against Section 43B(h)
+in one vectorized NumPy pass (same rules as check_msme_payment_overdue).
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from lib.ledger_ingest import parse_amount
+
+DEFAULT_DEADLINE_DAYS = 45
+TAX_RATE = 0.35  # Corporate tax lost on disallowed (unpaid) amounts
+DUE_SOON_DAYS = 7
+
+
+def parse_dates(values: List[str]) -> np.ndarray:
+    """Parse ISO dates/datetimes to datetime64[D]; unparseable values become NaT"""
+    days = [str(v)[:10] if v else "NaT" for v in values]
+    try:
+        return np.array(days, dtype="datetime64[D]")
+    except ValueError:
+        parsed = np.empty(len(days), dtype="datetime64[D]")
+        for i, value in enumerate(days):
+            try:
+                parsed[i] = np.datetime64(value, "D")
+            except ValueError:
+                parsed[i] = np.datetime64("NaT")
+        return parsed
+
+
+def parse_amounts(values: List) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse ledger amounts ("1,20,000", "Rs. 5,000 Dr", plain numbers)
+
+    Returns:
+        Tuple of (float64 amounts, mask of missing or unreadable ones, left at 0)
+    """
+    amounts = np.zeros(len(values), dtype=np.float64)
+    unreadable = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(values):
+        try:
+            amounts[i] = parse_amount(value)
+        except (TypeError, ValueError):
+            unreadable[i] = True
+    return amounts, unreadable
+
+
+def parse_terms(values: List) -> np.ndarray:
+    """Payment terms in days; missing or unreadable terms fall back to the 45-day default"""
+    def term(value):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError, OverflowError):
+            return DEFAULT_DEADLINE_DAYS
+    return np.fromiter((term(v) for v in values), dtype=np.int64, count=len(values))
+
+
+def score_arrays(invoice_dates: np.ndarray, amounts: np.ndarray,
+                 deadline_days: Optional[np.ndarray] = None,
+                 as_of: Optional[datetime] = None,
+                 paid: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Core vectorized scoring over columnar arrays
+
+    Args:
+        invoice_dates: datetime64[D] invoice dates
+        amounts: Invoice amounts
+        deadline_days: Per-invoice payment terms (45 by default)
+        as_of: Scoring date (today by default)
+        paid: Boolean mask of settled invoices, which carry no risk
+
+    Returns:
+        Dict of arrays: days_outstanding, overdue_days, days_to_deadline,
+        is_high_risk, tax_penalty, valid (a parseable date and still unpaid)
+    """
+    today = np.datetime64((as_of or datetime.now()).date(), "D")
+    if deadline_days is None:
+        deadline_days = np.full(len(amounts), DEFAULT_DEADLINE_DAYS, dtype=np.int64)
+
+    valid = ~np.isnat(invoice_dates)
+    if paid is not None:
+        valid &= ~paid
+    days_outstanding = np.where(valid, (today - invoice_dates).astype("timedelta64[D]").astype(np.int64), 0)
+    overdue_days = np.maximum(0, days_outstanding - deadline_days)
+    is_high_risk = valid & (overdue_days > 0)
+
+    return {
+        "days_outstanding": days_outstanding,
+        "overdue_days": overdue_days,
+        "days_to_deadline": deadline_days - days_outstanding,
+        "is_high_risk": is_high_risk,
+        "tax_penalty": np.where(is_high_risk, amounts * TAX_RATE, 0.0),
+        "valid": valid
+    }
+
+
+def score_ledger(invoices: List[Dict], top_n: int = 10,
+                 as_of: Optional[datetime] = None) -> Dict:
+    """
+    Score every invoice in a ledger and summarize portfolio exposure
+
+    Args:
+        invoices: Dicts with invoice_id, vendor_name (or client_name), amount,
+                  invoice_date (or invoice_datetime), optional deadline_days
+                  and paid (paid invoices are counted, never scored)
+        top_n: How many of the riskiest invoices to return
+        as_of: Scoring date (today by default)
+
+    Returns:
+        Portfolio totals plus the top-N invoices by tax penalty, then overdue days.
+        Rows with an unreadable date or amount are counted (invalid_dates /
+        invalid_amounts) but not scored; total_amount covers unpaid invoices.
+    """
+    n = len(invoices)
+    if n == 0:
+        return {"total_invoices": 0, "paid_count": 0, "high_risk_count": 0, "overdue_amount": 0.0,
+                "total_tax_penalty": 0.0, "top_risks": []}
+
+    dates = parse_dates([inv.get("invoice_date") or inv.get("invoice_datetime") for inv in invoices])
+    amounts, bad_amounts = parse_amounts([inv.get("amount") for inv in invoices])
+    terms = parse_terms([inv.get("deadline_days") for inv in invoices])
+    paid = np.fromiter((bool(inv.get("paid", False)) for inv in invoices), dtype=bool, count=n)
+    bad_dates = np.isnat(dates) & ~paid
+    bad_amounts &= ~paid & ~bad_dates
+
+    # Rows without a usable amount are left out like rows without a usable date
+    scores = score_arrays(np.where(bad_amounts, np.datetime64("NaT", "D"), dates), amounts, terms, as_of, paid)
+    high = scores["is_high_risk"]
+    overdue = np.where(scores["valid"], scores["overdue_days"], 0)
+    penalty = scores["tax_penalty"]
+    due_soon = scores["valid"] & ~high & (scores["days_to_deadline"] <= DUE_SOON_DAYS)
+
+    # Top-N without sorting the whole ledger: partition, then order the slice
+    k = min(top_n, n)
+    if k > 0:
+        candidates = np.argpartition(-penalty, k - 1)[:k]
+        # Highest penalty first, ties broken by days overdue
+        top = candidates[np.lexsort((-overdue[candidates], -penalty[candidates]))]
+    else:
+        top = np.array([], dtype=np.int64)
+
+    top_risks = []
+    for i in top:
+        if not high[i]:
+            break
+        inv = invoices[i]
+        top_risks.append({
+            "invoice_id": inv.get("invoice_id"),
+            "vendor_name": inv.get("vendor_name") or inv.get("client_name"),
+            "amount": float(amounts[i]),
+            "overdue_days": int(overdue[i]),
+            "risk_level": "HIGH",
+            "tax_penalty": round(float(penalty[i]), 2)
+        })
+
+    return {
+        "total_invoices": n,
+        "paid_count": int(paid.sum()),
+        "invalid_dates": int(bad_dates.sum()),
+        "invalid_amounts": int(bad_amounts.sum()),
+        "high_risk_count": int(high.sum()),
+        "low_risk_count": int((scores["valid"] & ~high).sum()),
+        "due_within_7_days": int(due_soon.sum()),
+        "total_amount": round(float(amounts[~paid].sum()), 2),
+        "overdue_amount": round(float(amounts[high].sum()), 2),
+        "total_tax_penalty": round(float(penalty.sum()), 2),
+        "max_overdue_days": int(overdue.max()),
+        "avg_overdue_days": round(float(overdue[high].mean()), 1) if high.any() else 0.0,
+        "top_risks": top_risks
+    }
+
+
+def merge_scores(results: List[Dict], top_n: int = 10) -> Dict:
+    """Combine score_ledger results from separate chunks of one ledger"""
+    results = [r for r in results if r.get("total_invoices")]
+    if not results:
+        return score_ledger([], top_n)
+
+    high = sum(r["high_risk_count"] for r in results)
+    top = sorted((t for r in results for t in r["top_risks"]),
+                 key=lambda t: (t["tax_penalty"], t["overdue_days"]), reverse=True)
+
+    return {
+        "total_invoices": sum(r["total_invoices"] for r in results),
+        "paid_count": sum(r["paid_count"] for r in results),
+        "invalid_dates": sum(r["invalid_dates"] for r in results),
+        "invalid_amounts": sum(r["invalid_amounts"] for r in results),
+        "high_risk_count": high,
+        "low_risk_count": sum(r["low_risk_count"] for r in results),
+        "due_within_7_days": sum(r["due_within_7_days"] for r in results),
+        "total_amount": round(sum(r["total_amount"] for r in results), 2),
+        "overdue_amount": round(sum(r["overdue_amount"] for r in results), 2),
+        "total_tax_penalty": round(sum(r["total_tax_penalty"] for r in results), 2),
+        "max_overdue_days": max(r["max_overdue_days"] for r in results),
+        "avg_overdue_days": round(
+            sum(r["avg_overdue_days"] * r["high_risk_count"] for r in results) / high, 1
+        ) if high else 0.0,
+        "top_risks": top[:top_n]
+    }
@@ -1,20 +1,195 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+"""
+Firebase configuration - The storage client is created lazily on first use,
+from environment settings, and shared by every agent in the process.
 
-# Initialize Firebase (only once)
-if not firebase_admin._apps:
-    cred = credentials.Certificate("/home/yuvaraj/hackathon-project/Hackathon-project/serviceAccountKey.json")
-    firebase_admin.initialize_app(cred)
+Storage backends implement the Firestore client surface the agents use
+(collection/document/add/get/set/update, where/order_by/limit/stream, batch):
+    firestore  Google Cloud Firestore (default)
+    sqlite     Local file via lib.sqlite_store.SQLiteClient, for tests,
+               benchmarks and offline runs
+
+Environment:
+    STORAGE_BACKEND       "firestore" (default) or "sqlite"
+    SQLITE_DB_PATH        SQLite file for the sqlite backend (default local_store.db)
+    FIREBASE_CREDENTIALS  Path to a service account JSON key. When unset,
+                          GOOGLE_APPLICATION_CREDENTIALS / application default
+                          credentials are used.
+    FIREBASE_PROJECT_ID   Optional project ID override.
+    FIRESTORE_CACHE_TTL   Seconds reads stay cached (default 300)
+    FIRESTORE_CACHE_ENTRIES  Max cached reads before LRU eviction (default 1024)
+"""
+import os
+import threading
+
+from lib.read_cache import TTLCache
+
+_db = None
+_db_lock = threading.Lock()
+
+# Read-through cache for get_*_from_firestore (cleared per collection on every write)
+read_cache = TTLCache(
+    max_entries=int(os.getenv("FIRESTORE_CACHE_ENTRIES", 1024)),
+    ttl_seconds=float(os.getenv("FIRESTORE_CACHE_TTL", 300))
+)
+
+
+def _create_client():
+    """Build the client for the configured storage backend"""
+    backend = os.getenv("STORAGE_BACKEND", "firestore").lower()
+    if backend == "sqlite":
+        from lib.sqlite_store import SQLiteClient
+        return SQLiteClient(os.getenv("SQLITE_DB_PATH", "local_store.db"))
+    if backend != "firestore":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend!r} (use 'firestore' or 'sqlite')")
+    return _create_firestore_client()
+
+
+def _create_firestore_client():
+    """Initialize the Firebase app (only once) and return a Firestore client"""
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        key_path = os.getenv("FIREBASE_CREDENTIALS")
+        cred = credentials.Certificate(key_path) if key_path else credentials.ApplicationDefault()
+        options = {}
+        if os.getenv("FIREBASE_PROJECT_ID"):
+            options["projectId"] = os.getenv("FIREBASE_PROJECT_ID")
+        firebase_admin.initialize_app(cred, options or None)
+
+    return firestore.client()
+
+
+def get_db():
+    """Return the shared Firestore client, creating it on first call (thread-safe)"""
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = _create_client()
+    return _db
+
+
+def set_db(client):
+    """Inject an alternative client (SQLiteClient, emulator, test double); None resets to lazy init"""
+    global _db
+    with _db_lock:
+        _db = client
+        read_cache.clear()
+
+
+def __getattr__(name):
+    # Backwards compatibility: `firebase_config.db` still works, but lazily
+    if name == "db":
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Firestore database client
-db = firestore.client()
 
 def save_to_firestore(collection: str, data: dict):
     """Save data to Firestore collection"""
-    doc_ref = db.collection(collection).add(data)
+    doc_ref = get_db().collection(collection).add(data)
+    invalidate_collection(collection)
     return doc_ref[1].id
 
-def get_from_firestore(collection: str, limit=10):
-    """Read data from Firestore collection"""
-    docs = db.collection(collection).limit(limit).stream()
-    return [doc.to_dict() for doc in docs]
+
+def invalidate_collection(collection: str):
+    """Drop cached reads of a collection (call after writing to it outside save_to_firestore)"""
+    read_cache.invalidate(lambda key: key[1] == collection)
+
+
+def _project(data: dict, fields) -> dict:
+    """Apply field selection locally (the backend may ignore select())"""
+    if not fields:
+        return data
+    return {f: data[f] for f in fields if f in data}
+
+
+def get_from_firestore(collection: str, limit=10, fields: list = None,
+                       order_by: str = None, use_cache: bool = True):
+    """Read data from Firestore collection (only `fields` when given)"""
+    return [
+        {k: v for k, v in doc.items() if k != "_id"}
+        for doc in get_page_from_firestore(collection, limit, fields, order_by,
+                                           use_cache=use_cache)["documents"]
+    ]
+
+
+def get_page_from_firestore(collection: str, page_size: int = 10, fields: list = None,
+                            order_by: str = None, descending: bool = False,
+                            cursor: str = None, use_cache: bool = True) -> dict:
+    """
+    Read one page of a collection with cursor-based pagination
+
+    Args:
+        collection: Collection name
+        page_size: Documents per page
+        fields: Only transfer these top-level fields (projection)
+        order_by: Field to sort by (document ID order when None); like
+            Firestore, documents without the field are not returned
+        descending: Sort direction for order_by
+        cursor: next_cursor from the previous page (a document ID)
+        use_cache: Serve repeated reads from the in-process cache
+
+    Returns:
+        {"documents": [... each with "_id" ...], "next_cursor": str or None}
+    """
+    key = ("page", collection, page_size, tuple(fields or ()), order_by, descending, cursor)
+
+    def load():
+        db = get_db()
+        col = db.collection(collection)
+        query = col
+        if order_by:
+            query = query.order_by(order_by, direction="DESCENDING" if descending else "ASCENDING")
+        # Explicit ID tie-break: the SQLite backend's unordered default is
+        # insertion order, so pages only match Firestore's with it
+        query = query.order_by("__name__")
+        if fields:
+            query = query.select(list(fields))
+        if cursor:
+            last = col.document(cursor).get()
+            if not last.exists:
+                raise ValueError(f"Cursor document no longer exists: {collection}/{cursor}")
+            query = query.start_after(last)
+
+        documents = [
+            dict(_project(doc.to_dict() or {}, fields), _id=doc.id)
+            for doc in query.limit(page_size).stream()
+        ]
+        next_cursor = documents[-1]["_id"] if len(documents) == page_size else None
+        return {"documents": documents, "next_cursor": next_cursor}
+
+    return read_cache.get_or_load(key, load) if use_cache else load()
+
+
+def get_many_from_firestore(collection: str, doc_ids: list, fields: list = None,
+                            use_cache: bool = True) -> dict:
+    """
+    Bulk fetch documents by ID in one round trip (client.get_all)
+
+    Returns:
+        {doc_id: data or None if missing}
+    """
+    result = {}
+    to_fetch = []
+    field_key = tuple(fields or ())
+
+    for doc_id in dict.fromkeys(doc_ids):
+        missing = object()
+        cached = read_cache.get(("doc", collection, doc_id, field_key), missing) if use_cache else missing
+        if cached is missing:
+            to_fetch.append(doc_id)
+        else:
+            result[doc_id] = cached
+
+    if to_fetch:
+        db = get_db()
+        col = db.collection(collection)
+        refs = [col.document(doc_id) for doc_id in to_fetch]
+        for snap in db.get_all(refs, field_paths=list(fields) if fields else None):
+            data = _project(snap.to_dict(), fields) if snap.exists else None
+            result[snap.id] = data
+            if use_cache:
+                read_cache.set(("doc", collection, snap.id, field_key), data)
+
+    return {doc_id: result.get(doc_id) for doc_id in doc_ids}
@@ -0,0 +1,287 @@
+"""
+Ledger ingestion - Streams invoice rows out of accounting exports (Tally, ERP
+CSV/XLSX dumps), maps their columns onto our invoice format, validates and
+de-duplicates them, and hands them to a sink in fixed-size chunks.
+
+Only one chunk of parsed rows is held in memory at a time; the set of
+invoice IDs already seen is kept for de-duplication.
+"""
+import csv
+import re
+from contextlib import closing
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Accepted header spellings per invoice field (compared case/space-insensitively)
+DEFAULT_COLUMN_ALIASES = {
+    "invoice_id": ["invoice_id", "invoice id", "invoice no", "invoice no.", "invoice number",
+                   "voucher no", "voucher no.", "vch no.", "bill no", "bill no.", "bill number"],
+    "client_name": ["client_name", "vendor_name", "client", "vendor", "party name", "party",
+                    "party's name", "supplier", "supplier name", "ledger name", "particulars"],
+    "amount": ["amount", "invoice amount", "bill amount", "invoice value", "gross total",
+               "total amount", "value"],
+    "invoice_date": ["invoice_date", "invoice_datetime", "invoice date", "bill date",
+                     "voucher date", "date"],
+    "deadline_days": ["deadline_days", "credit days", "credit period", "payment terms", "due days"],
+    "paid": ["paid", "payment status", "status"],
+    "udyam_number": ["udyam_number", "udyam no", "udyam no.", "udyam registration number", "udyam"],
+    "vendor_email": ["vendor_email", "email", "party email"],
+    "vendor_phone": ["vendor_phone", "phone", "mobile", "party phone"]
+}
+
+REQUIRED_FIELDS = ("invoice_id", "client_name", "amount", "invoice_date")
+DEFAULT_DEADLINE_DAYS = 45
+
+_DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y", "%d-%b-%Y", "%d-%b-%y",
+                 "%d %b %Y", "%d/%m/%y", "%Y/%m/%d")
+_AMOUNT_JUNK = re.compile(r"[₹,\s]|Rs\.?|INR|Dr|Cr", re.IGNORECASE)
+_PAID_VALUES = {"true", "yes", "y", "1", "paid", "settled", "cleared"}
+
+
+def _norm_header(header) -> str:
+    return " ".join(str(header or "").strip().lower().split())
+
+
+def resolve_columns(headers: List[str], column_map: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Map invoice fields to source headers
+
+    Args:
+        headers: Header row of the export
+        column_map: Explicit {invoice_field: source_header} overrides
+
+    Returns:
+        {invoice_field: source_header} for every field found
+    """
+    by_norm = {_norm_header(h): h for h in headers if h is not None}
+    mapping = {}
+
+    for field, aliases in DEFAULT_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in by_norm:
+                mapping[field] = by_norm[alias]
+                break
+
+    for field, source in (column_map or {}).items():
+        if _norm_header(source) not in by_norm:
+            raise ValueError(f"Column '{source}' (for {field}) not found in file headers")
+        mapping[field] = by_norm[_norm_header(source)]
+
+    missing = [f for f in REQUIRED_FIELDS if f not in mapping]
+    if missing:
+        raise ValueError(f"Could not find columns for {missing}; pass column_map to map them")
+    return mapping
+
+
+def parse_amount(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    cleaned = _AMOUNT_JUNK.sub("", str(value or ""))
+    if cleaned.startswith("(") and cleaned.endswith(")"):
+        cleaned = "-" + cleaned[1:-1]
+    return float(cleaned)
+
+
+def parse_date(value) -> Tuple[str, Optional[str]]:
+    """
+    Returns:
+        Tuple of (YYYY-MM-DD, full ISO datetime or None when no time was given)
+    """
+    if isinstance(value, datetime):
+        has_time = (value.hour, value.minute, value.second) != (0, 0, 0)
+        return value.date().isoformat(), value.isoformat() if has_time else None
+    if isinstance(value, date):
+        return value.isoformat(), None
+
+    text = str(value or "").strip()
+    if "T" in text:
+        dt = datetime.fromisoformat(text)
+        return dt.date().isoformat(), dt.isoformat()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat(), None
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {text!r}")
+
+
+def normalize_row(row: Dict, mapping: Dict[str, str]) -> Dict:
+    """Convert one export row to an invoice dict (raises ValueError if invalid)"""
+    get = lambda field: row.get(mapping[field]) if field in mapping else None
+
+    invoice_id = str(get("invoice_id") or "").strip()
+    client_name = str(get("client_name") or "").strip()
+    if not invoice_id:
+        raise ValueError("missing invoice_id")
+    if not client_name:
+        raise ValueError("missing client_name")
+
+    amount = parse_amount(get("amount"))
+    if amount <= 0:
+        raise ValueError(f"non-positive amount {amount}")
+
+    invoice_date, invoice_datetime = parse_date(get("invoice_date"))
+
+    deadline = get("deadline_days")
+    deadline_days = int(float(deadline)) if deadline not in (None, "") else DEFAULT_DEADLINE_DAYS
+    # 43B(h): 15 days without a written agreement, at most 45 with one
+    deadline_days = max(1, min(deadline_days, DEFAULT_DEADLINE_DAYS))
+
+    invoice = {
+        "invoice_id": invoice_id,
+        "client_name": client_name,
+        "amount": amount,
+        "invoice_date": invoice_date,
+        "deadline_days": deadline_days
+    }
+    if "paid" in mapping:
+        # Without a status column the ledger says nothing about payment
+        invoice["paid"] = str(get("paid") or "").strip().lower() in _PAID_VALUES
+    if invoice_datetime:
+        invoice["invoice_datetime"] = invoice_datetime
+    for optional in ("udyam_number", "vendor_email", "vendor_phone"):
+        value = get(optional)
+        if value not in (None, ""):
+            invoice[optional] = str(value).strip()
+    return invoice
+
+
+def _open_worksheet(path: str, sheet: Optional[str]):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("openpyxl is required for Excel ledgers (pip install openpyxl)")
+
+    # read_only mode streams rows instead of loading the whole workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        return workbook, worksheet.iter_rows(values_only=True)
+    except Exception:
+        workbook.close()
+        raise
+
+
+def iter_rows(path: str, sheet: Optional[str] = None) -> Tuple[List[str], Iterator[Dict]]:
+    """
+    Stream rows from a CSV or XLSX file
+
+    The header row is read up front and the file closed again; the row
+    iterator reopens it when iteration starts, so nothing is left open if the
+    caller rejects the headers and never iterates.
+
+    Returns:
+        Tuple of (headers, row iterator of {header: value})
+    """
+    suffix = Path(path).suffix.lower()
+
+    if suffix in (".xlsx", ".xlsm"):
+        workbook, rows = _open_worksheet(path, sheet)
+        with closing(workbook):
+            headers = [str(h) if h is not None else None for h in next(rows, [])]
+
+        def generate():
+            workbook, rows = _open_worksheet(path, sheet)
+            with closing(workbook):
+                next(rows, None)  # header
+                for values in rows:
+                    if values and any(v not in (None, "") for v in values):
+                        yield dict(zip(headers, values))
+
+        return headers, generate()
+
+    if suffix in (".csv", ".txt", ""):
+        with open(path, newline="", encoding="utf-8-sig") as handle:
+            headers = next(csv.reader(handle), [])
+
+        def generate():
+            with open(path, newline="", encoding="utf-8-sig") as handle:
+                for row in csv.DictReader(handle):
+                    if any(v not in (None, "") for v in row.values()):
+                        yield row
+
+        return headers, generate()
+
+    raise ValueError(f"Unsupported ledger format: {suffix} (use .csv or .xlsx)")
+
+
+def iter_invoice_chunks(path: str, chunk_size: int = 1000,
+                        column_map: Optional[Dict[str, str]] = None,
+                        sheet: Optional[str] = None,
+                        stats: Optional[Dict] = None) -> Iterator[List[Dict]]:
+    """
+    Yield lists of at most chunk_size valid, de-duplicated invoices
+
+    Args:
+        stats: Optional dict updated with rows_read/duplicates/invalid/errors
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("rows_read", 0)
+    stats.setdefault("duplicates", 0)
+    stats.setdefault("invalid", 0)
+    stats.setdefault("errors", [])
+
+    headers, rows = iter_rows(path, sheet)
+    mapping = resolve_columns(headers, column_map)
+    seen_ids = set()
+    chunk = []
+
+    for line_no, row in enumerate(rows, start=2):  # header is line 1
+        stats["rows_read"] += 1
+        try:
+            invoice = normalize_row(row, mapping)
+        except (ValueError, TypeError) as e:
+            stats["invalid"] += 1
+            if len(stats["errors"]) < 100:
+                stats["errors"].append({"line": line_no, "error": str(e)})
+            continue
+
+        if invoice["invoice_id"] in seen_ids:
+            stats["duplicates"] += 1
+            continue
+        seen_ids.add(invoice["invoice_id"])
+
+        chunk.append(invoice)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def ingest_ledger(path: str, sink: Callable[[List[Dict]], None], chunk_size: int = 1000,
+                  column_map: Optional[Dict[str, str]] = None,
+                  sheet: Optional[str] = None) -> Dict:
+    """
+    Stream a CSV/XLSX ledger into an invoice store
+
+    Args:
+        path: Ledger file
+        sink: Called with each chunk of invoices (e.g. InvoiceMonitor.merge_invoices)
+        chunk_size: Invoices per batch written to the sink
+        column_map: Explicit {invoice_field: source_header} overrides
+        sheet: Worksheet name for Excel files (active sheet by default)
+
+    Returns:
+        Ingestion report with counts and the first validation errors
+    """
+    stats = {}
+    ingested = 0
+    chunks = 0
+
+    for chunk in iter_invoice_chunks(path, chunk_size, column_map, sheet, stats):
+        sink(chunk)
+        ingested += len(chunk)
+        chunks += 1
+
+    return {
+        "file": str(path),
+        "rows_read": stats.get("rows_read", 0),
+        "ingested": ingested,
+        "duplicates": stats.get("duplicates", 0),
+        "invalid": stats.get("invalid", 0),
+        "batches": chunks,
+        "errors": stats.get("errors", [])
+    }
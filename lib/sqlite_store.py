@@ -0,0 +1,456 @@
+"""
+SQLite storage backend - A local stand-in for the Firestore client.
+
+Implements the part of the Firestore API the agents use (collections, add,
+get/set/update by ID, equality, range and `in` queries, ordering, limits,
+field selection, start_after cursors, get_all, count, batches), so code written against
+`get_db()` runs offline with no credentials.
+Documents are stored as JSON, one row per document.
+
+Ordering follows Firestore: order_by(field) skips documents without that
+field, and ties fall back to document ID. One difference: queries with no
+order_by return documents in the order they were first written (rowid),
+where Firestore returns them in document-ID order; order_by("__name__")
+gives the Firestore order on both.
+"""
+import json
+import sqlite3
+import threading
+import random
+import string
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (collection, id)
+);
+CREATE INDEX IF NOT EXISTS idx_documents_collection ON documents (collection);
+"""
+
+DOCUMENT_ID = "__name__"  # Firestore's field path for ordering by document ID
+_INSERTED = "__rowid__"   # insertion order, the tie-break after explicit orderings
+
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+_random = random.SystemRandom()
+
+_COMPARISONS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+def auto_id() -> str:
+    """20-character alphanumeric ID, same shape as Firestore auto IDs"""
+    return "".join(_random.choice(_AUTO_ID_CHARS) for _ in range(20))
+
+
+def _doc_id(value) -> str:
+    """Document ID filters accept a DocumentReference or a plain ID"""
+    return value.id if hasattr(value, "id") else str(value)
+
+
+def _json_path(field: str) -> str:
+    return "$." + ".".join(f'"{part}"' for part in field.split("."))
+
+
+def _set_path(data: dict, field: str, value: Any):
+    """Apply a Firestore-style dotted field path update"""
+    parts = field.split(".")
+    target = data
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    target[parts[-1]] = value
+
+
+def _sql_value(value):
+    # json_extract returns 0/1 for JSON booleans and TEXT for strings
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class DocumentSnapshot:
+    """Result of reading one document"""
+
+    def __init__(self, reference, data: Optional[dict]):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[dict]:
+        return None if self._data is None else json.loads(json.dumps(self._data))
+
+    def get(self, field: str):
+        value = self._data or {}
+        for part in field.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        return value
+
+
+class DocumentReference:
+    """Reference to a single document in a collection"""
+
+    def __init__(self, client, collection: str, doc_id: str):
+        self._client = client
+        self.collection_id = collection
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self.collection_id}/{self.id}"
+
+    def get(self) -> DocumentSnapshot:
+        row = self._client._fetchone(
+            "SELECT data FROM documents WHERE collection = ? AND id = ?",
+            (self.collection_id, self.id)
+        )
+        return DocumentSnapshot(self, json.loads(row[0]) if row else None)
+
+    def set(self, data: dict, merge: bool = False):
+        if merge:
+            current = self.get().to_dict() or {}
+            current.update(data)
+            data = current
+        self._client._write([(self.collection_id, self.id, data)])
+
+    def update(self, data: dict):
+        current = self.get().to_dict()
+        if current is None:
+            raise KeyError(f"No document to update: {self.path}")
+        for field, value in data.items():
+            _set_path(current, field, value)
+        self._client._write([(self.collection_id, self.id, current)])
+
+    def delete(self):
+        self._client._execute(
+            "DELETE FROM documents WHERE collection = ? AND id = ?",
+            (self.collection_id, self.id)
+        )
+
+
+class Query:
+    """Immutable query over one collection (mirrors firestore.Query chaining)"""
+
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+    def __init__(self, client, collection: str, filters=None, orders=None, limit_count=None,
+                 fields=None, start_after_doc=None):
+        self._client = client
+        self._collection = collection
+        self._filters = filters or []
+        self._orders = orders or []
+        self._limit = limit_count
+        self._fields = fields
+        self._start_after = start_after_doc
+
+    def _copy(self, **changes):
+        params = {
+            "filters": list(self._filters),
+            "orders": list(self._orders),
+            "limit_count": self._limit,
+            "fields": self._fields,
+            "start_after_doc": self._start_after
+        }
+        params.update(changes)
+        return Query(self._client, self._collection, **params)
+
+    def where(self, field: str, op: str, value) -> "Query":
+        if op not in _COMPARISONS and op != "in":
+            raise ValueError(f"SQLite backend does not support {op!r} filters")
+        return self._copy(filters=self._filters + [(field, op, value)])
+
+    def count(self) -> "_CountQuery":
+        """Aggregation query, like firestore's query.count()"""
+        return _CountQuery(self)
+
+    def order_by(self, field: str, direction: str = ASCENDING) -> "Query":
+        return self._copy(orders=self._orders + [(field, direction)])
+
+    def limit(self, count: int) -> "Query":
+        return self._copy(limit_count=count)
+
+    def select(self, field_paths: List[str]) -> "Query":
+        return self._copy(fields=list(field_paths))
+
+    def start_after(self, snapshot: DocumentSnapshot) -> "Query":
+        """Resume after a document snapshot (cursor pagination)"""
+        return self._copy(start_after_doc=snapshot)
+
+    def _order_terms(self):
+        """
+        (sql expression, path param or None, descending, field) in sort order
+
+        Ties after the explicit orderings fall back to insertion order (rowid,
+        which upserts keep), then document ID, unless the query already orders
+        by document ID.
+        """
+        terms = []
+        for field, direction in self._orders:
+            descending = direction == self.DESCENDING
+            if field == DOCUMENT_ID:
+                terms.append(("id", None, descending, field))
+            else:
+                terms.append(("json_extract(data, ?)", _json_path(field), descending, field))
+        if not any(field == DOCUMENT_ID for _, _, _, field in terms):
+            terms.append(("rowid", None, False, _INSERTED))
+            terms.append(("id", None, False, DOCUMENT_ID))
+        return terms
+
+    def _build_sql(self, columns: str = "id, data"):
+        sql = [f"SELECT {columns} FROM documents WHERE collection = ?"]
+        params: List[Any] = [self._collection]
+
+        for field, op, value in self._filters:
+            if field == DOCUMENT_ID:
+                expr, expr_params = "id", []
+                value = [_doc_id(v) for v in value] if op == "in" else _doc_id(value)
+            else:
+                expr, expr_params = "json_extract(data, ?)", [_json_path(field)]
+
+            if op == "in":
+                values = [_sql_value(v) for v in value]
+                if not values:
+                    sql.append("AND 0")
+                    continue
+                sql.append(f"AND {expr} IN ({', '.join('?' * len(values))})")
+                params += expr_params + values
+            else:
+                sql.append(f"AND {expr} {_COMPARISONS[op]} ?")
+                params += expr_params + [_sql_value(value)]
+
+        # Like Firestore, ordering by a field leaves out documents without it
+        # (json_type is NULL only for a missing path, not for a JSON null)
+        for field, _ in self._orders:
+            if field != DOCUMENT_ID:
+                sql.append("AND json_type(data, ?) IS NOT NULL")
+                params.append(_json_path(field))
+
+        terms = self._order_terms()
+
+        if self._start_after is not None:
+            # Lexicographic "row comes after cursor" across mixed sort directions
+            clauses = []
+            for i, (expr, path, descending, field) in enumerate(terms):
+                parts = []
+                for prev_expr, prev_path, _, prev_field in terms[:i]:
+                    cursor_sql, cursor_params = self._cursor_value(prev_field)
+                    parts.append(f"{prev_expr} IS {cursor_sql}")
+                    params += ([prev_path] if prev_path else []) + cursor_params
+                after_sql, after_params = self._after_cursor(expr, path, descending, field)
+                parts.append(after_sql)
+                params += after_params
+                clauses.append("(" + " AND ".join(parts) + ")")
+            sql.append("AND (" + " OR ".join(clauses) + ")")
+
+        order_sql = []
+        for expr, path, descending, _ in terms:
+            order_sql.append(f"{expr} {'DESC' if descending else 'ASC'}")
+            if path:
+                params.append(path)
+        sql.append("ORDER BY " + ", ".join(order_sql))
+
+        if self._limit is not None:
+            sql.append("LIMIT ?")
+            params.append(self._limit)
+
+        return " ".join(sql), params
+
+    def _cursor_value(self, field: str):
+        """(sql placeholder, params) for the cursor document's value of a sort term"""
+        if field == DOCUMENT_ID:
+            return "?", [self._start_after.id]
+        if field == _INSERTED:
+            # Snapshots don't carry the rowid; read it from the cursor's row
+            return ("(SELECT rowid FROM documents WHERE collection = ? AND id = ?)",
+                    [self._collection, self._start_after.id])
+        return "?", [_sql_value(self._start_after.get(field))]
+
+    def _after_cursor(self, expr: str, path: Optional[str], descending: bool, field: str):
+        """
+        (sql, params) for "this sort term comes after the cursor's value"
+
+        SQLite sorts NULL (a JSON null) first ascending and last descending,
+        and comparisons with NULL are never true, so nulls need their own cases.
+        """
+        path_params = [path] if path else []
+        cursor_sql, cursor_params = self._cursor_value(field)
+        if cursor_params == [None]:
+            return ("0", []) if descending else (f"{expr} IS NOT NULL", path_params)
+        if descending:
+            return (f"({expr} < {cursor_sql} OR {expr} IS NULL)",
+                    path_params + cursor_params + path_params)
+        return f"{expr} > {cursor_sql}", path_params + cursor_params
+
+    def stream(self):
+        sql, params = self._build_sql()
+        for doc_id, data in self._client._fetchall(sql, params):
+            ref = DocumentReference(self._client, self._collection, doc_id)
+            doc = json.loads(data)
+            if self._fields:
+                doc = {f: doc[f] for f in self._fields if f in doc}
+            yield DocumentSnapshot(ref, doc)
+
+    def get(self) -> List[DocumentSnapshot]:
+        return list(self.stream())
+
+
+class _AggregationResult:
+    def __init__(self, value: int):
+        self.alias = "count"
+        self.value = value
+
+
+class _CountQuery:
+    def __init__(self, query: Query):
+        self._query = query
+
+    def get(self):
+        sql, params = self._query._copy(orders=[], fields=None)._build_sql("id")
+        row = self._query._client._fetchone(f"SELECT COUNT(*) FROM ({sql})", params)
+        # Same shape as firestore: list of result lists
+        return [[_AggregationResult(row[0])]]
+
+
+class CollectionReference(Query):
+    """A named collection; also usable directly as an unfiltered query"""
+
+    def __init__(self, client, collection: str):
+        super().__init__(client, collection)
+        self.id = collection
+
+    def document(self, doc_id: Optional[str] = None) -> DocumentReference:
+        return DocumentReference(self._client, self._collection, doc_id or auto_id())
+
+    def add(self, data: dict, document_id: Optional[str] = None):
+        ref = self.document(document_id)
+        ref.set(data)
+        return datetime.now(), ref
+
+
+class WriteBatch:
+    """Collects set/update/delete calls and applies them in one transaction"""
+
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, reference: DocumentReference, data: dict, merge: bool = False):
+        self._ops.append(("set", reference, data, merge))
+
+    def update(self, reference: DocumentReference, data: dict):
+        self._ops.append(("update", reference, data, False))
+
+    def delete(self, reference: DocumentReference):
+        self._ops.append(("delete", reference, None, False))
+
+    def commit(self):
+        with self._client._lock, self._client._conn:
+            for op, ref, data, merge in self._ops:
+                if op == "delete":
+                    self._client._conn.execute(
+                        "DELETE FROM documents WHERE collection = ? AND id = ?",
+                        (ref.collection_id, ref.id)
+                    )
+                    continue
+                if op == "update" or merge:
+                    row = self._client._conn.execute(
+                        "SELECT data FROM documents WHERE collection = ? AND id = ?",
+                        (ref.collection_id, ref.id)
+                    ).fetchone()
+                    if row is None and op == "update":
+                        raise KeyError(f"No document to update: {ref.path}")
+                    current = json.loads(row[0]) if row else {}
+                    for field, value in data.items():
+                        if op == "update":
+                            _set_path(current, field, value)
+                        else:
+                            current[field] = value
+                    data = current
+                self._client._upsert(ref.collection_id, ref.id, data)
+        self._ops = []
+
+
+class SQLiteClient:
+    """Firestore-compatible client backed by a local SQLite file"""
+
+    def __init__(self, path: str = "local_store.db"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def collection(self, name: str) -> CollectionReference:
+        return CollectionReference(self, name)
+
+    def collections(self) -> List[CollectionReference]:
+        rows = self._fetchall("SELECT DISTINCT collection FROM documents ORDER BY collection", ())
+        return [CollectionReference(self, row[0]) for row in rows]
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def get_all(self, references: List[DocumentReference], field_paths: Optional[List[str]] = None):
+        """Fetch many documents by reference in one query"""
+        by_collection = {}
+        for ref in references:
+            by_collection.setdefault(ref.collection_id, []).append(ref)
+
+        for collection, refs in by_collection.items():
+            found = {}
+            ids = [ref.id for ref in refs]
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self._fetchall(
+                    f"SELECT id, data FROM documents WHERE collection = ? "
+                    f"AND id IN ({', '.join('?' * len(chunk))})",
+                    [collection] + chunk
+                )
+                found.update(rows)
+            for ref in refs:
+                data = json.loads(found[ref.id]) if ref.id in found else None
+                if data is not None and field_paths:
+                    data = {f: data[f] for f in field_paths if f in data}
+                yield DocumentSnapshot(ref, data)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Internal helpers (all access serialized through one connection)
+
+    def _upsert(self, collection: str, doc_id: str, data: Dict):
+        self._conn.execute(
+            "INSERT INTO documents (collection, id, data, created) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (collection, id) DO UPDATE SET data = excluded.data",
+            (collection, doc_id, json.dumps(data, default=str), datetime.now().timestamp())
+        )
+
+    def _write(self, docs):
+        with self._lock, self._conn:
+            for collection, doc_id, data in docs:
+                self._upsert(collection, doc_id, data)
+
+    def _execute(self, sql: str, params):
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+    def _fetchone(self, sql: str, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
@@ -1,46 +1,296 @@
-#yet to be implemented
-import os
-import json
-from google.cloud import firestore
+"""
+Estimate Firestore storage size per collection and per field.
 
-# Make sure this env var points to your service account JSON
-# export GOOGLE_APPLICATION_CREDENTIALS="/path/to/serviceAccount.json"
+Sizes follow Firestore's documented storage size rules
+(https://firebase.google.com/docs/firestore/storage-size), not JSON length:
+    string        UTF-8 bytes + 1
+    bool / null   1
+    int / float   8
+    timestamp     8
+    geopoint      16
+    bytes         length
+    reference     document name size
+    array / map   sum of elements (map keys count as strings)
+    document      name size + field names + values + 32
+    name          each collection/document ID as a string + 16
 
-project_id = "YOUR_PROJECT_ID"
-db = firestore.Client(project=project_id)
+Two modes:
+    full scan  Every document in every collection, collections in parallel
+    sampled    --sample N random documents per collection (random auto-ID
+               seeks), total estimated from count() with an approximate
+               confidence interval. Seeking to a random ID picks each
+               document with a chance proportional to the ID gap before it,
+               which is only near-uniform when IDs are Firestore auto-IDs;
+               collections with other IDs are scanned instead.
 
-def estimate_collection_size(collection_name: str) -> int:
-    """Return rough size in bytes of all docs in a collection."""
-    docs = db.collection(collection_name).stream()
-    total_bytes = 0
+Uses the shared client from lib.firebase_config, so credentials come from
+FIREBASE_CREDENTIALS / GOOGLE_APPLICATION_CREDENTIALS (or STORAGE_BACKEND=sqlite).
 
+    python scripts/estimate_firestore_size.py
+    python scripts/estimate_firestore_size.py --sample 200 --top 5 research_cache
+"""
+import argparse
+import heapq
+import math
+import random
+import re
+import string
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+
+# Allow running as a script from anywhere in the repo
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lib.firebase_config import get_db
+
+DOCUMENT_OVERHEAD = 32
+NAME_OVERHEAD = 16
+AUTO_ID_CHARS = string.ascii_letters + string.digits
+AUTO_ID = re.compile(r"[A-Za-z0-9]{20}")
+Z_SCORES = {0.8: 1.2816, 0.9: 1.6449, 0.95: 1.96, 0.99: 2.5758}
+
+
+def string_size(value: str) -> int:
+    return len(value.encode("utf-8")) + 1
+
+
+def document_name_size(path: str) -> int:
+    """Size of a document name such as 'research_cache/abc123'"""
+    return sum(string_size(segment) for segment in path.split("/")) + NAME_OVERHEAD
+
+
+def value_size(value) -> int:
+    """Storage size of a single field value"""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 8
+    if isinstance(value, str):
+        return string_size(value)
+    if isinstance(value, (datetime, date)):
+        return 8
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(string_size(str(k)) + value_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(value_size(v) for v in value)
+    if hasattr(value, "latitude") and hasattr(value, "longitude"):
+        return 16
+    if hasattr(value, "path"):  # DocumentReference
+        return document_name_size(value.path)
+    return string_size(str(value))
+
+
+def document_size(collection: str, doc_id: str, data: dict) -> tuple:
+    """
+    Returns:
+        Tuple of (total_size, {field_name: field_name_size + value_size})
+    """
+    fields = {name: string_size(name) + value_size(value) for name, value in (data or {}).items()}
+    total = document_name_size(f"{collection}/{doc_id}") + sum(fields.values()) + DOCUMENT_OVERHEAD
+    return total, fields
+
+
+def scan_collection(db, collection: str, top_n: int = 5) -> dict:
+    """Exact size of every document in one collection"""
+    total = 0
+    count = 0
+    field_totals = {}
+    largest = []  # min-heap of (size, doc_id)
+
+    for doc in db.collection(collection).stream():
+        size, fields = document_size(collection, doc.id, doc.to_dict())
+        total += size
+        count += 1
+        for name, field_size in fields.items():
+            field_totals[name] = field_totals.get(name, 0) + field_size
+        if len(largest) < top_n:
+            heapq.heappush(largest, (size, doc.id))
+        else:
+            heapq.heappushpop(largest, (size, doc.id))
+
+    return {
+        "collection": collection,
+        "mode": "full",
+        "documents": count,
+        "bytes": total,
+        "fields": field_totals,
+        "largest": sorted(largest, reverse=True)
+    }
+
+
+def _count_documents(db, collection: str) -> int:
+    col = db.collection(collection)
+    try:
+        return int(col.count().get()[0][0].value)
+    except AttributeError:
+        # Older clients without aggregation queries: fall back to a scan
+        return sum(1 for _ in col.stream())
+
+
+def _has_auto_ids(db, collection: str, probe: int = 20) -> bool:
+    """Whether the first documents by name all have 20-character auto-IDs"""
+    docs = db.collection(collection).order_by("__name__").limit(probe).stream()
+    return all(AUTO_ID.fullmatch(doc.id) for doc in docs)
+
+
+def _random_document(db, collection: str):
+    """Seek to a random auto-ID and take the next document (wrapping around)"""
+    col = db.collection(collection)
+    pivot = col.document("".join(random.choice(AUTO_ID_CHARS) for _ in range(20)))
+    docs = list(col.where("__name__", ">=", pivot).order_by("__name__").limit(1).stream())
+    if not docs:
+        docs = list(col.order_by("__name__").limit(1).stream())
+    return docs[0] if docs else None
+
+
+def _plan_sample(db, collection: str, sample_size: int, top_n: int) -> tuple:
+    """
+    Returns:
+        Tuple of (result, document count); result is None when the
+        collection should be sampled, else the finished (empty or scanned) result
+    """
+    count = _count_documents(db, collection)
+    if count == 0:
+        return {"collection": collection, "mode": "sampled", "documents": 0, "bytes": 0,
+                "margin": 0, "fields": {}, "largest": [], "sampled": 0}, 0
+    if count <= sample_size:
+        return scan_collection(db, collection, top_n), count
+    if not _has_auto_ids(db, collection):
+        print(f"ℹ️  {collection}: document IDs are not auto-IDs, random seeks would be biased; scanning")
+        return scan_collection(db, collection, top_n), count
+    return None, count
+
+
+def _summarize_sample(collection: str, picks, count: int, confidence: float, top_n: int) -> dict:
+    # Seeks sample with replacement: measure each document once
+    docs = list({d.id: d for d in picks if d}.values())
+
+    sizes = []
+    field_totals = {}
+    largest = []
     for doc in docs:
-        data = doc.to_dict() or {}
-        # include document id as well
-        data["_id"] = doc.id
-        # serialize to JSON bytes
-        encoded = json.dumps(data, ensure_ascii=False).encode("utf-8")
-        total_bytes += len(encoded)
+        size, fields = document_size(collection, doc.id, doc.to_dict())
+        sizes.append(size)
+        for name, field_size in fields.items():
+            field_totals[name] = field_totals.get(name, 0) + field_size
+        if len(largest) < top_n:
+            heapq.heappush(largest, (size, doc.id))
+        else:
+            heapq.heappushpop(largest, (size, doc.id))
+
+    n = len(sizes)
+    mean = sum(sizes) / n
+    variance = sum((s - mean) ** 2 for s in sizes) / (n - 1) if n > 1 else 0.0
+    # Normal approximation treating the seeks as a uniform random sample (approximate)
+    z = Z_SCORES.get(confidence, 1.96)
+    margin = z * math.sqrt(variance / n) * count
+
+    scale = count / n
+    return {
+        "collection": collection,
+        "mode": "sampled",
+        "documents": count,
+        "sampled": n,
+        "bytes": int(mean * count),
+        "margin": int(margin),
+        "confidence": confidence,
+        "fields": {name: int(size * scale) for name, size in field_totals.items()},
+        "largest": sorted(largest, reverse=True)
+    }
 
-    return total_bytes
 
-def estimate_db_size(root_collections=None):
+def sample_collection(db, collection: str, sample_size: int, confidence: float = 0.95,
+                      top_n: int = 5, workers: int = 8) -> dict:
+    """
+    Estimate collection size from random documents with an approximate
+    confidence interval
+
+    Collections no larger than the sample, or whose IDs are not auto-IDs, are
+    scanned in full instead.
+    """
+    result, count = _plan_sample(db, collection, sample_size, top_n)
+    if result is not None:
+        return result
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        picks = list(pool.map(lambda _: _random_document(db, collection), range(sample_size)))
+    return _summarize_sample(collection, picks, count, confidence, top_n)
+
+
+def estimate_db_size(root_collections=None, sample_size: int = 0, workers: int = 8,
+                     confidence: float = 0.95, top_n: int = 5):
+    """
+    Estimate size of each collection (collections scanned in parallel)
+
+    Everything runs on one pool of `workers` threads: collection counts and
+    scans first, then the random seeks of every sampled collection. No task
+    waits on another task, so the pool can't deadlock or grow past workers.
+
+    Returns:
+        Tuple of ({collection: result}, total_bytes)
+    """
+    db = get_db()
     if root_collections is None:
         root_collections = [c.id for c in db.collections()]
 
-    sizes = {}
-    total = 0
-    for col in root_collections:
-        size = estimate_collection_size(col)
-        sizes[col] = size
-        total += size
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        if not sample_size:
+            results = list(pool.map(lambda c: scan_collection(db, c, top_n), root_collections))
+        else:
+            plans = list(pool.map(lambda c: _plan_sample(db, c, sample_size, top_n), root_collections))
+            seeks = {
+                collection: [pool.submit(_random_document, db, collection) for _ in range(sample_size)]
+                for collection, (result, _) in zip(root_collections, plans) if result is None
+            }
+            results = []
+            for collection, (result, count) in zip(root_collections, plans):
+                if result is None:
+                    picks = [future.result() for future in seeks[collection]]
+                    result = _summarize_sample(collection, picks, count, confidence, top_n)
+                results.append(result)
 
-    return sizes, total
+    sizes = {r["collection"]: r for r in results}
+    return sizes, sum(r["bytes"] for r in results)
 
-if __name__ == "__main__":
-    sizes, total = estimate_db_size()
-    print("Per‑collection (approx):")
-    for col, sz in sizes.items():
-        print(f"  {col}: {sz/1024:.2f} KB")
 
-    print(f"\nApprox total: {total/1024/1024:.3f} MB")
\ No newline at end of file
+def _fmt(num_bytes: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num_bytes) < 1024 or unit == "GB":
+            return f"{num_bytes:.2f} {unit}" if unit != "B" else f"{int(num_bytes)} B"
+        num_bytes /= 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate Firestore storage size")
+    parser.add_argument("collections", nargs="*", help="Collections to measure (default: all root collections)")
+    parser.add_argument("--sample", type=int, default=0, help="Random documents per collection (0 = full scan)")
+    parser.add_argument("--confidence", type=float, default=0.95, choices=sorted(Z_SCORES))
+    parser.add_argument("--workers", type=int, default=8, help="Parallel collection scans / sample reads")
+    parser.add_argument("--top", type=int, default=5, help="Largest documents and fields to list")
+    args = parser.parse_args()
+
+    sizes, total = estimate_db_size(args.collections or None, args.sample, args.workers,
+                                    args.confidence, args.top)
+
+    print("Per-collection (Firestore storage size):")
+    for col, r in sorted(sizes.items(), key=lambda item: item[1]["bytes"], reverse=True):
+        line = f"  {col}: {_fmt(r['bytes'])} in {r['documents']} docs"
+        if r["mode"] == "sampled" and r.get("sampled"):
+            line += f" (approx. ±{_fmt(r['margin'])} at {int(r['confidence'] * 100)}%, {r['sampled']} sampled)"
+        print(line)
+
+        top_fields = sorted(r["fields"].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        if top_fields:
+            print("      fields: " + ", ".join(f"{name}={_fmt(size)}" for name, size in top_fields))
+        if r["largest"]:
+            print("      largest: " + ", ".join(f"{doc_id} ({_fmt(size)})" for size, doc_id in r["largest"]))
+
+    margin = math.sqrt(sum(r.get("margin", 0) ** 2 for r in sizes.values()))
+    print(f"\nApprox total: {total/1024/1024:.3f} MB" + (f" (approx. ±{margin/1024/1024:.3f} MB)" if margin else ""))
+
+
+if __name__ == "__main__":
+    main()
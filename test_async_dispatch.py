@@ -0,0 +1,114 @@
+import threading
+import time
+
+from agents.notification_agent.async_dispatch import AsyncDispatcher
+from agents.notification_agent import notification_dispatcher
+from agents.notification_agent.notification_dispatcher import NotificationDispatcher
+
+
+class _SlowDispatcher(NotificationDispatcher):
+    """Real dispatcher with the network/desktop senders replaced by timed sleeps"""
+
+    def __init__(self):
+        super().__init__(enable_desktop=True, enable_whatsapp=True, enable_email=True)
+        self.in_flight = {"whatsapp": 0, "email": 0}
+        self.peak = {"whatsapp": 0, "email": 0}
+        self._lock = threading.Lock()
+
+    def _timed(self, channel, seconds):
+        with self._lock:
+            self.in_flight[channel] += 1
+            self.peak[channel] = max(self.peak[channel], self.in_flight[channel])
+        time.sleep(seconds)
+        with self._lock:
+            self.in_flight[channel] -= 1
+
+    def send_desktop_notification(self, title, message, is_persistent=False):
+        return True
+
+    def send_whatsapp_notification(self, phone_number, message):
+        self._timed("whatsapp", 0.5 if phone_number == "+slow" else 0.01)
+        return phone_number != "+fail"
+
+    def send_email_notification(self, recipient_email, subject, body):
+        self._timed("email", 0.1)
+        return True
+
+
+def test_async_dispatch_concurrency_and_results():
+    """Sends overlap within per-channel limits; a failure drops only that channel"""
+    dispatcher = _SlowDispatcher()
+    pipeline = AsyncDispatcher(dispatcher, concurrency={"email": 4, "whatsapp": 2})
+    prefs = {"email": "a@example.com", "phone_number": "+91", "whatsapp_consent": True}
+    jobs = [(f"msg {i}", "urgent", {"invoice_id": f"INV-{i}"}, prefs) for i in range(20)]
+    jobs.append(("slow", "explosive", {"invoice_id": "INV-SLOW"}, dict(prefs, phone_number="+slow")))
+    jobs.append(("fail", "calm", {"invoice_id": "INV-FAIL"}, dict(prefs, phone_number="+fail")))
+    jobs.append(("no prefs", "calm", {"invoice_id": "INV-DESKTOP"}, None))
+
+    try:
+        started = time.monotonic()
+        results = pipeline.dispatch_many(jobs)
+        elapsed = time.monotonic() - started
+
+        assert results[:20] == [["desktop", "whatsapp", "email"]] * 20
+        # A slow send is waited for and recorded, so it is not sent again next cycle
+        assert results[20] == ["desktop", "whatsapp", "email"]
+        assert results[21] == ["desktop", "email"]  # WhatsApp failed
+        assert results[22] == ["desktop"]
+        assert dispatcher.peak == {"whatsapp": 2, "email": 4}
+        assert dispatcher.in_flight == {"whatsapp": 0, "email": 0}  # nothing left running
+        # 22 emails x 0.1s, 4 at a time: 6 rounds, ~0.6s instead of 2.2s sequentially
+        assert 0.55 <= elapsed < 1.1
+
+        assert pipeline.send_notification("one", "calm", {"invoice_id": "INV-1"}, prefs) == \
+            ["desktop", "whatsapp", "email"]
+        print("✅ Async dispatch working!")
+    finally:
+        pipeline.close()
+
+
+def _created_once(sender_class, getter_name):
+    """Call a lazy sender getter from many threads at once; count from_env calls"""
+    calls = []
+
+    def from_env(cls):
+        calls.append(cls)
+        time.sleep(0.05)  # widen the window for a second thread to slip in
+        return object()
+
+    original = sender_class.__dict__["from_env"]
+    sender_class.from_env = classmethod(from_env)
+    try:
+        dispatcher = NotificationDispatcher(enable_desktop=False)
+        getter = getattr(dispatcher, getter_name)
+        barrier = threading.Barrier(8)
+        senders = []
+
+        def worker():
+            barrier.wait()
+            senders.append(getter())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return len(calls), len({id(s) for s in senders})
+    finally:
+        sender_class.from_env = original
+
+
+def test_lazy_smtp_pool_created_once():
+    assert _created_once(notification_dispatcher.SmtpConnectionPool, "_get_smtp_pool") == (1, 1)
+    print("✅ Shared SMTP pool working!")
+
+
+def test_lazy_whatsapp_sender_created_once():
+    assert _created_once(notification_dispatcher.WhatsAppSender, "_get_whatsapp_sender") == (1, 1)
+    print("✅ Shared WhatsApp sender working!")
+
+
+if __name__ == "__main__":
+    test_async_dispatch_concurrency_and_results()
+    test_lazy_smtp_pool_created_once()
+    test_lazy_whatsapp_sender_created_once()
@@ -0,0 +1,75 @@
+from datetime import datetime
+import os
+import shutil
+import tempfile
+
+from agents.notification_agent.deadline_index import DeadlineIndex
+from agents.notification_agent.invoice_monitor import InvoiceMonitor
+from agents.notification_agent.state_manager import SqliteStateManager
+
+
+def _invoice(invoice_id, invoice_datetime, deadline_days=45, paid=False):
+    return {"invoice_id": invoice_id, "client_name": f"Client {invoice_id}", "amount": 1000,
+            "invoice_datetime": invoice_datetime, "deadline_days": deadline_days, "paid": paid}
+
+
+def test_deadline_index_range_and_count():
+    """Inclusive range bounds, limits, moves, paid drops and bad dates"""
+    index = DeadlineIndex()
+    index.load([
+        _invoice("INV-3", "2025-01-03T09:00:00", 10),   # due 2025-01-13 09:00
+        _invoice("INV-1", "2025-01-01T09:00:00", 10),   # due 2025-01-11 09:00
+        _invoice("INV-2", "2025-01-02T09:00:00", 10),   # due 2025-01-12 09:00
+        _invoice("INV-2B", "2025-01-02T09:00:00", 10),  # same deadline as INV-2
+        _invoice("INV-PAID", "2025-01-02T09:00:00", 10, paid=True),
+        {"invoice_id": "INV-BAD", "invoice_date": "not a date"},
+    ])
+
+    assert len(index) == 4
+    # Both bounds are inclusive, down to the exact deadline time
+    start, end = datetime(2025, 1, 11, 9, 0), datetime(2025, 1, 12, 9, 0)
+    assert index.count(start, end) == 3
+    assert [e["invoice_id"] for e in index.range(start, end)] == ["INV-1", "INV-2", "INV-2B"]
+    assert index.count(datetime(2025, 1, 11, 9, 0, 1), end) == 2
+    assert index.count(None, datetime(2025, 1, 11, 8, 59)) == 0
+    assert index.count(datetime(2025, 1, 20), None) == 0
+    assert [e["invoice_id"] for e in index.range(limit=2)] == ["INV-1", "INV-2"]
+    assert index.range(start, start)[0]["deadline_datetime"] == "2025-01-11T09:00:00"
+
+    # Moving, paying and removing keep the index sorted
+    index.upsert([_invoice("INV-1", "2025-01-05T09:00:00", 10), _invoice("INV-2", "2025-01-02T09:00:00", 10, paid=True)])
+    index.remove("INV-3")
+    index.remove("UNKNOWN")
+    assert [e["invoice_id"] for e in index.range()] == ["INV-2B", "INV-1"]
+    assert [e["invoice_id"] for e in index.next_deadlines(5, after=datetime(2025, 1, 13))] == ["INV-1"]
+    print("✅ Deadline index working!")
+
+
+def test_deadline_index_attach_honours_state_paid_marks_after_restart():
+    """Invoices marked paid only in the state DB stay out of the index in a new process"""
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "state.db")
+    try:
+        monitor = InvoiceMonitor(os.path.join(tmp, "invoices.json"))
+        monitor.upsert_invoices([_invoice("A", "2025-01-01T09:00:00"), _invoice("B", "2025-01-02T09:00:00")])
+        state = SqliteStateManager(db_path, legacy_file=None)
+        state.mark_many_as_paid(["A"])
+        state.close()
+
+        state = SqliteStateManager(db_path, legacy_file=None)
+        index = DeadlineIndex().attach(monitor, state)
+        assert [e["invoice_id"] for e in index.range()] == ["B"]
+
+        # Rewriting the paid invoice doesn't re-add it; a fresh paid mark removes B
+        monitor.upsert_invoices([_invoice("A", "2025-01-05T09:00:00")])
+        state.mark_as_paid("B")
+        assert index.count() == 0
+        state.close()
+        print("✅ Deadline index honours state paid marks!")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    test_deadline_index_range_and_count()
+    test_deadline_index_attach_honours_state_paid_marks_after_restart()
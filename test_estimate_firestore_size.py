@@ -0,0 +1,81 @@
+import importlib.util
+import random
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from lib.firebase_config import set_db
+from lib.sqlite_store import SQLiteClient, auto_id
+
+_spec = importlib.util.spec_from_file_location(
+    "estimate_firestore_size", Path(__file__).parent / "scripts" / "estimate_firestore_size.py"
+)
+estimate = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(estimate)
+
+
+class _Reference:
+    path = "vendors/abc"
+
+
+def test_storage_size_rules():
+    """Sizes follow Firestore's storage size rules, not JSON length"""
+    assert estimate.string_size("abc") == 4
+    assert estimate.string_size("₹") == 4  # UTF-8 bytes + 1
+    assert [estimate.value_size(v) for v in (None, True, 7, 2.5, datetime(2025, 1, 1), b"xyz")] == [1, 1, 8, 8, 8, 3]
+    assert estimate.value_size(["ab", 1]) == 3 + 8
+    assert estimate.value_size({"k": "ab", "n": {"x": None}}) == (2 + 3) + (2 + (2 + 1))
+    assert estimate.value_size(_Reference()) == estimate.document_name_size("vendors/abc")
+
+    # research_cache/abc: (15 + 4) + 16 for the name
+    assert estimate.document_name_size("research_cache/abc") == 35
+    total, fields = estimate.document_size("research_cache", "abc", {"topic": "udyam", "sources": 3})
+    assert fields == {"topic": 6 + 6, "sources": 8 + 8}
+    assert total == 35 + 12 + 16 + 32
+    print("✅ Firestore size arithmetic working!")
+
+
+def test_sampled_estimate_dedupes_seeks_and_shares_one_pool():
+    db = SQLiteClient(":memory:")
+    set_db(db)
+    try:
+        batch = db.batch()
+        for _ in range(30):
+            batch.set(db.collection("research_cache").document(auto_id()), {"topic": "udyam", "sources": 3})
+        for i in range(30):
+            batch.set(db.collection("search_usage").document(f"day-{i:02d}"), {"count": i})
+        batch.commit()
+        exact, _ = estimate.document_size("research_cache", "x" * 20, {"topic": "udyam", "sources": 3})
+
+        threads = set()
+        seek = estimate._random_document
+
+        def recording_seek(db, collection):
+            threads.add(threading.get_ident())
+            return seek(db, collection)
+
+        estimate._random_document = recording_seek
+        random.seed(7)
+        try:
+            sizes, total = estimate.estimate_db_size(sample_size=25, workers=3)
+        finally:
+            estimate._random_document = seek
+
+        sampled = sizes["research_cache"]
+        assert sampled["mode"] == "sampled" and sampled["documents"] == 30
+        # 25 seeks over 30 documents repeat some: each document is measured once
+        assert 0 < sampled["sampled"] < 25
+        assert sampled["bytes"] == 30 * exact and sampled["margin"] == 0  # identical documents
+        assert len(sampled["largest"]) == 5
+        # Non auto-IDs would bias the seeks: scanned instead
+        assert sizes["search_usage"]["mode"] == "full" and sizes["search_usage"]["documents"] == 30
+        assert total == sampled["bytes"] + sizes["search_usage"]["bytes"]
+        assert 0 < len(threads) <= 3
+        print("✅ Sampled size estimate working!")
+    finally:
+        set_db(None)
+
+
+if __name__ == "__main__":
+    test_storage_size_rules()
+    test_sampled_estimate_dedupes_seeks_and_shares_one_pool()
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+import os
+import shutil
+import tempfile
+
+from agents.notification_agent.exposure_aggregates import ExposureAggregates
+from agents.notification_agent.invoice_monitor import InvoiceMonitor
+from agents.notification_agent.scheduler import invoice_deadline
+from agents.notification_agent.state_manager import SqliteStateManager
+
+
+def _invoice(invoice_id, client, amount, invoice_datetime, deadline_days=45):
+    return {"invoice_id": invoice_id, "client_name": client, "amount": amount,
+            "invoice_datetime": invoice_datetime, "deadline_days": deadline_days}
+
+
+def test_exposure_advance_at_exact_boundaries():
+    """Advancing to an exact level boundary or deadline terminates and moves levels correctly"""
+    inv = _invoice("INV-1", "ABC", 1000, "2025-01-01T09:00:00")
+    deadline = invoice_deadline(inv)
+    start = deadline - timedelta(days=44)
+
+    agg = ExposureAggregates()
+    agg.load([inv], now=start)
+    assert agg.totals(now=start)["by_urgency"]["extreme_calm"] == 1
+
+    # Exactly 41 days left is still extreme_calm; one microsecond later it is calm
+    boundary = deadline - timedelta(days=41)
+    assert agg.advance(now=boundary) == 0
+    assert agg.totals(now=boundary)["by_urgency"]["extreme_calm"] == 1
+    assert agg.advance(now=boundary + timedelta(microseconds=1)) == 1
+    assert agg.totals(now=boundary + timedelta(microseconds=1))["by_urgency"]["calm"] == 1
+
+    # At the deadline itself: explosive, not yet overdue
+    at_deadline = agg.totals(now=deadline)
+    assert at_deadline["by_urgency"]["explosive"] == 1
+    assert at_deadline["overdue_count"] == 0
+
+    after = agg.totals(now=deadline + timedelta(microseconds=1))
+    assert after["overdue_count"] == 1 and after["overdue_amount"] == 1000
+    assert after["tax_lost"] == 350.0
+    print("✅ Exposure boundaries working!")
+
+
+def test_exposure_matches_recompute():
+    """Incremental totals agree with a from-scratch recompute after upserts and payments"""
+    base = datetime(2025, 3, 1, 9, 0)
+    invoices = [_invoice(f"INV-{i}", f"V{i % 3}", 100 * (i + 1),
+                         (base - timedelta(days=i * 3)).isoformat()) for i in range(15)]
+    agg = ExposureAggregates()
+    agg.load(invoices, now=base)
+    agg.mark_paid("INV-0")
+    agg.upsert([dict(invoices[1], amount=5000)], now=base)
+
+    later = base + timedelta(days=20)
+    fresh = ExposureAggregates()
+    fresh.load([dict(invoices[1], amount=5000)] + invoices[2:], now=later)
+    assert agg.totals(now=later) == fresh.totals(now=later)
+    assert agg.vendor("V1", now=later) == fresh.vendor("V1", now=later)
+    assert [v["vendor"] for v in agg.top_vendors(2, now=later)] == \
+        [v["vendor"] for v in fresh.top_vendors(2, now=later)]
+
+
+def test_exposure_attach_honours_state_paid_marks_after_restart():
+    """Invoices marked paid only in the state DB stay out of the totals in a new process"""
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "state.db")
+    try:
+        monitor = InvoiceMonitor(os.path.join(tmp, "invoices.json"))
+        monitor.upsert_invoices([_invoice("A", "ABC", 1000, datetime.now().isoformat())])
+        state = SqliteStateManager(db_path, legacy_file=None)
+        state.mark_many_as_paid(["A"])
+        state.close()
+
+        # "Restart": nothing heard the paid listener, the invoice file still says unpaid
+        state = SqliteStateManager(db_path, legacy_file=None)
+        agg = ExposureAggregates().attach(monitor, state)
+        assert agg.totals()["invoice_count"] == 0
+
+        # A later rewrite of the invoice doesn't bring it back either
+        monitor.upsert_invoices([_invoice("A", "ABC", 2000, datetime.now().isoformat()),
+                                 _invoice("B", "XYZ", 500, datetime.now().isoformat())])
+        totals = agg.totals()
+        assert totals["invoice_count"] == 1 and totals["amount_at_risk"] == 500
+        state.close()
+        print("✅ Exposure aggregates honour state paid marks!")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    test_exposure_advance_at_exact_boundaries()
+    test_exposure_matches_recompute()
+    test_exposure_attach_honours_state_paid_marks_after_restart()
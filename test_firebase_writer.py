@@ -0,0 +1,67 @@
+import importlib.util
+import threading
+from pathlib import Path
+
+from lib.firebase_config import set_db, get_from_firestore, read_cache
+from lib.sqlite_store import SQLiteClient
+
+# Load the module on its own: the research_agent package imports the agent's
+# search/scraping dependencies, which the writer does not need
+_spec = importlib.util.spec_from_file_location(
+    "firebase_writer", Path(__file__).parent / "agents" / "research_agent" / "tools" / "firebase_writer.py"
+)
+firebase_writer = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(firebase_writer)
+BufferedFirestoreWriter = firebase_writer.BufferedFirestoreWriter
+
+
+def test_buffered_writes_invalidate_read_cache():
+    """A committed batch drops cached reads of the collections it wrote to"""
+    db = SQLiteClient(":memory:")
+    set_db(db)
+    writer = BufferedFirestoreWriter(client_factory=lambda: db, flush_interval=0.05)
+
+    try:
+        db.collection("research_cache").document("old").set({"title": "Old"})
+        assert len(get_from_firestore("research_cache", limit=10)) == 1
+        assert any(key[1] == "research_cache" for key in read_cache._data)
+
+        writer.write("research_cache", {"title": "Buffered"})
+        writer.flush()
+
+        assert all(key[1] != "research_cache" for key in read_cache._data)
+        assert len(get_from_firestore("research_cache", limit=10)) == 2
+        print("✅ Buffered writes invalidate the read cache!")
+    finally:
+        writer.close()
+        set_db(None)
+
+
+def test_stats_exact_under_concurrent_producers():
+    """Counts stay exact with many threads queueing while the flusher commits"""
+    db = SQLiteClient(":memory:")
+    writer = BufferedFirestoreWriter(client_factory=lambda: db, batch_size=50, flush_interval=0.05)
+
+    def produce(worker):
+        for i in range(200):
+            writer.write("search_yield", {"worker": worker, "i": i})
+
+    threads = [threading.Thread(target=produce, args=(w,)) for w in range(8)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        writer.flush()
+
+        assert writer.stats["queued"] == writer.stats["written"] == 1600
+        assert writer.stats["failed"] == 0
+        assert db.collection("search_yield").count().get()[0][0].value == 1600
+        print("✅ Writer stats exact under concurrency!")
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    test_buffered_writes_invalidate_read_cache()
+    test_stats_exact_under_concurrent_producers()
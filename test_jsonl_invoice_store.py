@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+
+from agents.notification_agent.invoice_store import JsonlInvoiceStore
+
+
+def _invoice(invoice_id, amount, paid=False):
+    return {"invoice_id": invoice_id, "client_name": "ABC", "amount": amount,
+            "invoice_date": "2025-01-01", "paid": paid}
+
+
+def _ids_and_amounts(store):
+    return [(inv["invoice_id"], inv["amount"]) for inv in store.iter_invoices()]
+
+
+def test_jsonl_store_replay_and_compaction():
+    """Updates replay over the base file, survive a torn line and compact cleanly"""
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "invoices.jsonl")
+
+    try:
+        store = JsonlInvoiceStore(path, compact_threshold=100)
+        store.upsert([_invoice("A", 1), _invoice("B", 2), _invoice("C", 3)])
+        store.compact()
+        assert not os.path.exists(store.log_path)
+
+        # Updates go to the side log and replace base records in place
+        store.upsert([_invoice("B", 20, paid=True), _invoice("D", 4)])
+        assert _ids_and_amounts(store) == [("A", 1), ("B", 20), ("C", 3), ("D", 4)]
+        assert [inv["invoice_id"] for inv in store.iter_active()] == ["A", "C", "D"]
+
+        # An interrupted append leaves a torn final line: a fresh reader skips it
+        with open(store.log_path, "a") as f:
+            f.write('{"invoice_id": "E", "amou')
+        reopened = JsonlInvoiceStore(path, compact_threshold=100)
+        assert _ids_and_amounts(reopened) == [("A", 1), ("B", 20), ("C", 3), ("D", 4)]
+        assert reopened.get("B")["amount"] == 20 and reopened.get("C")["amount"] == 3
+        assert reopened.get("E") is None
+
+        # The next append starts on a fresh line instead of joining the torn one
+        reopened.upsert([_invoice("F", 6)])
+        assert JsonlInvoiceStore(path).get("F")["amount"] == 6
+
+        # Compaction folds the log into the base file
+        saved_log = open(reopened.log_path).read()
+        reopened.compact()
+        assert not os.path.exists(reopened.log_path)
+        assert _ids_and_amounts(JsonlInvoiceStore(path)) == [("A", 1), ("B", 20), ("C", 3), ("D", 4), ("F", 6)]
+
+        # Crash between replacing the base and deleting the log: replaying it again is harmless
+        with open(reopened.log_path, "w") as f:
+            f.write(saved_log)
+        assert _ids_and_amounts(JsonlInvoiceStore(path)) == [("A", 1), ("B", 20), ("C", 3), ("D", 4), ("F", 6)]
+
+        # Reaching the threshold compacts automatically, except inside a batch
+        small = JsonlInvoiceStore(path, compact_threshold=3)
+        with small.batch():
+            small.upsert([_invoice("G", 7), _invoice("H", 8)])
+            assert os.path.exists(small.log_path)
+        assert not os.path.exists(small.log_path)
+        assert len(list(small.iter_invoices())) == 7
+        print("✅ JSONL store replay and compaction working!")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    test_jsonl_store_replay_and_compaction()
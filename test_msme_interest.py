@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("google.adk")  # agents.risk_agent imports its Agent on load
+
+from agents.risk_agent.msme_interest import (
+    DAYS_PER_MONTH, BankRateTable, accrue_ledger_interest, compound_interest, interest_for_invoice
+)
+
+RATES = BankRateTable([("2024-06-01", 10.0), ("2024-01-01", 5.0)])
+
+
+def test_bank_rate_switches_on_effective_date():
+    assert RATES.rate_on("2023-12-31") == 5.0   # before the table: earliest rate
+    assert RATES.rate_on("2024-05-31") == 5.0
+    assert RATES.rate_on("2024-06-01") == 10.0
+    assert RATES.rate_on("2024-06-01T10:30:00") == 10.0
+
+    days = np.array(["2023-12-31", "2024-05-31", "2024-06-01", "2025-01-01"], dtype="datetime64[D]")
+    assert RATES.rates_on(days).tolist() == [RATES.rate_on(str(d)) for d in days] == [5.0, 5.0, 10.0, 10.0]
+
+    with pytest.raises(ValueError):
+        BankRateTable([])
+    print("✅ Bank rate lookup working!")
+
+
+def test_monthly_compounding_with_prorated_final_month():
+    monthly = 0.12 / 12
+    assert compound_interest(100000, 0.12, 0) == 0
+    assert compound_interest(100000, 0.12, -5) == 0
+    assert compound_interest(100000, 0.12, DAYS_PER_MONTH) == pytest.approx(100000 * monthly)
+    assert compound_interest(100000, 0.12, 2 * DAYS_PER_MONTH) == pytest.approx(100000 * ((1 + monthly) ** 2 - 1))
+    # 2.5 months: two compounded rests, then simple interest for the half month
+    assert compound_interest(100000, 0.12, 2.5 * DAYS_PER_MONTH) == \
+        pytest.approx(100000 * ((1 + monthly) ** 2 * (1 + monthly / 2) - 1))
+    print("✅ Monthly compounding working!")
+
+
+def test_interest_across_a_bank_rate_change():
+    """The rate in force the day after the due date applies to the whole delay"""
+    # Due 2024-05-30: the 5% rate (15% after 3x) applies even after the June change
+    before = interest_for_invoice(100000, "2024-04-15", 45, paid_date="2024-08-30", rates=RATES)
+    assert before["due_date"] == "2024-05-30"
+    assert before["days_late"] == 92
+    assert before["bank_rate"] == 5.0 and before["interest_rate"] == 15.0
+    assert before["interest"] == pytest.approx(round(float(compound_interest(100000, 0.15, 92)), 2))
+
+    # Due 2024-05-31: the day after is 2024-06-01, so the new 10% rate (30%) applies
+    after = interest_for_invoice(100000, "2024-04-16", 45, paid_date="2024-08-31", rates=RATES)
+    assert after["bank_rate"] == 10.0 and after["interest_rate"] == 30.0
+    assert after["interest"] > 1.9 * before["interest"]
+
+    # The vectorized ledger pass agrees invoice by invoice
+    invoices = [
+        {"invoice_id": "A", "vendor_name": "X", "amount": 100000, "invoice_date": "2024-04-15", "paid_date": "2024-08-30"},
+        {"invoice_id": "B", "vendor_name": "Y", "amount": 100000, "invoice_date": "2024-04-16", "paid_date": "2024-08-31"},
+        {"invoice_id": "C", "vendor_name": "Z", "amount": 50000, "invoice_date": "2024-04-16", "paid": True},
+        {"invoice_id": "D", "vendor_name": "Z", "amount": 50000, "invoice_date": "2024-09-01"},
+    ]
+    ledger = accrue_ledger_interest(invoices, as_of=datetime(2024, 10, 1), rates=RATES)
+    by_id = {t["invoice_id"]: t for t in ledger["top_interest"]}
+    assert ledger["late_count"] == 2
+    assert by_id["A"]["interest"] == before["interest"] and by_id["A"]["interest_rate"] == 15.0
+    assert by_id["B"]["interest"] == after["interest"] and by_id["B"]["interest_rate"] == 30.0
+    assert ledger["total_interest"] == pytest.approx(before["interest"] + after["interest"], abs=0.01)
+    print("✅ Interest across a bank rate change working!")
+
+
+if __name__ == "__main__":
+    test_bank_rate_switches_on_effective_date()
+    test_monthly_compounding_with_prorated_final_month()
+    test_interest_across_a_bank_rate_change()
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+import itertools
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("google.adk")  # agents.risk_agent imports its Agent on load
+
+from agents.risk_agent.payment_optimizer import _evict, optimize_payments
+
+AS_OF = datetime(2025, 3, 3, 10, 0)
+
+
+def _invoice(invoice_id, amount, days_to_deadline, paid=False):
+    invoice_date = AS_OF.date() - timedelta(days=45 - days_to_deadline)
+    return {"invoice_id": invoice_id, "vendor_name": f"Vendor {invoice_id}", "amount": amount,
+            "invoice_date": invoice_date.isoformat(), "paid": paid}
+
+
+def _due_week(inv):
+    days_to_deadline = 45 - (AS_OF.date() - datetime.fromisoformat(inv["invoice_date"]).date()).days
+    return days_to_deadline // 7
+
+
+def _caps(weekly_budget, weeks, cash_on_hand=0.0):
+    return [cash_on_hand + weekly_budget * (t + 1) for t in range(weeks)]
+
+
+def _check_plan_within_budget(result, invoices, weekly_budget, weeks, cash_on_hand=0.0):
+    due_week = {inv["invoice_id"]: _due_week(inv) for inv in invoices}
+    spent = 0.0
+    for week, cap in zip(result["plan"], _caps(weekly_budget, weeks, cash_on_hand)):
+        spent += week["spend"]
+        assert spent <= cap + 1e-6
+        for inv in week["invoices"]:
+            assert week["week"] - 1 <= due_week[inv["invoice_id"]]  # paid by its deadline
+
+
+def _best_possible(invoices, weekly_budget, weeks, cash_on_hand=0.0):
+    """Brute force: the largest amount that can be paid on time"""
+    caps = _caps(weekly_budget, weeks, cash_on_hand)
+    due = [(inv["amount"], _due_week(inv)) for inv in invoices]
+    best = 0
+    for picks in itertools.product((False, True), repeat=len(due)):
+        chosen = [d for d, pick in zip(due, picks) if pick]
+        if all(sum(a for a, w in chosen if w <= t) <= caps[t] for t in range(weeks)):
+            best = max(best, sum(a for a, _ in chosen))
+    return best
+
+
+def test_evict_covers_overflow_cheaply():
+    """_evict frees at least the overflow, at the least cost on a small case"""
+    amounts = np.array([25000, 20000, 10000, 4000], dtype=np.int64)
+    chosen = np.arange(len(amounts))
+
+    assert _evict(chosen, amounts, 15000) == [1]       # one 20000 invoice, not 10000 + 20000
+    assert sorted(_evict(chosen, amounts, 12000)) == [2, 3]  # 10000 + 4000 beats 20000
+    assert sorted(_evict(chosen, amounts, 4000)) == [3]
+    assert sorted(_evict(chosen, amounts, 50000)) == [0, 1, 2]
+
+    random.seed(7)
+    for _ in range(200):
+        amounts = np.array([random.randint(1, 50) for _ in range(random.randint(1, 8))], dtype=np.int64)
+        chosen = np.arange(len(amounts))
+        overflow = random.randint(1, int(amounts.sum()))
+        dropped = _evict(chosen, amounts, overflow)
+        assert len(set(dropped)) == len(dropped)
+        assert int(amounts[dropped].sum()) >= overflow
+    print("✅ Eviction working!")
+
+
+def test_carry_over_plan_is_optimal():
+    """Unspent cash carries over; on a hand-checked case the whole budget goes to on-time payments"""
+    # Week 1: 55K due against 40K of cash -> drop the 20K invoice, 5K left over.
+    # Week 2: a 45K invoice (more than one week's budget) fits only with the carry-over.
+    invoices = [
+        _invoice("A", 25000, 3),
+        _invoice("B", 20000, 5),
+        _invoice("C", 10000, 6),
+        _invoice("D", 45000, 10),
+    ]
+    result = optimize_payments(invoices, weekly_budget=40000, weeks=2, as_of=AS_OF)
+
+    assert result["scheduled_amount"] == _best_possible(invoices, 40000, 2) == 80000
+    assert result["deductions_preserved"] == pytest.approx(80000 * 0.35)
+    assert [inv["invoice_id"] for inv in result["unfunded"]] == ["B"]
+    assert [week["spend"] for week in result["plan"]] == [35000, 45000]
+    _check_plan_within_budget(result, invoices, 40000, 2)
+    print("✅ Carry-over plan working!")
+
+
+def test_budget_never_exceeded():
+    """Random ledgers: cumulative spend stays within cash available, every payment on time"""
+    random.seed(11)
+    for _ in range(300):
+        weeks = random.randint(1, 4)
+        invoices = [_invoice(f"INV-{i}", random.randint(1, 40) * 1000, random.randint(-5, weeks * 7 + 5))
+                    for i in range(random.randint(1, 12))]
+        budget = random.randint(0, 30) * 1000
+        cash = random.choice((0, 5000, 12500.5))
+
+        result = optimize_payments(invoices, budget, weeks, cash, as_of=AS_OF)
+        _check_plan_within_budget(result, invoices, budget, weeks, cash)
+        in_horizon = [inv for inv in invoices if 0 <= _due_week(inv) < weeks]
+        assert result["scheduled_amount"] <= _best_possible(in_horizon, budget, weeks, cash) + 1e-6
+    print("✅ Budget respected!")
+
+
+def test_paid_invoices_are_not_planned():
+    invoices = [_invoice("OPEN", 30000, 2), _invoice("PAID", 30000, 2, paid=True),
+                _invoice("PAID-LATE", 10000, -3, paid=True)]
+    result = optimize_payments(invoices, weekly_budget=100000, weeks=1, as_of=AS_OF)
+
+    assert result["paid_count"] == 2
+    assert result["due_in_horizon"] == 1
+    assert result["scheduled_amount"] == 30000
+    assert result["already_overdue"]["count"] == 0
+    assert result["invalid_count"] == 0
+    print("✅ Paid invoices skipped!")
+
+
+if __name__ == "__main__":
+    test_evict_covers_overflow_cheaply()
+    test_carry_over_plan_is_optimal()
+    test_budget_never_exceeded()
+    test_paid_invoices_are_not_planned()
@@ -0,0 +1,77 @@
+import importlib.util
+from pathlib import Path
+
+# Load the module on its own: the research_agent package imports the agent's
+# search/scraping dependencies, which the planner does not need
+_spec = importlib.util.spec_from_file_location(
+    "query_planner", Path(__file__).parent / "agents" / "research_agent" / "tools" / "query_planner.py"
+)
+query_planner = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(query_planner)
+plan_queries = query_planner.plan_queries
+
+
+def _stats(**queries):
+    """{query: (avg_score, topics, urls)} -> aggregated stats as load_query_stats returns them"""
+    records = [{"query": q, "score": score, "topics": topics, "urls": urls}
+               for q, (score, topics, urls) in queries.items()]
+    return query_planner.aggregate_query_stats(records)
+
+
+def _dropped(plan):
+    return {d["query"]: d["reason"] for d in plan["dropped"]}
+
+
+def test_overlapping_queries_merge_into_the_stronger():
+    stats = _stats(a=(10, ["section_43bh"], ["u1", "u2", "u3"]),
+                   b=(8, ["penalties"], ["u1", "u2", "u3", "u4"]),   # 3/4 overlap with a
+                   c=(9, ["udyam"], ["u7", "u8"]))
+    plan = plan_queries(["a", "b", "c", "new"], stats)
+    assert plan["queries"] == ["a", "c", "new"]
+    assert plan["dropped"] == [{"query": "b", "reason": "overlap", "merged_into": "a"}]
+    # The merged query's topics are still expected from its twin
+    assert plan["expected_topics"] == ["penalties", "section_43bh", "udyam"]
+    assert plan["unobserved"] == ["new"] and plan["searches_saved"] == 1
+    print("✅ Overlap merge working!")
+
+
+def test_low_yield_queries_drop_unless_they_own_a_topic():
+    stats = _stats(strong=(10, ["section_43bh"], ["u1"]),
+                   weak_dup=(1, ["section_43bh"], ["u2"]),
+                   weak_unique=(1, ["udyam"], ["u3"]))
+    plan = plan_queries(["strong", "weak_dup", "weak_unique"], stats)
+    assert plan["queries"] == ["strong", "weak_unique"]
+    assert _dropped(plan) == {"weak_dup": "low_yield"}
+    print("✅ Low-yield drop working!")
+
+
+def test_budget_prefers_unobserved_then_best_scores():
+    stats = _stats(a=(10, ["section_43bh"], ["u1"]), b=(20, ["penalties"], ["u2"]), c=(15, ["udyam"], ["u3"]))
+    plan = plan_queries(["a", "b", "c", "new"], stats, max_queries=2)
+    assert plan["queries"] == ["b", "new"]
+    assert _dropped(plan) == {"a": "budget", "c": "budget"}
+    print("✅ Search budget working!")
+
+
+def test_plan_is_never_empty():
+    """All low-yield and no topics: the best query still runs"""
+    stats = _stats(a=(1, [], ["u1"]), b=(3, [], ["u2"]), c=(2, [], ["u3"]))
+    plan = plan_queries(["a", "b", "c"], stats)
+    assert plan["queries"] == ["b"]
+    assert _dropped(plan) == {"a": "low_yield", "c": "low_yield"}
+
+    # Two weak queries covering the same topic: the stronger one is kept
+    stats = _stats(a=(3, ["udyam"], ["u1"]), b=(1, ["udyam"], ["u2"]))
+    assert plan_queries(["a", "b"], stats)["queries"] == ["a"]
+
+    # With an unobserved candidate there is still something to search
+    assert plan_queries(["a", "new"], _stats(a=(1, [], ["u1"])))["queries"] == ["new"]
+    assert plan_queries([], {})["queries"] == []
+    print("✅ Empty-plan guard working!")
+
+
+if __name__ == "__main__":
+    test_overlapping_queries_merge_into_the_stronger()
+    test_low_yield_queries_drop_unless_they_own_a_topic()
+    test_budget_prefers_unobserved_then_best_scores()
+    test_plan_is_never_empty()
@@ -0,0 +1,78 @@
+import csv
+import json
+import os
+import tempfile
+
+from agents.notification_agent.invoice_monitor import InvoiceMonitor
+from agents.notification_agent.state_manager import StateManager
+from agents.notification_agent.reconciliation import reconcile_payments, normalize_vendor
+
+
+def test_reconcile_payments():
+    """Reference, exact, tolerance and review matches, marked paid in one batch"""
+    with tempfile.TemporaryDirectory() as tmp:
+        invoices_file = os.path.join(tmp, "invoices.json")
+        state_file = os.path.join(tmp, "state.json")
+        payments_file = os.path.join(tmp, "payments.csv")
+
+        invoices = [
+            {"invoice_id": "INV-001", "client_name": "ABC Pvt Ltd", "amount": 50000, "invoice_date": "2025-01-01"},
+            {"invoice_id": "INV-002", "client_name": "ABC Pvt Ltd", "amount": 12000, "invoice_date": "2025-01-05"},
+            {"invoice_id": "INV-003", "client_name": "ABC Pvt Ltd", "amount": 12000, "invoice_date": "2025-01-02"},
+            {"invoice_id": "INV-004", "client_name": "XYZ Traders", "amount": 7500, "invoice_date": "2025-01-03"},
+            {"invoice_id": "INV-005", "client_name": "XYZ Traders", "amount": 9999, "invoice_date": "2025-01-03"},
+            {"invoice_id": "INV-006", "client_name": "PQR LLP", "amount": 1000, "invoice_date": "2025-01-03",
+             "paid": True}
+        ]
+        with open(invoices_file, "w") as f:
+            json.dump(invoices, f)
+
+        with open(payments_file, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Date", "Beneficiary Name", "Narration", "Withdrawal Amt."])
+            writer.writerow(["05/02/2025", "abc private limited", "NEFT/INV-001/ABC", "50,000.00"])
+            writer.writerow(["06/02/2025", "ABC PVT. LTD.", "NEFT payment", "12,000.00"])
+            writer.writerow(["07/02/2025", "XYZ Traders", "IMPS", "7,499.50"])
+            writer.writerow(["07/02/2025", "XYZ Traders", "Part payment INV-005", "5,000.00"])
+            writer.writerow(["08/02/2025", "Unknown Co", "UPI", "300.00"])
+            writer.writerow(["08/02/2025", "Nobody", "", "n/a"])
+
+        monitor = InvoiceMonitor(invoices_file)
+        state = StateManager(state_file)
+        paid_events = []
+        state.add_paid_listener(paid_events.append)
+
+        dry = reconcile_payments(payments_file, monitor, state, dry_run=True)
+        assert dry["matched"] == 3 and dry["marked_paid"] == 0
+        assert not state.is_paid("INV-001")
+
+        report = reconcile_payments(payments_file, monitor, state)
+        assert report["open_invoices"] == 5
+        assert report["by_method"] == {"reference": 1, "exact": 1, "tolerance": 1, "review": 1,
+                                       "unmatched": 1, "invalid": 1}
+        matched = {m["invoice_id"]: m["method"] for m in report["matches"]}
+        # Equal-amount payment settles the invoice with the older deadline
+        assert matched == {"INV-001": "reference", "INV-003": "exact", "INV-004": "tolerance"}
+        assert report["needs_review"][0]["invoice_id"] == "INV-005"
+
+        # One batch: invoices never notified still get a paid state entry
+        assert all(state.is_paid(i) for i in matched)
+        assert not state.is_paid("INV-002")
+        assert sorted(paid_events) == sorted(matched)
+        # Persisted: a fresh StateManager replays the same paid marks
+        reloaded = StateManager(state_file)
+        assert set(reloaded.state) == set(matched)
+        assert all(reloaded.is_paid(i) for i in matched)
+        reloaded.close()
+
+        # Already-paid invoices are no longer candidates
+        again = reconcile_payments(payments_file, monitor, state, dry_run=True)
+        assert again["open_invoices"] == 2
+        state.close()
+
+        assert normalize_vendor("ABC Pvt. Ltd.") == normalize_vendor("abc private limited") == "abc"
+        print("✅ Payment reconciliation working!")
+
+
+if __name__ == "__main__":
+    test_reconcile_payments()
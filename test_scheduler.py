@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+from agents.notification_agent.scheduler import (
+    EXPLOSIVE_REPEAT, NotificationQueue, NotificationScheduler
+)
+
+INVOICE_TIME = datetime(2025, 1, 1, 9, 0)
+DEADLINE = INVOICE_TIME + timedelta(days=45)
+
+
+def _notifies_at(scheduler, last, when):
+    level = scheduler._level_at(DEADLINE, when)
+    return scheduler.should_notify_now(last, level, INVOICE_TIME, now=when)
+
+
+def test_first_notification_is_immediate():
+    scheduler = NotificationScheduler()
+    now = datetime(2025, 1, 3, 14, 37)
+    assert scheduler.next_notification_time(None, INVOICE_TIME, DEADLINE, now=now) == now
+
+
+def test_next_time_lands_in_daily_window():
+    """12h interval elapses at 21:00, but regular notifications wait for the 09:00 window"""
+    scheduler = NotificationScheduler()
+    last = datetime(2025, 1, 2, 9, 0)
+    now = datetime(2025, 1, 2, 10, 0)
+
+    when = scheduler.next_notification_time(last, INVOICE_TIME, DEADLINE, now=now)
+
+    assert when == datetime(2025, 1, 3, 8, 45)
+    assert _notifies_at(scheduler, last, when)
+    assert not _notifies_at(scheduler, last, when - timedelta(minutes=1))
+    print("✅ Daily alignment window working!")
+
+
+def test_level_boundary_brings_next_time_forward():
+    """Turning explosive mid-day notifies at once instead of at the next window"""
+    scheduler = NotificationScheduler()
+    deadline = datetime(2025, 2, 18, 15, 0)  # explosive from 2025-02-15 15:00
+    last = datetime(2025, 2, 15, 9, 0)       # high_critical: 2h interval, next window tomorrow
+    now = datetime(2025, 2, 15, 10, 0)
+
+    when = scheduler.next_notification_time(last, INVOICE_TIME, deadline, now=now)
+
+    assert when == datetime(2025, 2, 15, 15, 0, 0, 1)
+    assert scheduler._level_at(deadline, when) == "explosive"
+    assert scheduler._level_at(deadline, when - timedelta(microseconds=1)) == "high_critical"
+    print("✅ Level boundary crossing working!")
+
+
+def test_explosive_repeats_every_15_minutes():
+    scheduler = NotificationScheduler()
+    now = DEADLINE - timedelta(days=1)
+
+    recent = now - timedelta(minutes=5)
+    assert scheduler.next_notification_time(recent, INVOICE_TIME, DEADLINE, now=now) == recent + EXPLOSIVE_REPEAT
+
+    stale = now - timedelta(minutes=20)
+    assert scheduler.next_notification_time(stale, INVOICE_TIME, DEADLINE, now=now) == now
+    print("✅ Explosive repeat working!")
+
+
+def test_queue_pops_due_and_drops_stale_entries():
+    queue = NotificationQueue()
+    t0 = datetime(2025, 1, 1, 9, 0)
+
+    queue.schedule("INV-A", t0 + timedelta(minutes=10))
+    queue.schedule("INV-B", t0 + timedelta(minutes=20))
+    queue.schedule("INV-C", t0 + timedelta(minutes=30))
+    queue.schedule("INV-A", t0 + timedelta(minutes=40))  # rescheduled: 10-minute entry is stale
+    queue.remove("INV-B")                                # removed: 20-minute entry is stale
+
+    assert len(queue) == 2
+    assert queue.next_due() == t0 + timedelta(minutes=30)
+    assert queue.seconds_until_next(3600, now=t0) == 30 * 60
+    assert queue.seconds_until_next(60, now=t0) == 60
+
+    assert queue.pop_due(now=t0 + timedelta(minutes=25)) == []
+    assert queue.pop_due(now=t0 + timedelta(minutes=45)) == ["INV-C", "INV-A"]
+    assert len(queue) == 0 and queue.next_due() is None
+    assert queue.seconds_until_next(120, now=t0) == 120
+    print("✅ Notification queue working!")
+
+
+if __name__ == "__main__":
+    test_first_notification_is_immediate()
+    test_next_time_lands_in_daily_window()
+    test_level_boundary_brings_next_time_forward()
+    test_explosive_repeats_every_15_minutes()
+    test_queue_pops_due_and_drops_stale_entries()
@@ -0,0 +1,80 @@
+import socket
+from email.message import EmailMessage
+
+import pytest
+
+from agents.notification_agent.smtp_pool import SmtpConnectionPool
+
+aiosmtpd = pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller  # noqa: E402
+
+
+class _Recorder:
+    """Local SMTP stand-in: remembers recipients and how many sessions were opened"""
+
+    def __init__(self):
+        self.recipients = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.recipients.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _message(to: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "alerts@example.com"
+    msg["To"] = to
+    msg["Subject"] = "Invoice reminder"
+    msg.set_content("Payment due soon")
+    return msg
+
+
+def test_smtp_pool_reuse_limits_and_reconnect():
+    """Sessions are reused, rotated at the message limit and replaced when they die"""
+    handler = _Recorder()
+    port = _free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    pool = SmtpConnectionPool("127.0.0.1", port, use_tls=False, max_connections=1,
+                              max_messages_per_connection=2, health_check_after=0)
+    try:
+        # Batch of 5 with a 2-message limit: 3 sessions
+        results = pool.send_many([_message(f"user{i}@example.com") for i in range(5)])
+        assert results == [True] * 5
+        assert pool.connections_opened == 3
+        assert handler.recipients == [f"user{i}@example.com" for i in range(5)]
+
+        # The 5th session still has room for one more message
+        pool.send_message(_message("again@example.com"))
+        assert pool.connections_opened == 3
+
+        # Server restart: the idle session fails its NOOP check and is replaced
+        controller.stop()
+        controller = Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        pool.send_message(_message("after-restart@example.com"))
+        assert pool.connections_opened == 4
+        assert handler.recipients[-1] == "after-restart@example.com"
+        print("✅ SMTP pool working!")
+    finally:
+        pool.close()
+        controller.stop()
+
+
+def test_smtp_pool_unreachable_server():
+    """A batch against a dead server gives up quickly and reports every message failed"""
+    pool = SmtpConnectionPool("127.0.0.1", _free_port(), use_tls=False, timeout=2)
+    assert pool.send_many([_message("a@example.com"), _message("b@example.com")]) == [False, False]
+
+
+if __name__ == "__main__":
+    test_smtp_pool_reuse_limits_and_reconnect()
+    test_smtp_pool_unreachable_server()
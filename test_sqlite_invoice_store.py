@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from agents.notification_agent.invoice_store import SqliteInvoiceStore
+
+
+def _invoice(invoice_id, invoice_datetime, paid=False):
+    return {"invoice_id": invoice_id, "client_name": "ABC", "amount": 1000,
+            "invoice_datetime": invoice_datetime, "deadline_days": 10, "paid": paid}
+
+
+def test_sqlite_store_keyset_paging():
+    """Pages smaller than the result set return every row once, in (paid, deadline, id) order"""
+    store = SqliteInvoiceStore(":memory:", page_size=3)
+    invoices = [_invoice(f"INV-{i:02d}", f"2025-01-{1 + i // 2:02d}T09:00:00") for i in range(10)]  # pairs share a deadline
+    invoices += [_invoice("PAID-1", "2025-01-01T09:00:00", paid=True),
+                 _invoice("PAID-2", "2025-01-09T09:00:00", paid=True),
+                 {"invoice_id": "BAD", "client_name": "ABC", "amount": 1, "invoice_date": "n/a"}]
+    store.upsert(invoices[::-1])
+
+    try:
+        unpaid = [f"INV-{i:02d}" for i in range(10)]
+        assert [inv["invoice_id"] for inv in store.iter_invoices()] == ["BAD"] + unpaid + ["PAID-1", "PAID-2"]
+        assert [inv["invoice_id"] for inv in store.iter_active()] == ["BAD"] + unpaid
+        assert store.count_active() == 11
+
+        # Inclusive deadline window; unusable dates never match
+        due = store.iter_due_between(datetime(2025, 1, 12, 9, 0), datetime(2025, 1, 14, 9, 0))
+        assert [inv["invoice_id"] for inv in due] == ["INV-02", "INV-03", "INV-04", "INV-05", "INV-06", "INV-07"]
+        assert len(list(store.iter_due_between())) == 10
+
+        # Writes between pages don't repeat or skip the remaining rows
+        pages = store.iter_active()
+        first = [next(pages)["invoice_id"] for _ in range(3)]
+        store.upsert([_invoice("INV-00", "2025-01-01T09:00:00", paid=True)])
+        rest = [inv["invoice_id"] for inv in pages]
+        assert first + rest == ["BAD"] + unpaid
+        assert store.get("INV-00")["paid"] is True
+        assert store.get("MISSING") is None
+        print("✅ SQLite invoice store paging working!")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    test_sqlite_store_keyset_paging()
@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+import tempfile
+
+from agents.notification_agent.state_manager import StateManager, SqliteStateManager
+
+
+def _notify_many(db_path, worker, count):
+    state = SqliteStateManager(db_path, legacy_file=None)
+    for i in range(count):
+        state.update_notification_sent("INV-SHARED", [f"worker-{worker}"], "calm")
+        state.update_notification_sent(f"INV-{worker}-{i % 5}", ["desktop"], "calm")
+    state.close()
+
+
+def test_sqlite_state_migration():
+    """Existing JSON state (snapshot + log) is imported once"""
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file = os.path.join(tmp, "state.json")
+        db_path = os.path.join(tmp, "state.db")
+
+        legacy = StateManager(json_file)
+        legacy.update_notification_sent("INV-001", ["desktop"], "urgent")
+        legacy.mark_many_as_paid(["INV-002"])
+        legacy.close()
+
+        state = SqliteStateManager(db_path, legacy_file=json_file)
+        paid_events = []
+        state.add_paid_listener(paid_events.append)
+        assert state.get_notification_count("INV-001") == 1
+        assert state.get_last_notification_time("INV-001") is not None
+        assert state.is_paid("INV-002") and not state.is_paid("INV-001")
+
+        state.disable_notifications("INV-001")
+        state.mark_many_as_paid(["INV-001", "INV-003"])
+        assert paid_events == ["INV-001", "INV-003"]
+        state.close()
+
+        # Migration runs only once: later JSON changes are not re-imported
+        legacy = StateManager(json_file)
+        legacy.update_notification_sent("INV-009", ["desktop"], "calm")
+        legacy.close()
+
+        reopened = SqliteStateManager(db_path, legacy_file=json_file)
+        assert not reopened.is_notification_enabled("INV-001")
+        assert reopened.is_paid("INV-003")
+        assert reopened.get_invoice_state("INV-009") is None
+        reopened.close()
+        print("✅ SQLite state migration working!")
+
+
+def test_sqlite_state_concurrent_writers():
+    """Several processes updating the same rows lose no updates"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "state.db")
+        SqliteStateManager(db_path, legacy_file=None).close()
+
+        workers = [multiprocessing.Process(target=_notify_many, args=(db_path, w, 40)) for w in range(4)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join()
+            assert p.exitcode == 0
+
+        state = SqliteStateManager(db_path, legacy_file=None)
+        assert state.get_notification_count("INV-SHARED") == 160
+        assert sorted(state.get_invoice_state("INV-SHARED")["channels_used"]) == [f"worker-{w}" for w in range(4)]
+        assert sum(state.get_notification_count(f"INV-{w}-{i}") for w in range(4) for i in range(5)) == 160
+        state.close()
+        print("✅ Concurrent state updates working!")
+
+
+if __name__ == "__main__":
+    test_sqlite_state_migration()
+    test_sqlite_state_concurrent_writers()
@@ -0,0 +1,152 @@
+from lib.firebase_config import (
+    set_db, save_to_firestore, get_from_firestore, get_page_from_firestore,
+    get_many_from_firestore, read_cache
+)
+from lib.sqlite_store import SQLiteClient, Query
+
+
+def test_sqlite_backend():
+    """Exercise the SQLite backend through the firebase_config API"""
+    db = SQLiteClient(":memory:")
+    set_db(db)
+
+    try:
+        # Add + get by ID
+        doc_id = save_to_firestore("research_cache", {"topic": "udyam", "sources": 3})
+        snap = db.collection("research_cache").document(doc_id).get()
+        assert snap.exists and snap.to_dict()["sources"] == 3
+
+        save_to_firestore("research_cache", {"topic": "penalties", "sources": 7})
+        save_to_firestore("research_cache", {"topic": "udyam", "sources": 5})
+
+        # Equality queries, ordering and limits
+        udyam = [d.to_dict() for d in db.collection("research_cache").where("topic", "==", "udyam").stream()]
+        assert [d["sources"] for d in udyam] == [3, 5]
+
+        top = (db.collection("research_cache")
+               .order_by("sources", direction=Query.DESCENDING)
+               .limit(1)
+               .get())
+        assert top[0].to_dict()["topic"] == "penalties"
+
+        assert len(get_from_firestore("research_cache", limit=2)) == 2
+
+        # Updates and batches
+        snap.reference.update({"sources": 4, "meta.checked": True})
+        assert snap.reference.get().to_dict() == {"topic": "udyam", "sources": 4, "meta": {"checked": True}}
+
+        batch = db.batch()
+        for i in range(3):
+            batch.set(db.collection("search_usage").document(f"doc-{i}"), {"count": i, "active": i != 1})
+        batch.commit()
+        active = db.collection("search_usage").where("active", "==", True).get()
+        assert sorted(d.id for d in active) == ["doc-0", "doc-2"]
+
+        print("✅ SQLite backend working!")
+    finally:
+        set_db(None)
+
+
+def test_insertion_order_cursor_pages():
+    """Ties after order_by keep insertion order, and cursors resume within a tie"""
+    db = SQLiteClient(":memory:")
+    col = db.collection("search_usage")
+    for doc_id in ["c", "a", "d", "b", "e"]:
+        col.document(doc_id).set({"group": 1})
+
+    assert [d.id for d in col.stream()] == ["c", "a", "d", "b", "e"]
+
+    seen, last = [], None
+    while True:
+        query = col.order_by("group").limit(2)
+        page = (query.start_after(last) if last else query).get()
+        seen += [d.id for d in page]
+        if len(page) < 2:
+            break
+        last = page[-1]
+    assert seen == ["c", "a", "d", "b", "e"]
+
+    # Rewriting a document keeps its place; order_by("__name__") gives Firestore's ID order
+    col.document("c").set({"group": 1, "updated": True})
+    assert [d.id for d in col.stream()] == ["c", "a", "d", "b", "e"]
+    assert [d.id for d in col.order_by("__name__").stream()] == ["a", "b", "c", "d", "e"]
+    db.close()
+
+
+def _pages(query, size):
+    seen, last = [], None
+    while True:
+        page = (query.start_after(last) if last else query).limit(size).get()
+        seen += [d.id for d in page]
+        if len(page) < size:
+            return seen
+        last = page[-1]
+
+
+def test_order_by_skips_missing_fields_and_pages_through_nulls():
+    """Documents without the field are left out; JSON nulls sort first ascending, last descending"""
+    db = SQLiteClient(":memory:")
+    col = db.collection("web_research_43bh")
+    for doc_id, data in [("a", {"rank": 2}), ("b", {"rank": None}), ("c", {}),
+                         ("d", {"rank": 1}), ("e", {"rank": None}), ("f", {"rank": 2})]:
+        col.document(doc_id).set(data)
+
+    ascending = col.order_by("rank")
+    descending = col.order_by("rank", direction=Query.DESCENDING)
+    assert [d.id for d in ascending.stream()] == ["b", "e", "d", "a", "f"]
+    assert [d.id for d in descending.stream()] == ["a", "f", "d", "b", "e"]
+
+    # Every page size resumes correctly, including from a null-valued cursor
+    for size in (1, 2, 3):
+        assert _pages(ascending, size) == ["b", "e", "d", "a", "f"]
+        assert _pages(descending, size) == ["a", "f", "d", "b", "e"]
+    db.close()
+
+
+def test_projection_pagination_and_cache():
+    """Field selection, cursor pages, bulk get and the read-through cache"""
+    db = SQLiteClient(":memory:")
+    set_db(db)
+
+    try:
+        batch = db.batch()
+        for i in range(25):
+            batch.set(db.collection("web_research_43bh").document(f"doc-{i:02d}"),
+                      {"rank": i % 5, "title": f"Page {i}", "content": "x" * 1000})
+        batch.commit()
+
+        # Pages cover every document exactly once, in (rank desc, id) order
+        seen, cursor = [], None
+        while True:
+            page = get_page_from_firestore("web_research_43bh", page_size=10, fields=["rank", "title"],
+                                           order_by="rank", descending=True, cursor=cursor)
+            seen.extend(page["documents"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert len(seen) == 25 and len({d["_id"] for d in seen}) == 25
+        assert [d["rank"] for d in seen] == sorted((d["rank"] for d in seen), reverse=True)
+        assert all("content" not in d for d in seen)
+
+        # Bulk fetch by ID keeps request order and reports missing docs
+        docs = get_many_from_firestore("web_research_43bh", ["doc-03", "missing", "doc-01"], fields=["title"])
+        assert docs == {"doc-03": {"title": "Page 3"}, "missing": None, "doc-01": {"title": "Page 1"}}
+
+        # Second read is served from cache; saving to the collection invalidates it
+        hits = read_cache.hits
+        get_from_firestore("web_research_43bh", limit=5, fields=["title"])
+        get_from_firestore("web_research_43bh", limit=5, fields=["title"])
+        assert read_cache.hits == hits + 1
+        save_to_firestore("web_research_43bh", {"rank": 9, "title": "New"})
+        assert all(key[1] != "web_research_43bh" for key in read_cache._data)
+
+        print("✅ Projection, pagination and cache working!")
+    finally:
+        set_db(None)
+
+
+if __name__ == "__main__":
+    test_sqlite_backend()
+    test_insertion_order_cursor_pages()
+    test_order_by_skips_missing_fields_and_pages_through_nulls()
+    test_projection_pagination_and_cache()
@@ -0,0 +1,79 @@
+import importlib.util
+from pathlib import Path
+
+# Load the module on its own: the research_agent package imports the agent's
+# search/scraping dependencies, which the summarizer does not need
+_spec = importlib.util.spec_from_file_location(
+    "summarizer", Path(__file__).parent / "agents" / "research_agent" / "tools" / "summarizer.py"
+)
+summarizer = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(summarizer)
+
+PAGE = (
+    "Section 43B(h) of the Income Tax Act requires payment to MSME suppliers within 45 days. "
+    "The weather in Mumbai was pleasant and sunny this week overall. "
+    "Delayed payment attracts compound interest at three times the bank rate notified by RBI. "
+    "Our office canteen serves great coffee every single morning at nine. "
+    "The rule took effect from 1st April 2024 for micro and small enterprises. "
+    "Short one."
+)
+
+
+def test_summary_keeps_relevant_sentences_in_page_order():
+    sentences = summarizer.split_sentences(PAGE)
+    assert len(sentences) == 5  # "Short one." is under the 30-character floor
+    assert "Short one." not in sentences
+
+    summary = summarizer.summarize_text(PAGE, max_sentences=2)
+    assert summary == (
+        "Section 43B(h) of the Income Tax Act requires payment to MSME suppliers within 45 days. "
+        "Delayed payment attracts compound interest at three times the bank rate notified by RBI."
+    )
+
+    # Topic keywords steer the choice; max_chars is a hard cap
+    udyam = summarizer.summarize_text(PAGE, keywords=["micro", "small", "enterprises"], max_sentences=1)
+    assert udyam == "The rule took effect from 1st April 2024 for micro and small enterprises."
+    assert len(summarizer.summarize_text(PAGE, max_chars=50)) <= 50
+
+    # No usable sentences: fall back to the start of the text
+    assert summarizer.summarize_text("Too short.", max_chars=5) == "Too s"
+    print("✅ Summary sentence selection working!")
+
+
+def test_key_facts_most_frequent_first():
+    text = PAGE + " Pay within 15 days. Again, 45 days. Interest of 18% a year, 18 percent, 9.5 per cent. 2024-04-01."
+    facts = summarizer.extract_key_facts(text)
+    assert facts["days"] == ["45 days", "15 days"]
+    assert facts["percentages"] == ["18%", "9.5%"]
+    assert facts["dates"] == ["1st April 2024", "2024-04-01"]
+    assert summarizer.extract_key_facts(text, max_per_type=1)["days"] == ["45 days"]
+    assert summarizer.extract_key_facts("") == {"days": [], "percentages": [], "dates": []}
+    print("✅ Key fact extraction working!")
+
+
+def test_compact_research_data_drops_content_at_every_level():
+    data = {
+        "topic": "section_43bh",
+        "content": "raw page",
+        "detailed_results": [
+            {"url": "a", "content": "x" * 4000, "summary": "s", "key_facts": {"days": ["45 days"]}},
+            {"url": "b", "nested": {"content": "deep", "keep": 1}},
+        ],
+        "categorized_data": {"penalties": [[{"content": "y", "title": "t"}]]},
+    }
+    assert summarizer.compact_research_data(data) == {
+        "topic": "section_43bh",
+        "detailed_results": [
+            {"url": "a", "summary": "s", "key_facts": {"days": ["45 days"]}},
+            {"url": "b", "nested": {"keep": 1}},
+        ],
+        "categorized_data": {"penalties": [[{"title": "t"}]]},
+    }
+    assert data["content"] == "raw page"  # the input is left alone
+    print("✅ Research data compaction working!")
+
+
+if __name__ == "__main__":
+    test_summary_keeps_relevant_sentences_in_page_order()
+    test_key_facts_most_frequent_first()
+    test_compact_research_data_drops_content_at_every_level()
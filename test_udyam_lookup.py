@@ -0,0 +1,101 @@
+import csv
+import importlib.util
+import os
+import shutil
+import tempfile
+from datetime import date
+from pathlib import Path
+
+# Load the module on its own: the research_agent package imports the agent's
+# search/scraping dependencies, which the registry does not need
+_spec = importlib.util.spec_from_file_location(
+    "udyam_lookup", Path(__file__).parent / "agents" / "research_agent" / "tools" / "udyam_lookup.py"
+)
+udyam_lookup = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(udyam_lookup)
+UdyamRegistry = udyam_lookup.UdyamRegistry
+
+TODAY = date(2025, 6, 1)
+ROWS = [
+    # udyam_number, classification, valid_from, valid_until, status
+    ("UDYAM-MH-01-0000001", "micro", "2020-01-01", "", "active"),
+    ("udyam_mh_01_0000002 ", "Small", "01/01/2020", "31/12/2030", "active"),
+    ("UDYAM-MH-01-0000003", "medium", "2020-01-01", "", "active"),
+    ("UDYAM-MH-01-0000004", "micro", "01/01/2015", "31/12/2019", "active"),  # expired, DD/MM/YYYY
+    ("UDYAM-MH-01-0000005", "micro", "2020-01-01", "", "cancelled"),
+    ("UDYAM-MH-01-0000006", "micro", "2020-01-01", "someday", "active"),     # unreadable date
+    ("MH-01-0000007", "micro", "2020-01-01", "", "active"),                  # malformed number
+]
+
+
+def _registry_with_rows(tmp, remote_lookup=udyam_lookup.stub_remote_lookup):
+    path = os.path.join(tmp, "registry.csv")
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["udyam_number", "enterprise_name", "classification", "valid_from", "valid_until", "status"])
+        for number, classification, valid_from, valid_until, status in ROWS:
+            writer.writerow([number, f"Vendor {number[-1]}", classification, valid_from, valid_until, status])
+    registry = UdyamRegistry(os.path.join(tmp, "udyam.db"), remote_lookup=remote_lookup)
+    return registry, registry.load_bulk_file(path)
+
+
+def test_bulk_load_and_classification():
+    """Micro/small are covered, medium isn't, expired/cancelled aren't valid, bad rows are rejected"""
+    tmp = tempfile.mkdtemp()
+    try:
+        registry, report = _registry_with_rows(tmp)
+        assert report == {"loaded": 5, "rejected": 2}
+        assert registry.count() == 5
+
+        results = registry.lookup_many([f"UDYAM-MH-01-000000{i}" for i in range(1, 7)] + ["bogus"], as_of=TODAY)
+        covered = {n[-1]: (r["valid"], r["section_43bh_applies"]) for n, r in results.items() if r["registered"]}
+        assert covered == {"1": (True, True), "2": (True, True), "3": (True, False),
+                           "4": (False, False), "5": (False, False)}
+        # Dates are stored as ISO whatever the export used
+        assert results["UDYAM-MH-01-0000002"]["valid_until"] == "2030-12-31"
+        assert results["UDYAM-MH-01-0000006"]["source"] == "not_found"
+        assert results["bogus"]["source"] == "invalid_format"
+
+        # Validity is checked against the as_of date, not today
+        assert registry.lookup_many(["UDYAM-MH-01-0000004"], as_of=date(2019, 6, 1))["UDYAM-MH-01-0000004"]["valid"]
+        registry.close()
+        print("✅ Udyam bulk load and classification working!")
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_remote_lookups_are_cached():
+    """Unknown numbers go to the remote lookup once; hits and misses are both cached"""
+    calls = []
+
+    def remote(number):
+        calls.append(number)
+        if number.endswith("9"):
+            return {"classification": "small", "valid_until": "31-12-2030", "status": "active"}
+        return None
+
+    tmp = tempfile.mkdtemp()
+    try:
+        registry, _ = _registry_with_rows(tmp, remote_lookup=remote)
+        numbers = ["UDYAM-MH-01-0000001", "UDYAM-MH-01-0000008", "UDYAM-MH-01-0000009"]
+
+        first = registry.lookup_many(numbers, as_of=TODAY)
+        assert [first[n]["source"] for n in numbers] == ["local", "not_found", "remote"]
+        assert first["UDYAM-MH-01-0000009"]["section_43bh_applies"] is True
+        assert sorted(calls) == ["UDYAM-MH-01-0000008", "UDYAM-MH-01-0000009"]
+
+        registry.lookup_many(numbers, as_of=TODAY)
+        assert len(calls) == 2
+
+        # Local records never reach the remote, and skipping it leaves unknowns unverified
+        assert registry.lookup_many(["UDYAM-MH-01-0000007"], use_remote=False)["UDYAM-MH-01-0000007"]["source"] == "not_found"
+        assert len(calls) == 2
+        registry.close()
+        print("✅ Udyam remote cache working!")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    test_bulk_load_and_classification()
+    test_remote_lookups_are_cached()
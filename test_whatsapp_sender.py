@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+pytest.importorskip("requests")
+from agents.notification_agent.whatsapp_sender import WhatsAppSender  # noqa: E402
+
+
+class _TwilioStub(BaseHTTPRequestHandler):
+    """Messages API stand-in: throttles the first request, rejects one number"""
+
+    received = []
+    throttled = False
+    lock = threading.Lock()
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        with self.lock:
+            if not _TwilioStub.throttled:
+                _TwilioStub.throttled = True
+                return self._reply(429, {"message": "Too Many Requests"}, {"Retry-After": "0.2"})
+            if form["To"][0] == "whatsapp:+10000000000":
+                return self._reply(400, {"message": "Invalid 'To' number"})
+            _TwilioStub.received.append((form["To"][0], form["Body"][0], time.monotonic()))
+            sid = f"SM{len(_TwilioStub.received):04d}"
+        self._reply(201, {"sid": sid})
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_whatsapp_sender_rate_limit_and_retry():
+    """Bulk sends respect the rate limit, retry a 429 and report permanent failures"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _TwilioStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sender = WhatsAppSender("AC123", "token", api_base=f"http://127.0.0.1:{server.server_port}",
+                            messages_per_second=20, max_workers=4, backoff=0.05)
+    try:
+        messages = [(f"+9100000000{i:02d}", f"Reminder {i}") for i in range(30)]
+        messages.append(("+10000000000", "bad number"))
+
+        started = time.monotonic()
+        sids = sender.send_many(messages)
+        elapsed = time.monotonic() - started
+
+        assert all(sid is not None for sid in sids[:30])
+        assert sids[30] is None
+        assert sorted(to for to, _, _ in _TwilioStub.received) == sorted(f"whatsapp:{p}" for p, _ in messages[:30])
+        # 32 requests at 20 msg/s with a 20-message burst: at least 0.6s
+        assert elapsed >= 0.6
+        print("✅ WhatsApp sender working!")
+    finally:
+        sender.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_whatsapp_sender_rate_limit_and_retry()